@@ -1,9 +1,10 @@
 
 import os
 import re
-import requests
 import feedparser
 import urllib.parse
+from crawl_frontier import CrawlFrontier
+from pdf_validate import stream_pdf_download
 
 
 def sanitize_filename(filename):
@@ -18,31 +19,38 @@ def sanitize_filename(filename):
 
 
 
-def download_pdf(pdf_url, file_path):
+def download_pdf(pdf_url, file_path, handoff=None):
     """
     Download a PDF file from a given URL and save it to a specified path.
 
     Parameters:
         pdf_url (str): The URL of the PDF file to download.
         file_path (str): The local path where the PDF will be saved.
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
+
+    Returns:
+        bool: True if the PDF was saved.
     """
     try:
-        # Send a GET request to the PDF URL
-        response = requests.get(pdf_url)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-
-        # Save the PDF content to the specified file
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+        # Stream the PDF to the file, aborting early on non-PDF or oversized responses
+        fetch = handoff.fetch if handoff is not None else stream_pdf_download
+        fetch(pdf_url, file_path)
         print(f"Downloaded: {file_path}")
+        return True
     except Exception as e:
         # Handle any errors that occur during the download
         print(f"Failed to download {pdf_url}: {e}")
+        return False
 
 
-def main():
+def main(handoff=None):
     """
     Main function to handle user interaction and workflow.
+
+    Parameters:
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
     """
     # Get search keywords from the user
     keywords = input("Enter search keywords: ")
@@ -64,8 +72,30 @@ def main():
     # URL encode the keywords to ensure they are safe for use in URLs
     encoded_keywords = urllib.parse.quote(keywords)
 
+    # Remember finished pages and papers so an interrupted run resumes where it stopped
+    with CrawlFrontier("arxiv", keywords) as frontier:
+        harvest_pages(frontier, base_url, encoded_keywords, num_pages, results_per_page, handoff)
+
+
+def harvest_pages(frontier, base_url, encoded_keywords, num_pages, results_per_page, handoff=None):
+    """
+    Search arXiv page by page and download the PDFs not handled in earlier runs.
+
+    Parameters:
+        frontier (CrawlFrontier): Record of finished pages and papers.
+        base_url (str): Base URL of the arXiv API.
+        encoded_keywords (str): URL-encoded search keywords.
+        num_pages (int): Number of result pages to process.
+        results_per_page (int): Number of results per page.
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
+    """
     # Iterate through the specified number of pages
     for page in range(num_pages):
+        if frontier.is_page_done(page):
+            print(f"Skipping page {page + 1}, already processed.")
+            continue
+
         # Calculate the start parameter for pagination
         start = page * results_per_page
 
@@ -83,6 +113,7 @@ def main():
             continue
 
         # Iterate through each entry in the feed
+        page_failed = False
         for entry in feed.entries:
             pdf_url = None
 
@@ -92,7 +123,9 @@ def main():
                     pdf_url = link.href
                     break
 
-            if pdf_url:
+            if pdf_url and not frontier.should_visit(pdf_url):
+                print(f"Skipping {pdf_url}, already downloaded.")
+            elif pdf_url:
                 # Use the title of the paper for the filename
                 title = entry.title if 'title' in entry else "untitled"
 
@@ -104,11 +137,17 @@ def main():
 
                 # Download the PDF
                 print(f"Downloading PDF for paper titled: {title}...")
-                download_pdf(pdf_url, file_path)
+                downloaded = download_pdf(pdf_url, file_path, handoff)
+                frontier.record(pdf_url, "downloaded" if downloaded else "failed")
+                page_failed = page_failed or not downloaded
             else:
                 # Handle cases where no PDF link is found
                 print("No PDF link found for this entry.")
 
+        # Pages with failed downloads are searched again on the next run
+        if not page_failed:
+            frontier.mark_page_done(page)
+
 
 if __name__ == "__main__":
     # Run the main function when the script is executed
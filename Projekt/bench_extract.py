@@ -0,0 +1,128 @@
+"""
+Benchmark peak memory of whole-document text extraction against page streaming.
+
+Builds synthetic PDFs of two sizes with PyMuPDF and extracts each twice per
+extractor: once by concatenating every page into one string (the old
+behaviour) and once through the page-streaming writers. Each case runs in
+a fresh subprocess and reports its peak resident set size (RSS), which
+includes MuPDF's native allocations that a Python heap tracer cannot see,
+and how far the peak rose above the RSS after the imports. Streaming should
+grow far less than concatenation as the page count rises; PyPDF2 streaming
+still grows by its page-tree index of a few KB per page.
+
+Usage:
+    python bench_extract.py [num_pages]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import fitz  # PyMuPDF
+from PyPDF2 import PdfReader
+
+import pdf_to_text_pymupdf
+import pypdf2
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Roughly one dense page of text
+PAGE_TEXT = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 2 + "\n") * 60
+
+
+def build_pdf(pdf_path, num_pages):
+    """Write a synthetic PDF with num_pages pages of text."""
+    doc = fitz.open()
+    for _ in range(num_pages):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), PAGE_TEXT, fontsize=7)
+    doc.save(pdf_path)
+    doc.close()
+
+
+def concat_pymupdf(pdf_path, output_path):
+    text = ""
+    doc = fitz.open(pdf_path)
+    for page_num in range(len(doc)):
+        text += doc.load_page(page_num).get_text()
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        output_file.write(text)
+
+
+def concat_pypdf2(pdf_path, output_path):
+    with open(pdf_path, 'rb') as pdf_file:
+        reader = PdfReader(pdf_file)
+        text = ''
+        for page in reader.pages:
+            text += page.extract_text() or ''
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        output_file.write(text)
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of this process so far, or None if it cannot be read."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)
+    return None
+
+
+def run_case(func, pdf_path, output_path):
+    # Runs in the fresh subprocess; the RSS before the call is the baseline
+    baseline = peak_rss_bytes()
+    start = time.perf_counter()
+    func(pdf_path, output_path)
+    elapsed = time.perf_counter() - start
+    return elapsed, baseline, peak_rss_bytes()
+
+
+def measure(func, pdf_path, output_path):
+    """
+    Run func in a fresh subprocess, so no case inherits another's peak.
+
+    Returns:
+        tuple: (seconds, baseline RSS bytes, peak RSS bytes); the RSS values are None if unavailable.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case, (func, pdf_path, output_path))
+
+
+def mib(size):
+    return f"{size / 2 ** 20:>9.1f}" if size is not None else f"{'n/a':>9}"
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    cases = [
+        ("PyMuPDF concat", concat_pymupdf),
+        ("PyMuPDF stream", pdf_to_text_pymupdf.extract_text_to_file),
+        ("PyPDF2 concat", concat_pypdf2),
+        ("PyPDF2 stream", pypdf2.extract_text_to_file),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "bench.txt")
+        for pages in (num_pages, num_pages * 4):
+            pdf_path = os.path.join(tmp_dir, f"bench_{pages}.pdf")
+            build_pdf(pdf_path, pages)
+
+            print(f"\n{pages} pages")
+            print(f"{'extractor':<16} {'seconds':>8} {'peak RSS':>9} {'growth':>9}  (MiB)")
+            for name, func in cases:
+                elapsed, baseline, peak = measure(func, pdf_path, output_path)
+                growth = peak - baseline if peak is not None and baseline is not None else None
+                print(f"{name:<16} {elapsed:>8.2f} {mib(peak)} {mib(growth)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark the shared HTML extraction layer against full BeautifulSoup parsing.
+
+For every saved page the old approach (a full html.parser tree followed by
+find/find_all for the meta tags and links) is timed against a single
+html_extract.parse_page call.
+
+Usage:
+    python bench_html.py [saved_pages_dir] [repeats]
+
+Save pages first, e.g. with
+    curl -o saved_pages/article1.html https://hrcak.srce.hr/...
+"""
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+
+import html_extract
+
+
+def extract_with_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.find('h1') or soup.find('title')
+    title = title.get_text(strip=True) if title else None
+    description = soup.find('meta', attrs={'name': 'description'})
+    keywords = soup.find('meta', attrs={'name': 'keywords'})
+    citation = soup.find('meta', attrs={'name': 'citation_pdf_url'})
+    pdf_links = [a['href'] for a in soup.find_all('a', href=True)
+                 if a['href'].lower().endswith('.pdf')]
+    return title, description, keywords, citation, pdf_links
+
+
+def time_per_page(func, pages, repeats):
+    """Return the mean seconds per page of func over all pages."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for html in pages:
+            func(html)
+    return (time.perf_counter() - start) / (repeats * len(pages))
+
+
+def main():
+    pages_dir = sys.argv[1] if len(sys.argv) > 1 else 'saved_pages'
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    if not os.path.isdir(pages_dir):
+        print(f"Directory {pages_dir} not found. Save some article pages there first.")
+        return
+
+    pages = []
+    for filename in sorted(os.listdir(pages_dir)):
+        if filename.lower().endswith(('.html', '.htm')):
+            with open(os.path.join(pages_dir, filename), 'rb') as page_file:
+                pages.append(page_file.read())
+    if not pages:
+        print(f"No .html files found in {pages_dir}.")
+        return
+
+    backend = "lxml" if html_extract.HAVE_LXML else "bs4 (strained)"
+    print(f"{len(pages)} pages, {repeats} repeats, html_extract backend: {backend}")
+
+    bs4_time = time_per_page(extract_with_bs4, pages, repeats)
+    full_time = time_per_page(html_extract.parse_page, pages, repeats)
+    head_time = time_per_page(lambda html: html_extract.parse_page(html, head_only=True), pages, repeats)
+
+    print(f"{'method':<24} {'ms/page':>8} {'speedup':>8}")
+    print(f"{'BeautifulSoup full tree':<24} {bs4_time * 1000:>8.2f} {1.0:>8.1f}")
+    print(f"{'parse_page':<24} {full_time * 1000:>8.2f} {bs4_time / full_time:>8.1f}")
+    print(f"{'parse_page head_only':<24} {head_time * 1000:>8.2f} {bs4_time / head_time:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark OCR backends: a tesseract subprocess per page versus a persistent engine.
+
+pytesseract starts the tesseract binary, writes the page to a temporary
+file and loads the language model again for every page. The in-process
+engine (ocr_engine.TesseractEngine, through tesserocr) loads the model
+once and receives the page from memory. The fixed per-page cost matters
+most for short pages, so the synthetic pages hold only a few lines of text.
+
+Each backend OCRs the same pages; pages per second and whether the two
+backends return the same text are reported. A backend that is not
+installed (or cannot find its traineddata) is skipped.
+
+Usage:
+    python bench_ocr_engine.py [num_pages] [lang]
+"""
+import sys
+import time
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+import ocr_engine
+
+SAMPLE_LINE = "Line {n} of a short page: the quick brown fox jumps over the lazy dog"
+DPI = 300
+
+
+def synthetic_page(index, lines=4):
+    """Return a short, clean page (a few lines of text at 300 DPI)."""
+    image = Image.new("L", (int(8.5 * DPI), DPI + lines * DPI // 4 + DPI // 2), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", DPI // 7)
+    except OSError:
+        font = ImageFont.load_default()
+    for i in range(lines):
+        draw.text((DPI // 2, DPI // 2 + i * DPI // 4), SAMPLE_LINE.format(n=index * lines + i),
+                  fill=0, font=font)
+    return image
+
+
+def tesseract_available():
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def run(backend, pages):
+    """OCR every page; return (seconds, texts)."""
+    start = time.perf_counter()
+    texts = [backend(page) for page in pages]
+    return time.perf_counter() - start, texts
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lang = sys.argv[2] if len(sys.argv) > 2 else ocr_engine.DEFAULT_LANG
+    pages = [synthetic_page(i) for i in range(num_pages)]
+    print(f"{num_pages} short synthetic pages, language {lang}")
+
+    results = {}
+    if tesseract_available():
+        results["pytesseract (subprocess)"] = run(lambda page: pytesseract.image_to_string(page, lang=lang), pages)
+    else:
+        print("tesseract binary not found; skipping pytesseract.")
+
+    if not ocr_engine.HAVE_TESSEROCR:
+        print("tesserocr not installed; skipping the in-process engine.")
+    else:
+        try:
+            # Model loading is timed separately; it is paid once per worker, not per page
+            start = time.perf_counter()
+            engine = ocr_engine.TesseractEngine(lang)
+            load_time = time.perf_counter() - start
+        except RuntimeError as e:
+            print(f"In-process engine unavailable ({e}); skipping it.")
+        else:
+            print(f"In-process engine loaded {lang} in {load_time:.2f} s")
+            results["tesserocr (in-process)"] = run(engine.image_to_string, pages)
+            engine.close()
+
+    if not results:
+        print("No OCR backend available.")
+        return
+
+    print(f"{'backend':<26} {'s/page':>8} {'pages/s':>8}")
+    for name, (seconds, _) in results.items():
+        print(f"{name:<26} {seconds / num_pages:>8.3f} {num_pages / seconds:>8.2f}")
+
+    if len(results) == 2:
+        subprocess_texts, engine_texts = (texts for _, texts in results.values())
+        same = sum(1 for a, b in zip(subprocess_texts, engine_texts) if a.split() == b.split())
+        print(f"Identical text on {same}/{num_pages} pages")
+
+
+if __name__ == '__main__':
+    main()
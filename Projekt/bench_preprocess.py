@@ -0,0 +1,166 @@
+"""
+Benchmark OCR preprocessing: cost of each NumPy stage and its effect on Tesseract.
+
+Pages are either synthetic scans (tinted paper, noise, a dark scanner
+border and a few degrees of skew, with known text) or pages of a real PDF
+rasterized with PyMuPDF. For every page the preprocessing stages are
+timed, and when Tesseract is installed the raw and the preprocessed page
+are both OCRed to compare seconds per page and, for synthetic pages, the
+character accuracy against the known text.
+
+Pages are rasterized at the pipeline's RASTER_DPI unless a DPI is given.
+pdf_tessar only preprocesses pages when PREPROCESS_PAGES is set; turn it
+on when this benchmark shows preprocessing plus OCR beating raw OCR.
+
+Usage:
+    python bench_preprocess.py [num_pages | file.pdf] [dpi]
+"""
+import difflib
+import os
+import sys
+import time
+import numpy as np
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+import ocr_preprocess
+from pdf_tessar import RASTER_DPI
+
+SAMPLE_LINE = "The {n}th measurement of the quick brown fox jumping over lazy dogs"
+
+
+def synthetic_page(index, dpi):
+    """Return a noisy, skewed colour scan of a letter-size page and its text."""
+    rng = np.random.default_rng(index)
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    paper = (235, 225, 200)
+    image = Image.new("RGB", (width, height), paper)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", int(dpi / 7))
+    except OSError:
+        font = ImageFont.load_default()
+
+    lines = [SAMPLE_LINE.format(n=index * 100 + i) for i in range(30)]
+    for i, line in enumerate(lines):
+        draw.text((dpi, dpi + i * dpi // 4), line, fill=(40, 40, 60), font=font)
+
+    image = image.rotate(float(rng.uniform(-4, 4)), resample=Image.BILINEAR, fillcolor=paper)
+    pixels = np.asarray(image).astype(np.int16)
+    pixels[:, : dpi // 4] = 25
+    pixels[: dpi // 5, :] = 30
+    pixels += rng.normal(0, 18, pixels.shape).astype(np.int16)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)), "\n".join(lines)
+
+
+def pdf_pages(pdf_path, dpi):
+    """Yield (image, None) for every page of a PDF rasterized at dpi."""
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            pixmap = page.get_pixmap(dpi=dpi)
+            yield Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples), None
+
+
+def time_stages(image, dpi):
+    """Return the seconds spent in each preprocessing stage for one page."""
+    timings = {}
+    start = time.perf_counter()
+    gray = ocr_preprocess.to_grayscale(image)
+    timings["grayscale"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gray = ocr_preprocess.downscale(gray, dpi)
+    timings["downscale"] = time.perf_counter() - start
+    working_dpi = min(dpi, ocr_preprocess.TARGET_DPI)
+
+    start = time.perf_counter()
+    top, bottom, left, right = ocr_preprocess.border_bounds(gray)
+    gray = gray[top:bottom, left:right]
+    timings["border crop"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    binary = ocr_preprocess.binarize(gray, working_dpi)
+    timings["binarize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ocr_preprocess.estimate_skew(binary)
+    timings["skew estimate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ocr_preprocess.preprocess_page(image, dpi)
+    timings["full pipeline"] = time.perf_counter() - start
+    return timings
+
+
+def tesseract_available():
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def ocr_seconds(image):
+    start = time.perf_counter()
+    text = pytesseract.image_to_string(image)
+    return time.perf_counter() - start, text
+
+
+def accuracy(expected, text):
+    """Character similarity of the OCR text to the expected text (0-1)."""
+    return difflib.SequenceMatcher(None, " ".join(expected.split()), " ".join(text.split())).ratio()
+
+
+def main():
+    target = sys.argv[1] if len(sys.argv) > 1 else "5"
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else RASTER_DPI
+
+    if target.lower().endswith(".pdf"):
+        if not os.path.exists(target):
+            print(f"File {target} not found.")
+            return
+        pages = list(pdf_pages(target, dpi))
+        print(f"{len(pages)} pages of {target} at {dpi} DPI")
+    else:
+        pages = [synthetic_page(i, dpi) for i in range(int(target))]
+        print(f"{len(pages)} synthetic scanned pages at {dpi} DPI")
+
+    totals = {}
+    for image, _ in pages:
+        for stage, seconds in time_stages(image, dpi).items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+    print(f"{'stage':<16} {'ms/page':>8}")
+    for stage, seconds in totals.items():
+        print(f"{stage:<16} {seconds / len(pages) * 1000:>8.1f}")
+
+    if not tesseract_available():
+        print("Tesseract not found; skipping the OCR comparison.")
+        return
+
+    raw_time = pre_time = 0.0
+    raw_accuracy = pre_accuracy = 0.0
+    for image, expected in pages:
+        seconds, raw_text = ocr_seconds(image)
+        raw_time += seconds
+        start = time.perf_counter()
+        cleaned = ocr_preprocess.preprocess_page(image, dpi)
+        seconds, pre_text = ocr_seconds(cleaned)
+        pre_time += time.perf_counter() - start
+        if expected is not None:
+            raw_accuracy += accuracy(expected, raw_text)
+            pre_accuracy += accuracy(expected, pre_text)
+
+    print(f"{'OCR input':<26} {'s/page':>8} {'accuracy':>9}")
+    for name, seconds, score in (("raw page", raw_time, raw_accuracy),
+                                 ("preprocessed (incl. prep)", pre_time, pre_accuracy)):
+        shown = f"{score / len(pages):>9.1%}" if pages[0][1] is not None else f"{'n/a':>9}"
+        print(f"{name:<26} {seconds / len(pages):>8.2f} {shown}")
+    if pre_time < raw_time:
+        print("Preprocessing is a net win on these pages; consider setting pdf_tessar.PREPROCESS_PAGES")
+    else:
+        print("Preprocessing costs more than it saves on these pages; keep pdf_tessar.PREPROCESS_PAGES off")
+
+
+if __name__ == '__main__':
+    main()
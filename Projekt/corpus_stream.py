@@ -0,0 +1,160 @@
+import functools
+import hashlib
+import os
+import re
+from json_stream import JSON_ERRORS, iter_json_field
+
+# Tokens are runs of letters only, which drops numbers, punctuation and emoji
+TOKEN_RE = re.compile(r"[^\W\d_]+")
+# Paragraph separator used when a batch is processed as a single string
+BATCH_SEPARATOR = "\n\x00\n"
+
+
+@functools.lru_cache(maxsize=None)
+def batch_token_re(min_len, max_len):
+    """
+    Return a regex matching the batch separator or a whole letter run of min_len..max_len letters.
+
+    The length filter is part of the pattern, so a single findall over the
+    batch both tokenizes and filters; the lookarounds keep longer runs
+    from matching in pieces.
+    """
+    escaped = re.escape(BATCH_SEPARATOR)
+    return re.compile(rf"{escaped}|(?<![^\W\d_])[^\W\d_]{{{min_len},{max_len}}}(?![^\W\d_])")
+
+
+def preprocess_batch(paragraphs, min_len=2, max_len=15):
+    """
+    Lowercase, tokenize and length-filter a batch of paragraphs in one pass.
+
+    The batch is joined into a single string so lowercasing and one regex
+    findall run once per batch in C. The separators come back as tokens
+    and are used to cut the token list into paragraphs.
+
+    Parameters:
+        paragraphs (list): Paragraph strings.
+        min_len (int): Minimum token length to keep.
+        max_len (int): Maximum token length to keep.
+
+    Returns:
+        list: One list of tokens per paragraph (empty paragraphs are kept as []).
+    """
+    tokens = batch_token_re(min_len, max_len).findall(BATCH_SEPARATOR.join(paragraphs).lower())
+    result = []
+    start = 0
+    for _ in range(len(paragraphs) - 1):
+        end = tokens.index(BATCH_SEPARATOR, start)
+        result.append(tokens[start:end])
+        start = end + 1
+    result.append(tokens[start:])
+    return result
+
+
+class JsonCorpus:
+    """
+    Restartable stream of preprocessed paragraphs from json_convert output.
+
+    Every iteration parses the per-document JSON files incrementally and
+    yields one token list per paragraph, so neither the corpus nor a whole
+    document is held in memory and gensim can iterate over it once per epoch. With cache_path
+    set, the first full pass also writes the token stream to disk (one
+    paragraph per line, the LineSentence format) and later passes read it
+    back instead of preprocessing again. The cache is rebuilt when the
+    JSON files change.
+
+    Example:
+        corpus = JsonCorpus("txts", cache_path="cache/corpus_tokens.txt")
+        model = gensim.models.Word2Vec(corpus, min_count=2)
+    """
+
+    def __init__(self, directory="txts", cache_path=None, batch_size=1000, min_len=2, max_len=15):
+        """
+        Parameters:
+            directory (str): Folder with the .json files written by json_convert.
+            cache_path (str): Optional file to cache the token stream in.
+            batch_size (int): Number of paragraphs preprocessed together.
+            min_len (int): Minimum token length to keep.
+            max_len (int): Maximum token length to keep.
+        """
+        self.directory = directory
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.min_len = min_len
+        self.max_len = max_len
+
+    def json_files(self):
+        """Return the sorted paths of the JSON documents in the corpus."""
+        return [os.path.join(self.directory, name)
+                for name in sorted(os.listdir(self.directory)) if name.endswith(".json")]
+
+    def fingerprint(self):
+        """Hash file names, sizes, mtimes and preprocessing options to detect a stale cache."""
+        digest = hashlib.sha256(f"{self.min_len}:{self.max_len}".encode("ascii"))
+        for path in self.json_files():
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def iter_paragraphs(self):
+        """Yield raw paragraph strings, parsing each document incrementally."""
+        for path in self.json_files():
+            try:
+                with open(path, "rb") as json_file:
+                    for paragraph in iter_json_field(json_file, "paragraphs"):
+                        yield paragraph
+            except (OSError,) + JSON_ERRORS as e:
+                # Paragraphs yielded before the error are kept
+                print(f"Skipping the rest of {path}: {e}")
+
+    def iter_tokens(self):
+        """Yield token lists for every non-empty paragraph, preprocessing in batches."""
+        batch = []
+        for paragraph in self.iter_paragraphs():
+            batch.append(paragraph)
+            if len(batch) >= self.batch_size:
+                yield from self._flush(batch)
+                batch = []
+        if batch:
+            yield from self._flush(batch)
+
+    def _flush(self, batch):
+        for tokens in preprocess_batch(batch, self.min_len, self.max_len):
+            if tokens:
+                yield tokens
+
+    def _cache_is_fresh(self, fingerprint):
+        meta_path = self.cache_path + ".meta"
+        if not (os.path.exists(self.cache_path) and os.path.exists(meta_path)):
+            return False
+        with open(meta_path, "r", encoding="utf-8") as meta_file:
+            return meta_file.read().strip() == fingerprint
+
+    def _iter_cached(self):
+        with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+            for line in cache_file:
+                yield line.split()
+
+    def _iter_and_cache(self, fingerprint):
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file so an interrupted epoch never leaves a partial cache
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            for tokens in self.iter_tokens():
+                cache_file.write(" ".join(tokens))
+                cache_file.write("\n")
+                yield tokens
+        os.replace(tmp_path, self.cache_path)
+        with open(self.cache_path + ".meta", "w", encoding="utf-8") as meta_file:
+            meta_file.write(fingerprint)
+
+    def __iter__(self):
+        if self.cache_path is None:
+            return self.iter_tokens()
+
+        fingerprint = self.fingerprint()
+        if self._cache_is_fresh(fingerprint):
+            return self._iter_cached()
+        return self._iter_and_cache(fingerprint)
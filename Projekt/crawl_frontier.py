@@ -0,0 +1,188 @@
+import hashlib
+import math
+import os
+import sqlite3
+import time
+
+# Default location of the crawl frontier database
+DEFAULT_FRONTIER_PATH = os.path.join("cache", "frontier.sqlite")
+
+# Outcomes after which a URL is not visited again; anything else is retried
+FINAL_OUTCOMES = {"downloaded", "no_pdf", "skipped"}
+
+
+class BloomFilter:
+    """
+    Compact probabilistic seen-set.
+
+    A negative answer is always correct, so most "have we seen this URL?"
+    checks for new URLs never touch the database.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, bits=None):
+        """
+        Parameters:
+            capacity (int): Expected number of items.
+            error_rate (float): Target false positive rate at capacity.
+            bits (bytes): Previously saved bit array to restore.
+        """
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        size = (self.num_bits + 7) // 8
+        if bits is not None and len(bits) == size:
+            self.bits = bytearray(bits)
+        else:
+            self.bits = bytearray(size)
+
+    def _positions(self, item):
+        # Double hashing: derive k positions from two 64-bit halves of one digest
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class CrawlFrontier:
+    """
+    Persistent record of what a harvest has already done, per source and query.
+
+    Search result pages are marked done once every article on them has been
+    handled, and each article or PDF URL is stored with its outcome. A
+    restarted harvest skips finished pages and URLs and so resumes exactly
+    where the last checkpoint left it, without repeating network requests.
+    """
+
+    def __init__(self, source, query, path=DEFAULT_FRONTIER_PATH, capacity=100000):
+        """
+        Parameters:
+            source (str): Name of the harvested site (e.g. 'arxiv').
+            query (str): The search query or harvest identifier.
+            path (str): Path of the SQLite frontier database.
+            capacity (int): Expected number of URLs, used to size the Bloom filter.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.source = source
+        self.query = query
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " source TEXT, query TEXT, page INTEGER, finished REAL,"
+            " PRIMARY KEY (source, query, page));"
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " source TEXT, query TEXT, url TEXT, outcome TEXT, updated REAL,"
+            " PRIMARY KEY (source, query, url));"
+            "CREATE TABLE IF NOT EXISTS blooms ("
+            " source TEXT, query TEXT, capacity INTEGER, bits BLOB, saved REAL,"
+            " PRIMARY KEY (source, query));"
+        )
+
+        row = self._conn.execute(
+            "SELECT capacity, bits, saved FROM blooms WHERE source = ? AND query = ?",
+            (source, query),
+        ).fetchone()
+        self._capacity = row[0] if row else capacity
+        self._bloom = BloomFilter(self._capacity, bits=row[1] if row else None)
+
+        # URLs recorded after the last saved filter (e.g. before a crash) are added back
+        recent = self._conn.execute(
+            "SELECT url FROM urls WHERE source = ? AND query = ? AND updated >= ?",
+            (source, query, row[2] if row else 0),
+        )
+        for (url,) in recent:
+            self._bloom.add(url)
+
+    def is_page_done(self, page):
+        """Return True if a search result page was fully processed before."""
+        row = self._conn.execute(
+            "SELECT 1 FROM pages WHERE source = ? AND query = ? AND page = ?",
+            (self.source, self.query, page),
+        ).fetchone()
+        return row is not None
+
+    def mark_page_done(self, page):
+        """Record a search result page as fully processed and checkpoint."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (source, query, page, finished) VALUES (?, ?, ?, ?)",
+            (self.source, self.query, page, time.time()),
+        )
+        self.checkpoint()
+
+    def outcome(self, url):
+        """
+        Return the recorded outcome for a URL.
+
+        Returns:
+            str: The outcome (e.g. 'downloaded', 'failed'), or None if never seen.
+        """
+        if url not in self._bloom:
+            return None
+        row = self._conn.execute(
+            "SELECT outcome FROM urls WHERE source = ? AND query = ? AND url = ?",
+            (self.source, self.query, url),
+        ).fetchone()
+        return row[0] if row else None
+
+    def should_visit(self, url):
+        """Return True unless the URL already reached a final outcome."""
+        return self.outcome(url) not in FINAL_OUTCOMES
+
+    def record(self, url, outcome):
+        """
+        Store the outcome of visiting a URL.
+
+        Parameters:
+            url (str): The article or PDF URL.
+            outcome (str): e.g. 'downloaded', 'no_pdf', 'skipped' or 'failed'.
+        """
+        self._bloom.add(url)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO urls (source, query, url, outcome, updated) VALUES (?, ?, ?, ?, ?)",
+            (self.source, self.query, url, outcome, time.time()),
+        )
+        self._conn.commit()
+
+    def checkpoint(self):
+        """Persist the Bloom filter and commit pending changes."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO blooms (source, query, capacity, bits, saved) VALUES (?, ?, ?, ?, ?)",
+            (self.source, self.query, self._capacity, bytes(self._bloom.bits), time.time()),
+        )
+        self._conn.commit()
+
+    def stats(self):
+        """
+        Return counts of finished pages and URLs per outcome.
+
+        Returns:
+            dict: {'pages': int, 'outcomes': {outcome: count}}
+        """
+        pages = self._conn.execute(
+            "SELECT COUNT(*) FROM pages WHERE source = ? AND query = ?",
+            (self.source, self.query),
+        ).fetchone()[0]
+        outcomes = dict(self._conn.execute(
+            "SELECT outcome, COUNT(*) FROM urls WHERE source = ? AND query = ? GROUP BY outcome",
+            (self.source, self.query),
+        ).fetchall())
+        return {"pages": pages, "outcomes": outcomes}
+
+    def close(self):
+        """Checkpoint and close the database."""
+        self.checkpoint()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
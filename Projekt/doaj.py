@@ -1,12 +1,20 @@
 
 import os
 import re
+import tarfile
 import requests
-from bs4 import BeautifulSoup
+from html_extract import parse_page, response_encoding, find_anchor
+from json_stream import iter_json_array
+from pdf_validate import stream_pdf_download, InvalidPdfError
 
 # DOAJ API base URL (Directory of Open Access Journals)
 DOAJ_API_BASE_URL = "https://doaj.org/api/search/"
 
+# Records from a data dump are passed to download_articles in batches of this size
+DUMP_BATCH_SIZE = 100
+# Article file names are cut to this many characters (file systems allow 255 bytes)
+MAX_STEM_LENGTH = 100
+
 
 def search_doaj(search_type, search_term, page=1, page_size=10, api_key=None):
     """
@@ -42,26 +50,32 @@ def search_doaj(search_type, search_term, page=1, page_size=10, api_key=None):
     return None
 
 
-def download_pdf(url, save_path):
+def download_pdf(url, save_path, handoff=None):
     """
     Download a PDF file from a given URL and save to specified path.
 
     Parameters:
         url (str): Direct URL to PDF file
         save_path (str): Local file path to save PDF
+        handoff (PdfHandoff): Optional in-memory handoff that extracts the text
+            without re-reading the PDF from disk
+
+    Returns:
+        bool: True if the PDF was saved.
     """
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Check for HTTP errors
-
-        # Write PDF content to file in binary mode
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
+        # Stream the PDF to disk, aborting early on non-PDF or oversized responses
+        fetch = handoff.fetch if handoff is not None else stream_pdf_download
+        fetch(url, save_path)
         print(f"Downloaded PDF: {save_path}")
+        return True
+    except InvalidPdfError as pdf_err:
+        print(f"Rejected download from {url}: {pdf_err}")
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred while downloading {url}: {http_err}")
     except Exception as err:
         print(f"An error occurred while downloading {url}: {err}")
+    return False
 
 
 def get_article_pdf_link(article_url):
@@ -77,17 +91,21 @@ def get_article_pdf_link(article_url):
     try:
         response = requests.get(article_url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        page = parse_page(response.content, base_url=article_url, encoding=response_encoding(response))
 
         # Strategy 1: Look for MDPI-style PDF links (common in some journals)
-        pdf_link = soup.find('a', class_='pdf-link')
-        if pdf_link and pdf_link.get('href'):
-            return pdf_link['href']
+        pdf_link = find_anchor(page, css_class='pdf-link')
+        if pdf_link:
+            return pdf_link
 
         # Strategy 2: Look for text-based PDF links (e.g., 'PDF' button)
-        pdf_link = soup.find('a', text='PDF')
-        if pdf_link and pdf_link.get('href'):
-            return pdf_link['href']
+        pdf_link = find_anchor(page, text='PDF')
+        if pdf_link:
+            return pdf_link
+
+        # Strategy 3: Look for the Highwire citation_pdf_url meta tag
+        if page['citation_pdf_url']:
+            return page['citation_pdf_url']
 
         # If no PDF link found through common patterns
         print(f"No PDF link found on {article_url}")
@@ -159,16 +177,61 @@ def sanitize_filename(title):
     return sanitized_title.strip()
 
 
-def download_articles(search_results, download_dir):
+def article_file_stem(record, index):
     """
-    Download PDFs for all articles in search results to specified directory.
+    Return the file name (without extension) used for an article's PDF, text and metadata.
+
+    json_convert pairs a text file with its metadata by file name, so every
+    file of an article must be named by this one function.
+
+    Parameters:
+        record (dict): A DOAJ article record
+        index (int): Position of the article in the whole search or dump; names
+            an untitled article only when the record has no DOAJ id
+
+    Returns:
+        str: The sanitized title, at most MAX_STEM_LENGTH characters
+    """
+    title = record.get('bibjson', {}).get('title') or f"article_{record.get('id') or index}"
+    return sanitize_filename(title)[:MAX_STEM_LENGTH].strip()
+
+
+def save_article_metadata(bibjson, stem, folder_name="metadata"):
+    """
+    Save the title, abstract and keywords of an article in the format json_convert reads.
+
+    Parameters:
+        bibjson (dict): The 'bibjson' part of a DOAJ article record
+        stem (str): File name from article_file_stem, shared with the PDF and text files
+        folder_name (str): Folder to save the metadata files in
+    """
+    os.makedirs(folder_name, exist_ok=True)
+    title = bibjson.get('title') or 'untitled'
+    file_path = os.path.join(folder_name, f"{stem}.txt")
+    with open(file_path, 'w', encoding='utf-8') as metadata_file:
+        metadata_file.write(f"Title: {title}\n")
+        metadata_file.write(f"Abstract: {bibjson.get('abstract', '')}\n")
+        metadata_file.write(f"Keywords: {', '.join(bibjson.get('keywords', []))}\n")
+
+
+def download_articles(search_results, download_dir, handoff=None, download=True, start=1):
+    """
+    Save metadata and download PDFs for all articles in search results to specified directory.
 
     Parameters:
         search_results (dict): API response containing articles
         download_dir (str): Directory to save downloaded PDFs
+        handoff (PdfHandoff): Optional in-memory handoff passed to download_pdf
+        download (bool): Download PDFs as well as metadata
+        start (int): Number of the first article; batches of one dump continue the count
     """
-    for i, item in enumerate(search_results['results'], start=1):
+    for i, item in enumerate(search_results['results'], start=start):
         bibjson = item.get('bibjson', {})
+        stem = article_file_stem(item, i)
+        save_article_metadata(bibjson, stem)
+        if not download:
+            continue
+
         # Find fulltext links from API response
         article_links = [link.get('url') for link in bibjson.get('link', [])
                          if link.get('type') == 'fulltext']
@@ -177,19 +240,164 @@ def download_articles(search_results, download_dir):
             # Get direct PDF link from article page
             pdf_link = get_article_pdf_link(article_links[0])
             if pdf_link:
-                # Create safe filename from title
-                title = bibjson.get('title', f'article_{i}')
-                sanitized_title = sanitize_filename(title)
-                save_path = os.path.join(download_dir, f"{sanitized_title}.pdf")
-                download_pdf(pdf_link, save_path)
+                # Same file name as the metadata, so json_convert can pair them
+                save_path = os.path.join(download_dir, f"{stem}.pdf")
+                download_pdf(pdf_link, save_path, handoff)
             else:
                 print(f"No PDF available for article {i}: {bibjson.get('title', 'N/A')}")
         else:
             print(f"No article link available for article {i}: {bibjson.get('title', 'N/A')}")
 
 
-def main():
-    """Main function to handle user interaction and workflow."""
+def iter_dump_records(dump_path):
+    """
+    Stream article records from a DOAJ data dump without loading it into memory.
+
+    The dump is a tarball of JSON files, each holding an array of records in
+    the same format as the 'results' of the search API. The tarball is read
+    sequentially and each file is parsed incrementally (with ijson when it is
+    installed). A single uncompressed .json file is accepted as well.
+
+    Parameters:
+        dump_path (str): Path to the .tar.gz dump or a .json file.
+
+    Yields:
+        dict: One article record at a time.
+    """
+    if dump_path.endswith('.json'):
+        with open(dump_path, 'rb') as json_file:
+            yield from iter_json_array(json_file)
+        return
+
+    # "r|*" reads the tarball as a stream, so members are never seeked or cached
+    with tarfile.open(dump_path, mode='r|*') as tar:
+        for member in tar:
+            if not (member.isfile() and member.name.endswith('.json')):
+                continue
+            json_file = tar.extractfile(member)
+            yield from iter_json_array(json_file)
+
+
+def record_matches(bibjson, subjects=None, languages=None, keywords=None):
+    """
+    Check a record against the dump filters; each filter that is given must match.
+
+    Parameters:
+        bibjson (dict): The 'bibjson' part of a DOAJ article record
+        subjects (list): Subject terms; matches if any is part of a subject term of the record
+        languages (list): Language codes or names (e.g. 'EN', 'Croatian') of the journal
+        keywords (list): Words looked for in the keywords, title and abstract
+
+    Returns:
+        bool: True if the record passes all given filters
+    """
+    if subjects:
+        terms = [subject.get('term', '').lower() for subject in bibjson.get('subject', [])]
+        if not any(wanted in term for wanted in subjects for term in terms):
+            return False
+
+    if languages:
+        record_languages = {language.lower() for language in bibjson.get('journal', {}).get('language', [])}
+        if not record_languages.intersection(languages):
+            return False
+
+    if keywords:
+        text = " ".join([bibjson.get('title', ''), bibjson.get('abstract', '')]
+                        + bibjson.get('keywords', [])).lower()
+        if not any(keyword in text for keyword in keywords):
+            return False
+
+    return True
+
+
+def ingest_dump(dump_path, subjects=None, languages=None, keywords=None, download_dir="pdfs",
+                download=True, handoff=None, limit=None, batch_size=DUMP_BATCH_SIZE):
+    """
+    Feed the matching records of a DOAJ data dump into the same path as API search results.
+
+    Records are read one at a time and passed to download_articles in small
+    batches, so memory use does not depend on the size of the dump.
+
+    Parameters:
+        dump_path (str): Path to the .tar.gz dump or a .json file
+        subjects (list): Optional subject filter
+        languages (list): Optional journal language filter
+        keywords (list): Optional keyword filter
+        download_dir (str): Directory to save downloaded PDFs
+        download (bool): Download PDFs as well as metadata
+        handoff (PdfHandoff): Optional in-memory handoff passed to download_pdf
+        limit (int): Stop after this many matching records
+        batch_size (int): Records passed to download_articles at once
+
+    Returns:
+        tuple: (records_read, records_matched)
+    """
+    subjects = [subject.lower() for subject in subjects or []]
+    languages = {language.lower() for language in languages or []}
+    keywords = [keyword.lower() for keyword in keywords or []]
+    os.makedirs(download_dir, exist_ok=True)
+
+    read = matched = 0
+    batch = []
+    for record in iter_dump_records(dump_path):
+        read += 1
+        if not record_matches(record.get('bibjson', {}), subjects, languages, keywords):
+            continue
+        batch.append(record)
+        matched += 1
+
+        if len(batch) >= batch_size:
+            download_articles({'results': batch}, download_dir, handoff, download, matched - len(batch) + 1)
+            batch = []
+            print(f"Read {read} records, {matched} matched")
+        if limit is not None and matched >= limit:
+            break
+
+    if batch:
+        download_articles({'results': batch}, download_dir, handoff, download, matched - len(batch) + 1)
+    print(f"Finished dump: read {read} records, {matched} matched")
+    return read, matched
+
+
+def split_terms(text):
+    """Split a comma-separated answer into a list of non-empty terms."""
+    return [term.strip() for term in text.split(',') if term.strip()]
+
+
+def dump_main(handoff=None):
+    """
+    Ingest a local DOAJ data dump instead of searching the API.
+
+    Parameters:
+        handoff (PdfHandoff): Optional in-memory handoff passed to download_pdf
+    """
+    dump_path = input("Path to the DOAJ article dump (.tar.gz or .json): ").strip()
+    if not os.path.exists(dump_path):
+        print(f"File not found: {dump_path}")
+        return
+
+    subjects = split_terms(input("Subjects to include, comma-separated (optional): "))
+    languages = split_terms(input("Journal languages to include, e.g. EN, HR (optional): "))
+    keywords = split_terms(input("Keywords to look for, comma-separated (optional): "))
+    download = input("Download the PDFs as well as the metadata y/n? ").strip().lower() == "y"
+    limit = input("Maximum number of articles (optional): ").strip()
+
+    ingest_dump(dump_path, subjects, languages, keywords, download=download, handoff=handoff,
+                limit=int(limit) if limit.isdigit() else None)
+
+
+def main(handoff=None):
+    """
+    Main function to handle user interaction and workflow.
+
+    Parameters:
+        handoff (PdfHandoff): Optional in-memory handoff passed to download_pdf
+    """
+    print("Which mode do you want to use?: 1.API search 2.Local data dump")
+    if input("Input number: ").strip() == "2":
+        dump_main(handoff)
+        return
+
     # Get user input for search type
     search_type = input("Do you want to search for 'journals' or 'articles'? ").strip().lower()
     if search_type not in ["journals", "articles"]:
@@ -218,7 +426,7 @@ def main():
     if search_type == "articles":
         download_dir = "pdfs"  # Default download directory
         os.makedirs(download_dir, exist_ok=True)  # Create directory if needed
-        download_articles(search_results, download_dir)
+        download_articles(search_results, download_dir, handoff)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,242 @@
+import datetime
+import json
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+from multiprocessing.connection import wait
+from pipeline_profile import document_name, profile
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Defaults for one document; extractors pass their own timeouts
+DEFAULT_TIMEOUT = 600
+DEFAULT_MAX_RSS_MB = 2048
+# Workers are replaced after this many documents to contain slow leaks in C libraries
+MAX_TASKS_PER_WORKER = 50
+# How often running workers are checked against the limits (seconds)
+CHECK_INTERVAL = 0.5
+
+FAILURE_LOG = "extraction_failures.jsonl"
+
+
+def rss_bytes(pid):
+    """
+    Return the resident memory of a process and its children, or None if unknown.
+
+    Children are included when psutil is installed, so a Tesseract process
+    spawned by pytesseract counts towards the limit of its worker.
+    """
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            total = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+
+    # Linux fallback without psutil: the worker itself only
+    try:
+        with open(f"/proc/{pid}/status", "r") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _worker_main(conn, label):
+    # Run in a new process group so killing the worker also kills anything it spawned
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, args = task
+        try:
+            # Writes a per-document profile when the pipeline runs with --profile
+            with profile(document_name(label or func.__name__, args)):
+                result = func(*args)
+            conn.send(("ok", result))
+        except MemoryError:
+            conn.send(("error", "MemoryError"))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"))
+
+
+class _Worker:
+    """A single supervised extractor process."""
+
+    def __init__(self, context, label=None):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, label), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job = None
+        self.started = None
+        self.tasks_done = 0
+
+    def submit(self, func, job):
+        self.conn.send((func, job))
+        self.job = job
+        self.started = time.monotonic()
+
+    def exit_code(self):
+        """Wait for the dead worker to be reaped and return its exit code (negative: killed by a signal)."""
+        self.process.join(5)
+        return self.process.exitcode
+
+    def kill(self):
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.process.join(5)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+def record_failure(job, reason, failure_log=FAILURE_LOG, label=None):
+    """Append a failed document and the reason to the JSON lines failure log."""
+    entry = {
+        "time": datetime.datetime.now().isoformat(),
+        "extractor": label,
+        "job": [str(arg) for arg in job],
+        "reason": reason,
+    }
+    with open(failure_log, "a", encoding="utf-8") as log_file:
+        log_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def run_isolated(func, jobs, timeout=DEFAULT_TIMEOUT, max_rss_mb=DEFAULT_MAX_RSS_MB, workers=1,
+                 max_tasks_per_worker=MAX_TASKS_PER_WORKER, failure_log=FAILURE_LOG, label=None,
+                 elapsed=None):
+    """
+    Run func once per job, each in a supervised worker subprocess.
+
+    A worker that exceeds the wall-clock timeout or the RSS limit, or that
+    crashes, is killed together with its children and replaced, and the
+    document is recorded as failed with the reason, so one pathological
+    PDF cannot stall or take down the batch.
+
+    Parameters:
+        func (callable): Module-level function called as func(*job) in the worker.
+        jobs (iterable): Argument tuples, e.g. (pdf_path, output_path).
+        timeout (float): Seconds allowed per document.
+        max_rss_mb (int): Resident memory limit per worker in MiB; None disables it.
+        workers (int): Number of documents processed in parallel.
+        max_tasks_per_worker (int): Replace a worker after this many documents.
+        failure_log (str): JSON lines file that failed documents are appended to.
+        label (str): Name of the extractor written to the failure log.
+        elapsed (dict): Optional dict that receives the wall time of each job in seconds, keyed by job.
+
+    Yields:
+        tuple: (job, ok, result) where result is func's return value or the failure reason.
+    """
+    context = multiprocessing.get_context()
+    max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+    pending = iter(jobs)
+    idle = [_Worker(context, label) for _ in range(max(1, workers))]
+    busy = []
+    exhausted = False
+
+    def retire(worker, replace=True):
+        worker.kill()
+        if replace:
+            idle.append(_Worker(context, label))
+
+    try:
+        while True:
+            # Hand out work to idle workers
+            while idle and not exhausted:
+                try:
+                    job = tuple(next(pending))
+                except StopIteration:
+                    exhausted = True
+                    break
+                worker = idle.pop()
+                worker.submit(func, job)
+                busy.append(worker)
+
+            if not busy:
+                break
+
+            ready = wait([worker.conn for worker in busy], timeout=CHECK_INTERVAL)
+            for worker in list(busy):
+                job = worker.job
+                failure = None
+
+                if worker.conn in ready:
+                    try:
+                        status, result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        status, result = "crash", f"worker exited with code {worker.exit_code()}"
+                    busy.remove(worker)
+                    worker.job = None
+                    worker.tasks_done += 1
+
+                    if status == "ok":
+                        if elapsed is not None:
+                            elapsed[job] = time.monotonic() - worker.started
+                        yield job, True, result
+                        if worker.tasks_done >= max_tasks_per_worker:
+                            retire(worker)
+                        else:
+                            idle.append(worker)
+                        continue
+
+                    failure = result
+                    if status == "crash":
+                        retire(worker)
+                    else:
+                        idle.append(worker)
+                else:
+                    running = time.monotonic() - worker.started
+                    rss = rss_bytes(worker.process.pid) if max_rss else None
+                    if running > timeout:
+                        failure = f"timeout after {timeout} s"
+                    elif rss is not None and rss > max_rss:
+                        failure = f"memory limit exceeded ({rss // (1024 * 1024)} MiB > {max_rss_mb} MiB)"
+                    elif not worker.process.is_alive():
+                        failure = f"worker exited with code {worker.exit_code()}"
+                    else:
+                        continue
+                    busy.remove(worker)
+                    retire(worker)
+
+                if elapsed is not None:
+                    elapsed[job] = time.monotonic() - worker.started
+                record_failure(job, failure, failure_log, label)
+                yield job, False, failure
+    finally:
+        for worker in busy:
+            worker.kill()
+        for worker in idle:
+            worker.stop()
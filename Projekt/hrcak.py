@@ -1,9 +1,38 @@
 import os
+import json
 import requests
+import xml.etree.ElementTree as ET
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from html_extract import parse_page, response_encoding, find_anchor
+from crawl_frontier import CrawlFrontier
+from pdf_validate import stream_pdf_download
 
-def download_pdf(url, folder_name, file_name):
+# Class of the PDF download button on Hrcak article pages
+PDF_BUTTON_CLASS = 'btn btn-outline-primary btn-sm'
+
+# OAI-PMH endpoint of Hrcak and the XML namespaces used in its responses
+HRCAK_OAI_URL = "https://hrcak.srce.hr/oai/"
+OAI_NS = {
+    'oai': 'http://www.openarchives.org/OAI/2.0/',
+    'oai_dc': 'http://www.openarchives.org/OAI/2.0/oai_dc/',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+}
+
+# Seconds to wait for a search or article page
+PAGE_TIMEOUT = 30
+
+# Folder where the resumption token of each harvest is checkpointed
+OAI_STATE_FOLDER = "oai_state"
+
+class OaiError(Exception):
+    """An OAI-PMH error response, e.g. badResumptionToken when a token has expired."""
+
+    def __init__(self, code, message):
+        super().__init__(f"OAI-PMH error {code}: {message}")
+        self.code = code
+
+def download_pdf(url, folder_name, file_name, handoff=None):
     """
     Download a PDF file from a given URL and save it to a specified folder with a custom filename.
 
@@ -11,48 +40,67 @@ def download_pdf(url, folder_name, file_name):
         url (str): The URL of the PDF file to download.
         folder_name (str): The directory where the PDF will be saved.
         file_name (str): The name of the PDF file (without extension).
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
 
     Returns:
         str: The path to the downloaded PDF file, or None if the download fails.
     """
-    response = requests.get(url)
-    if response.status_code == 200:
-        # Create a valid filename by replacing special characters
-        safe_file_name = "".join(c if c.isalnum() or c in " -_" else "_" for c in file_name)
-        pdf_path = os.path.join(folder_name, f"{safe_file_name}.pdf")
-        with open(pdf_path, 'wb') as pdf_file:
-            pdf_file.write(response.content)
-        print(f"Downloaded: {pdf_path}")
-        return pdf_path
-    else:
-        print(f"Failed to download: {url}")
+    # Create a valid filename by replacing special characters
+    safe_file_name = "".join(c if c.isalnum() or c in " -_" else "_" for c in file_name)
+    pdf_path = os.path.join(folder_name, f"{safe_file_name}.pdf")
+    try:
+        # Stream the PDF to disk, aborting early on non-PDF or oversized responses
+        fetch = handoff.fetch if handoff is not None else stream_pdf_download
+        fetch(url, pdf_path)
+    except Exception as e:
+        print(f"Failed to download: {url} ({e})")
         return None
+    print(f"Downloaded: {pdf_path}")
+    return pdf_path
 
-def extract_details_from_page(page_url):
+def parse_article_page(page_url):
     """
-    Extract the title, abstract, and keywords from a given page URL.
+    Fetch an article page and extract its metadata and PDF link in one pass.
 
     Parameters:
-        page_url (str): The URL of the page to extract information from.
+        page_url (str): The URL of the article page.
 
     Returns:
-        tuple: A tuple containing title, abstract, and keywords.
+        tuple: A tuple containing title, abstract, keywords and the PDF URL (or None).
+
+    Raises:
+        requests.exceptions.RequestException: If the page cannot be fetched or
+            returns an error status.
     """
-    response = requests.get(page_url)
-    soup = BeautifulSoup(response.content, 'html.parser')
+    response = requests.get(page_url, timeout=PAGE_TIMEOUT)
+    response.raise_for_status()
+    page = parse_page(response.content, base_url=page_url, encoding=response_encoding(response))
 
     # Extract the title (assume it is within a <h1> or <title> tag)
-    title = soup.find('h1') or soup.find('title')
-    title_text = title.get_text(strip=True) if title else "No title found"
+    title_text = page['heading'] or page['title'] or "No title found"
 
-    # Extract the abstract (usually inside a <div> or <p> tag with a specific class)
-    abstract = soup.find('meta', attrs={'name': 'description'})
-    abstract_text = abstract.get('content', "No abstract found") if abstract else "No abstract found"
+    # Extract the abstract and keywords from the meta tags
+    abstract_text = page['description'] if page['description'] is not None else "No abstract found"
+    keywords_text = page['keywords'] if page['keywords'] is not None else "No keywords found"
 
-    # Extract keywords (usually in a meta tag with name='keywords')
-    keywords = soup.find('meta', attrs={'name': 'keywords'})
-    keywords_text = keywords.get('content', "No keywords found") if keywords else "No keywords found"
+    # Prefer the download button, then the Highwire citation_pdf_url meta tag
+    pdf_url = find_anchor(page, css_class=PDF_BUTTON_CLASS) or page['citation_pdf_url']
 
+    return title_text, abstract_text, keywords_text, pdf_url
+
+
+def extract_details_from_page(page_url):
+    """
+    Extract the title, abstract, and keywords from a given page URL.
+
+    Parameters:
+        page_url (str): The URL of the page to extract information from.
+
+    Returns:
+        tuple: A tuple containing title, abstract, and keywords.
+    """
+    title_text, abstract_text, keywords_text, _ = parse_article_page(page_url)
     return title_text, abstract_text, keywords_text
 
 def save_details_to_file(title, abstract, keywords, folder_name="metadata"):
@@ -78,7 +126,7 @@ def save_details_to_file(title, abstract, keywords, folder_name="metadata"):
 
     print(f"Details saved to: {file_name}")
 
-def scrape_pdfs_from_website(base_url, keyword, num_pages, folder_name="pdfs"):
+def scrape_pdfs_from_website(base_url, keyword, num_pages, folder_name="pdfs", handoff=None):
     """
     Scrape PDF files from a website based on a search keyword, and extract information from each result page.
 
@@ -87,47 +135,316 @@ def scrape_pdfs_from_website(base_url, keyword, num_pages, folder_name="pdfs"):
         keyword (str): The keyword to search for.
         num_pages (int): The number of search result pages to scrape.
         folder_name (str): The directory to save downloaded PDFs (default: "pdfs").
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
     """
     if not os.path.exists(folder_name):
         os.makedirs(folder_name)
 
+    # Remember finished pages and articles so an interrupted run resumes where it stopped
+    with CrawlFrontier("hrcak", keyword) as frontier:
+        scrape_search_pages(frontier, base_url, keyword, num_pages, folder_name, handoff)
+
+def scrape_search_pages(frontier, base_url, keyword, num_pages, folder_name, handoff=None):
+    """
+    Scrape search result pages, skipping pages and articles handled in earlier runs.
+
+    Parameters:
+        frontier (CrawlFrontier): Record of finished pages and articles.
+        base_url (str): The base URL of the website to scrape.
+        keyword (str): The keyword to search for.
+        num_pages (int): The number of search result pages to scrape.
+        folder_name (str): The directory to save downloaded PDFs.
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
+    """
     for page_num in range(num_pages):
+        if frontier.is_page_done(page_num):
+            print(f"Skipping page {page_num + 1}, already processed.")
+            continue
+
         start = page_num * 10
         search_url = f"{base_url}/pretraga?q={keyword}&start={start}"
         print(f"Scraping page: {search_url}")
 
-        response = requests.get(search_url)
+        try:
+            response = requests.get(search_url, timeout=PAGE_TIMEOUT)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            # The page is not marked done, so the next run searches it again
+            print(f"Error fetching search page {page_num + 1}: {e}")
+            continue
         soup = BeautifulSoup(response.content, 'html.parser')
 
+        page_failed = False
         for link in soup.find_all('h5'):
             article_link = link.find('a', href=True)
             if article_link:
                 article_url = urljoin(base_url, article_link['href'])
+                if not frontier.should_visit(article_url):
+                    print(f"Skipping article page: {article_url}, already processed.")
+                    continue
                 print(f"Found article page: {article_url}")
 
-                # Extract metadata from the article page
-                title, abstract, keywords = extract_details_from_page(article_url)
+                # Extract metadata and the PDF link from a single fetch of the article page
+                try:
+                    title, abstract, keywords, pdf_url = parse_article_page(article_url)
+                except requests.exceptions.RequestException as e:
+                    # Recorded as failed, not no_pdf, so the article is retried on the next run
+                    print(f"Error fetching article page {article_url}: {e}")
+                    frontier.record(article_url, "failed")
+                    page_failed = True
+                    continue
 
                 # Save metadata to a text file
                 save_details_to_file(title, abstract, keywords)
 
-                # Find the PDF link on the article page
-                article_response = requests.get(article_url)
-                article_soup = BeautifulSoup(article_response.content, 'html.parser')
-                pdf_link = article_soup.find('a', class_='btn btn-outline-primary btn-sm', href=True)
-
-                if pdf_link:
-                    pdf_url = urljoin(base_url, pdf_link['href'])
+                if pdf_url:
                     print(f"Found PDF link: {pdf_url}")
 
                     # Download the PDF and save it with the title as the filename
-                    download_pdf(pdf_url, folder_name, title)
+                    downloaded = download_pdf(pdf_url, folder_name, title, handoff) is not None
+                    frontier.record(article_url, "downloaded" if downloaded else "failed")
+                    page_failed = page_failed or not downloaded
+                else:
+                    frontier.record(article_url, "no_pdf")
+
+        # Pages with failed downloads are searched again on the next run
+        if not page_failed:
+            frontier.mark_page_done(page_num)
+
+def parse_dc_record(record):
+    """
+    Convert an OAI-PMH record with Dublin Core metadata into a dictionary.
+
+    Parameters:
+        record (Element): An <oai:record> element.
+
+    Returns:
+        dict: Identifier, title, abstract, keywords, identifiers, date and language,
+              or None if the record was deleted.
+    """
+    header = record.find('oai:header', OAI_NS)
+    if header is None or header.get('status') == 'deleted':
+        return None
+
+    dc = record.find('oai:metadata/oai_dc:dc', OAI_NS)
+    if dc is None:
+        return None
 
-def main():
+    def values(tag):
+        return [el.text.strip() for el in dc.findall(f'dc:{tag}', OAI_NS) if el.text and el.text.strip()]
+
+    titles = values('title')
+    descriptions = values('description')
+    dates = values('date')
+    languages = values('language')
+    return {
+        'oai_identifier': header.findtext('oai:identifier', default='', namespaces=OAI_NS),
+        'title': titles[0] if titles else "No title found",
+        'abstract': descriptions[0] if descriptions else "No abstract found",
+        'keywords': ", ".join(values('subject')) or "No keywords found",
+        'identifiers': values('identifier'),
+        'date': dates[0] if dates else None,
+        'language': languages[0] if languages else None,
+    }
+
+def pdf_url_from_identifiers(identifiers):
+    """
+    Pick the full-text PDF URL out of a record's dc:identifier values.
+
+    Returns:
+        tuple: (pdf_url, landing_url); either may be None.
+    """
+    urls = [identifier for identifier in identifiers if identifier.startswith('http')]
+    pdf_url = next((url for url in urls if url.lower().endswith('.pdf') or '/file/' in url), None)
+    landing_url = next((url for url in urls if url != pdf_url), None)
+    return pdf_url, landing_url
+
+def oai_list_records(oai_url=HRCAK_OAI_URL, set_spec=None, from_date=None, until_date=None,
+                     resumption_token=None):
+    """
+    Page through ListRecords responses of an OAI-PMH endpoint.
+
+    Parameters:
+        oai_url (str): The OAI-PMH endpoint.
+        set_spec (str): Optional set (journal) to harvest.
+        from_date (str): Optional lower datestamp bound (YYYY-MM-DD).
+        until_date (str): Optional upper datestamp bound (YYYY-MM-DD).
+        resumption_token (str): Token to resume an interrupted harvest.
+
+    Yields:
+        tuple: (records, next_token) for every batch; next_token is None after the last batch.
+
+    Raises:
+        OaiError: The endpoint returned an error other than noRecordsMatch.
+    """
+    while True:
+        if resumption_token:
+            params = {'verb': 'ListRecords', 'resumptionToken': resumption_token}
+        else:
+            params = {'verb': 'ListRecords', 'metadataPrefix': 'oai_dc'}
+            if set_spec:
+                params['set'] = set_spec
+            if from_date:
+                params['from'] = from_date
+            if until_date:
+                params['until'] = until_date
+
+        response = requests.get(oai_url, params=params, timeout=60)
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+
+        error = root.find('oai:error', OAI_NS)
+        if error is not None:
+            # noRecordsMatch is an empty result; anything else means the list was not completed
+            if error.get('code') == 'noRecordsMatch':
+                return
+            raise OaiError(error.get('code'), (error.text or '').strip())
+
+        list_records = root.find('oai:ListRecords', OAI_NS)
+        records = list_records.findall('oai:record', OAI_NS) if list_records is not None else []
+        token = list_records.findtext('oai:resumptionToken', namespaces=OAI_NS) if list_records is not None else None
+        token = token.strip() if token and token.strip() else None
+
+        yield records, token
+        if not token:
+            return
+        resumption_token = token
+
+def oai_list_sets(oai_url=HRCAK_OAI_URL):
+    """
+    List the sets (journals) offered by an OAI-PMH endpoint.
+
+    Returns:
+        list: (set_spec, set_name) tuples.
+    """
+    sets = []
+    token = None
+    while True:
+        params = {'verb': 'ListSets', 'resumptionToken': token} if token else {'verb': 'ListSets'}
+        response = requests.get(oai_url, params=params, timeout=60)
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+        for oai_set in root.iterfind('oai:ListSets/oai:set', OAI_NS):
+            sets.append((oai_set.findtext('oai:setSpec', namespaces=OAI_NS),
+                         oai_set.findtext('oai:setName', namespaces=OAI_NS)))
+        token = root.findtext('oai:ListSets/oai:resumptionToken', namespaces=OAI_NS)
+        if not token or not token.strip():
+            return sets
+        token = token.strip()
+
+def harvest_state_path(set_spec, from_date, until_date):
+    """Return the checkpoint file used for a given harvest."""
+    name = "_".join(part or "all" for part in (set_spec, from_date, until_date))
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+    return os.path.join(OAI_STATE_FOLDER, f"{safe_name}.json")
+
+def harvest_oai(oai_url=HRCAK_OAI_URL, set_spec=None, from_date=None, until_date=None,
+                folder_name="pdfs", download=True, handoff=None):
+    """
+    Harvest Hrcak articles through OAI-PMH instead of scraping search pages.
+
+    Metadata comes straight from the Dublin Core records and PDF URLs from
+    their identifiers; the article page is only scraped when a record has
+    no direct PDF identifier. The resumption token is checkpointed after
+    every batch, so an interrupted harvest continues where it stopped.
+
+    Parameters:
+        oai_url (str): The OAI-PMH endpoint.
+        set_spec (str): Optional set (journal) to harvest.
+        from_date (str): Optional lower datestamp bound (YYYY-MM-DD).
+        until_date (str): Optional upper datestamp bound (YYYY-MM-DD).
+        folder_name (str): The directory to save downloaded PDFs (default: "pdfs").
+        download (bool): Download PDFs as well as metadata.
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
+
+    Returns:
+        int: The number of records harvested in this run.
+
+    Raises:
+        OaiError: The endpoint returned an error (e.g. an expired resumption
+            token); the checkpoint is kept.
+    """
+    os.makedirs(folder_name, exist_ok=True)
+    os.makedirs(OAI_STATE_FOLDER, exist_ok=True)
+
+    state_path = harvest_state_path(set_spec, from_date, until_date)
+    resumption_token = None
+    # Records harvested by earlier, interrupted runs of the same harvest
+    previous = 0
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as state_file:
+            state = json.load(state_file)
+        resumption_token = state.get('resumption_token')
+        previous = state.get('harvested', 0)
+        if resumption_token:
+            print(f"Resuming harvest from checkpoint {state_path} ({previous} records already harvested)")
+
+    harvested = 0
+    batches = oai_list_records(oai_url, set_spec, from_date, until_date, resumption_token)
+    for records, next_token in batches:
+        for record in records:
+            details = parse_dc_record(record)
+            if details is None:
+                continue
+
+            save_details_to_file(details['title'], details['abstract'], details['keywords'])
+            harvested += 1
+
+            if not download:
+                continue
+
+            pdf_url, landing_url = pdf_url_from_identifiers(details['identifiers'])
+            if not pdf_url and landing_url:
+                # Fall back to scraping the article page for the PDF link
+                try:
+                    pdf_url = parse_article_page(landing_url)[3]
+                except requests.exceptions.RequestException as e:
+                    print(f"Error fetching article page {landing_url}: {e}")
+
+            if pdf_url:
+                download_pdf(pdf_url, folder_name, details['title'], handoff)
+            else:
+                print(f"No PDF found for record {details['oai_identifier']}")
+
+        # Checkpoint after each batch so the harvest can be resumed
+        with open(state_path, 'w', encoding='utf-8') as state_file:
+            json.dump({'resumption_token': next_token, 'harvested': previous + harvested}, state_file)
+        print(f"Harvested {harvested} records in this run, {previous + harvested} in total")
+
+    # The list ended without an error; the next run starts from the beginning
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return harvested
+
+def main(handoff=None):
     base_url = "https://hrcak.srce.hr"
+    print("Which mode do you want to use?: 1.Keyword search 2.OAI-PMH bulk harvest")
+    mode = input("Input number: ").strip()
+
+    if mode == "2":
+        set_spec = input("Enter the journal set to harvest (empty for all, ? to list the sets): ").strip() or None
+        if set_spec == "?":
+            for spec, name in oai_list_sets(HRCAK_OAI_URL):
+                print(f"{spec}\t{name}")
+            set_spec = input("Enter the journal set to harvest (empty for all): ").strip() or None
+        from_date = input("Harvest from date YYYY-MM-DD (optional): ").strip() or None
+        until_date = input("Harvest until date YYYY-MM-DD (optional): ").strip() or None
+        try:
+            harvest_oai(HRCAK_OAI_URL, set_spec, from_date, until_date, handoff=handoff)
+        except OaiError as e:
+            state_path = harvest_state_path(set_spec, from_date, until_date)
+            print(f"Harvest stopped, checkpoint kept in {state_path}: {e}")
+            if e.code == 'badResumptionToken':
+                print("The resumption token has expired; delete the checkpoint or harvest "
+                      "from the date of the last harvested record to continue.")
+        return
+
     keyword = input("Enter the keyword to search for: ")
     num_pages = int(input("Enter the number of pages to scrape: "))
-    scrape_pdfs_from_website(base_url, keyword, num_pages)
+    scrape_pdfs_from_website(base_url, keyword, num_pages, handoff=handoff)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
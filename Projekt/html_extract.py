@@ -0,0 +1,168 @@
+import re
+from urllib.parse import urljoin
+
+try:
+    import lxml.html
+    HAVE_LXML = True
+except ImportError:
+    from bs4 import BeautifulSoup, SoupStrainer
+    HAVE_LXML = False
+
+# The only tags the scrapers ever read
+EXTRACTED_TAGS = ("title", "meta", "h1", "a")
+
+HEAD_END_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=...">
+META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=", re.IGNORECASE)
+# Bytes searched for a meta charset, as in the HTML5 encoding sniffing rules
+SNIFF_BYTES = 1024
+
+
+def _to_bytes(html):
+    # lxml rejects str input that carries an XML encoding declaration, so parse bytes
+    return html.encode("utf-8") if isinstance(html, str) else html
+
+
+def response_encoding(response):
+    """
+    Return the encoding a server declared for a response, or None.
+
+    requests reports ISO-8859-1 for any text/html response without a
+    charset; that default is ignored so the page itself can be sniffed.
+    """
+    if "charset" in response.headers.get("Content-Type", "").lower():
+        return response.encoding
+    return None
+
+
+def detect_encoding(html, encoding=None):
+    """
+    Choose the encoding to parse HTML bytes with.
+
+    A declared encoding wins. Otherwise a <meta> charset is left to the
+    parser; a page without one is parsed as UTF-8 when it decodes as
+    UTF-8, because the parsers would otherwise fall back to Latin-1 and
+    garble characters such as č, ć, ž, š and đ.
+
+    Returns:
+        str: The encoding, or None to let the parser read the <meta> charset.
+    """
+    if encoding:
+        return encoding
+    if META_CHARSET_RE.search(html[:SNIFF_BYTES]):
+        return None
+    try:
+        html.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return None
+
+
+def _iter_elements_lxml(html, encoding=None):
+    parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+    root = lxml.html.fromstring(html, parser=parser)
+    for element in root.iter(*EXTRACTED_TAGS):
+        text = element.text_content() if element.tag != "meta" else ""
+        yield element.tag, element.attrib, text
+
+
+def _iter_elements_bs4(html, encoding=None):
+    # Fallback: html.parser restricted to the tags we need
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(list(EXTRACTED_TAGS)),
+                         from_encoding=encoding)
+    for element in soup.find_all(EXTRACTED_TAGS):
+        attrs = {key: " ".join(value) if isinstance(value, list) else value
+                 for key, value in element.attrs.items()}
+        text = element.get_text() if element.name != "meta" else ""
+        yield element.name, attrs, text
+
+
+def parse_page(html, base_url=None, head_only=False, encoding=None):
+    """
+    Extract page metadata and links in a single pass over the document.
+
+    Uses lxml when it is installed and falls back to a strained
+    BeautifulSoup parse otherwise. Only <title>, <meta>, <h1> and <a>
+    elements are visited.
+
+    Parameters:
+        html (bytes or str): The page HTML (bytes preferred, e.g. response.content).
+        base_url (str): URL of the page, used to resolve relative links.
+        head_only (bool): Parse only up to </head>; enough for meta tags.
+        encoding (str): Encoding declared by the server (see response_encoding);
+            detected from the page when None.
+
+    Returns:
+        dict: A dictionary with the keys
+            title (str): Text of <title>, or None.
+            heading (str): Text of the first <h1>, or None.
+            description (str): Content of <meta name="description">, or None.
+            keywords (str): Content of <meta name="keywords">, or None.
+            citation_pdf_url (str): Content of <meta name="citation_pdf_url">, or None.
+            pdf_links (list): Absolute URLs of anchors whose href ends with '.pdf'.
+            anchors (list): (href, text, class) tuples for every anchor with an href.
+    """
+    html = _to_bytes(html)
+    if head_only:
+        match = HEAD_END_RE.search(html)
+        if match:
+            html = html[:match.end()]
+
+    page = {
+        "title": None,
+        "heading": None,
+        "description": None,
+        "keywords": None,
+        "citation_pdf_url": None,
+        "pdf_links": [],
+        "anchors": [],
+    }
+    if not html.strip():
+        return page
+
+    iter_elements = _iter_elements_lxml if HAVE_LXML else _iter_elements_bs4
+    for tag, attrs, text in iter_elements(html, detect_encoding(html, encoding)):
+        if tag == "meta":
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name in ("description", "keywords", "citation_pdf_url") and page[name] is None:
+                page[name] = attrs.get("content")
+        elif tag == "a":
+            href = attrs.get("href")
+            if not href:
+                continue
+            href = href.strip()
+            if base_url:
+                href = urljoin(base_url, href)
+            page["anchors"].append((href, text.strip(), attrs.get("class", "")))
+            if href.lower().endswith(".pdf"):
+                page["pdf_links"].append(href)
+        elif tag == "title" and page["title"] is None:
+            page["title"] = text.strip()
+        elif tag == "h1" and page["heading"] is None:
+            page["heading"] = text.strip()
+
+    if page["citation_pdf_url"] and base_url:
+        page["citation_pdf_url"] = urljoin(base_url, page["citation_pdf_url"])
+    return page
+
+
+def find_anchor(page, css_class=None, text=None):
+    """
+    Return the href of the first anchor matching a class list and/or exact text.
+
+    Parameters:
+        page (dict): Result of parse_page.
+        css_class (str): Space-separated classes the anchor must all have.
+        text (str): Exact (stripped) link text the anchor must have.
+
+    Returns:
+        str: The matching href, or None.
+    """
+    wanted = set(css_class.split()) if css_class else set()
+    for href, anchor_text, anchor_class in page["anchors"]:
+        if wanted and not wanted.issubset(anchor_class.split()):
+            continue
+        if text is not None and anchor_text != text:
+            continue
+        return href
+    return None
@@ -0,0 +1,287 @@
+import csv
+import json
+import os
+import time
+import fitz  # PyMuPDF
+from extract_supervisor import run_isolated
+from pdf_validate import valid_pdfs
+
+# Starting cost model in seconds; scaled per engine by the calibration file after each run
+TEXT_SECONDS_PER_PAGE = 0.02
+OCR_SECONDS_PER_PAGE = 2.5
+SECONDS_PER_MB = 0.05
+
+# A sampled page with fewer characters than this has no usable text layer
+TEXT_LAYER_MIN_CHARS = 50
+TEXT_SAMPLE_PAGES = 3
+
+# OCR documents longer than this are split into ranges of this many pages
+PAGES_PER_RANGE = 25
+
+CALIBRATION_PATH = os.path.join("cache", "scheduler_calibration.json")
+# Weight of the latest run when updating the calibration factor
+CALIBRATION_WEIGHT = 0.5
+# Per-engine CSV report of predicted versus actual time
+REPORT_PATH = "schedule_report_{engine}.csv"
+
+# Per-document limits of a supervised text-layer extractor process
+EXTRACT_TIMEOUT = 120
+EXTRACT_MAX_RSS_MB = 1024
+
+
+def needs_ocr(doc, sample_pages=TEXT_SAMPLE_PAGES):
+    """
+    Check whether a PDF lacks a text layer by sampling pages spread over the document.
+
+    Parameters:
+        doc (fitz.Document): The open PDF.
+        sample_pages (int): Number of pages to sample.
+
+    Returns:
+        bool: True if most sampled pages have no extractable text.
+    """
+    if doc.page_count == 0:
+        return False
+    step = max(1, doc.page_count // sample_pages)
+    sampled = list(range(0, doc.page_count, step))[:sample_pages]
+    empty = sum(1 for number in sampled if len(doc[number].get_text().strip()) < TEXT_LAYER_MIN_CHARS)
+    return empty * 2 > len(sampled)
+
+
+def load_calibration(engine, calibration_path=CALIBRATION_PATH):
+    """Return the factor that converts predicted into actual seconds for an engine (1.0 if unknown)."""
+    if not os.path.exists(calibration_path):
+        return 1.0
+    with open(calibration_path, "r", encoding="utf-8") as calibration_file:
+        return json.load(calibration_file).get(engine, 1.0)
+
+
+def save_calibration(engine, factor, calibration_path=CALIBRATION_PATH):
+    """Store the calibration factor of an engine, keeping those of the other engines."""
+    factors = {}
+    if os.path.exists(calibration_path):
+        with open(calibration_path, "r", encoding="utf-8") as calibration_file:
+            factors = json.load(calibration_file)
+    factors[engine] = factor
+
+    directory = os.path.dirname(calibration_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(calibration_path, "w", encoding="utf-8") as calibration_file:
+        json.dump(factors, calibration_file, indent=2)
+
+
+def estimate_cost(pdf_path, ocr=None, factor=1.0):
+    """
+    Predict how long one PDF takes to extract.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        ocr (bool): True if every page is OCRed (e.g. pdf_tessar), False for text-layer
+            extraction, None to decide from the text layer of the document.
+        factor (float): Calibration factor of the engine.
+
+    Returns:
+        dict: pdf_path, pages, size, needs_ocr and predicted (seconds).
+    """
+    size = os.path.getsize(pdf_path)
+    with fitz.open(pdf_path) as doc:
+        pages = doc.page_count
+        scanned = needs_ocr(doc)
+
+    use_ocr = scanned if ocr is None else ocr
+    seconds_per_page = OCR_SECONDS_PER_PAGE if use_ocr else TEXT_SECONDS_PER_PAGE
+    predicted = (pages * seconds_per_page + size / (1024 * 1024) * SECONDS_PER_MB) * factor
+    return {"pdf_path": pdf_path, "pages": pages, "size": size, "needs_ocr": scanned, "predicted": predicted}
+
+
+def split_estimate(estimate, pages_per_range=PAGES_PER_RANGE):
+    """
+    Split a document estimate into page ranges with proportional predicted times.
+
+    Returns:
+        list: One dict per range with first_page and last_page added (1-based, inclusive).
+    """
+    pages = estimate["pages"]
+    if pages <= pages_per_range:
+        return [dict(estimate, first_page=1, last_page=None)]
+
+    ranges = []
+    for first_page in range(1, pages + 1, pages_per_range):
+        last_page = min(first_page + pages_per_range - 1, pages)
+        share = (last_page - first_page + 1) / pages
+        ranges.append(dict(estimate, first_page=first_page, last_page=last_page,
+                           predicted=estimate["predicted"] * share))
+    return ranges
+
+
+def plan_jobs(pdf_paths, engine, ocr=None, split=False, pages_per_range=PAGES_PER_RANGE,
+              calibration_path=CALIBRATION_PATH, workers=1):
+    """
+    Estimate every PDF and order the work for the number of workers.
+
+    A single worker runs the shortest jobs first, which gives the earliest
+    first results and the lowest mean completion time. Several workers run
+    the longest jobs first (LPT): the short jobs then fill the gaps at the
+    end, instead of one long scan starting last and leaving the other
+    workers idle. Splitting long OCR documents into page ranges caps the
+    size of any single job on top of that.
+
+    Only OCR is worth splitting. Text-layer extraction takes a fraction of
+    a second per page and writes one file per document, so the text
+    extractors keep whole documents.
+
+    Parameters:
+        pdf_paths (iterable): Paths of the PDFs to extract.
+        engine (str): Extractor name; selects the calibration factor.
+        ocr (bool): Passed to estimate_cost.
+        split (bool): Split documents longer than pages_per_range into ranges.
+        pages_per_range (int): Pages per range when splitting.
+        calibration_path (str): JSON file with the calibration factors.
+        workers (int): Number of jobs run in parallel; selects the order.
+
+    Returns:
+        list: Job dicts (see estimate_cost and split_estimate) in the order to run them.
+    """
+    factor = load_calibration(engine, calibration_path)
+    planned = []
+    for pdf_path in pdf_paths:
+        try:
+            estimate = estimate_cost(pdf_path, ocr, factor)
+        except Exception as e:
+            # Unknown cost; run it last so it cannot hold up the others
+            print(f"Could not estimate {pdf_path}: {e}")
+            estimate = {"pdf_path": pdf_path, "pages": None, "size": None, "needs_ocr": None,
+                        "predicted": float("inf")}
+        if split and estimate["pages"]:
+            planned.extend(split_estimate(estimate, pages_per_range))
+        else:
+            planned.append(dict(estimate, first_page=1, last_page=None))
+
+    # Jobs that could not be estimated go last either way so they cannot hold up the others
+    longest_first = workers > 1
+    planned.sort(key=lambda job: (job["predicted"] == float("inf"),
+                                  -job["predicted"] if longest_first else job["predicted"]))
+    total = sum(job["predicted"] for job in planned if job["predicted"] != float("inf"))
+    order = "longest" if longest_first else "shortest"
+    print(f"Planned {len(planned)} {engine} jobs, {order} first, predicted {total:.0f} s of work")
+    return planned
+
+
+class ScheduleReport:
+    """
+    Collect predicted and actual time per job and update the calibration.
+
+    Example:
+        report = ScheduleReport("tesseract")
+        report.record(job, ok, seconds)
+        report.finish()
+    """
+
+    def __init__(self, engine, report_path=REPORT_PATH, calibration_path=CALIBRATION_PATH):
+        self.engine = engine
+        self.report_path = report_path.format(engine=engine)
+        self.calibration_path = calibration_path
+        self.started = time.monotonic()
+        self.first_result = None
+        self.rows = []
+
+    def record(self, job, ok, seconds):
+        """
+        Record one finished job.
+
+        Parameters:
+            job (dict): The planned job.
+            ok (bool): Whether the job succeeded.
+            seconds (float): Actual wall time of the job.
+        """
+        if ok and self.first_result is None:
+            self.first_result = time.monotonic() - self.started
+        self.rows.append({
+            "pdf_path": job["pdf_path"],
+            "first_page": job["first_page"],
+            "last_page": job["last_page"] or job["pages"],
+            "pages": job["pages"],
+            "needs_ocr": job["needs_ocr"],
+            "predicted": round(job["predicted"], 2),
+            "actual": round(seconds, 2) if seconds is not None else None,
+            "ok": ok,
+        })
+
+    def finish(self):
+        """Write the CSV report, print a summary and update the calibration factor."""
+        makespan = time.monotonic() - self.started
+        with open(self.report_path, "w", encoding="utf-8", newline="") as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=["pdf_path", "first_page", "last_page", "pages",
+                                                             "needs_ocr", "predicted", "actual", "ok"])
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+        measured = [row for row in self.rows
+                    if row["ok"] and row["actual"] is not None and row["predicted"] not in (0, float("inf"))]
+        predicted = sum(row["predicted"] for row in measured)
+        actual = sum(row["actual"] for row in measured)
+
+        first = f"{self.first_result:.1f} s" if self.first_result is not None else "none"
+        print(f"{len(self.rows)} jobs in {makespan:.1f} s, first result after {first}")
+        if predicted:
+            print(f"Predicted {predicted:.1f} s of work, measured {actual:.1f} s "
+                  f"(actual/predicted {actual / predicted:.2f}); details in {self.report_path}")
+
+            # Blend the observed ratio into the stored factor so the next plan is closer
+            old = load_calibration(self.engine, self.calibration_path)
+            new = old * (1 - CALIBRATION_WEIGHT) + old * (actual / predicted) * CALIBRATION_WEIGHT
+            save_calibration(self.engine, new, self.calibration_path)
+
+
+def run_extractor(func, engine, input_folder, output_folder, output_extension=".txt", ocr=False,
+                  timeout=EXTRACT_TIMEOUT, max_rss_mb=EXTRACT_MAX_RSS_MB, workers=1):
+    """
+    Run a per-file extractor over every PDF in a folder, supervised and scheduled.
+
+    Bad PDFs are quarantined by valid_pdfs, the rest are planned with
+    plan_jobs and each one runs in a supervised subprocess (run_isolated),
+    so a document that hangs or exhausts memory is killed and logged to the
+    failure log instead of stopping the batch. Predicted and actual times
+    go to a ScheduleReport.
+
+    Parameters:
+        func (callable): Module-level function called as func(pdf_path, output_path).
+        engine (str): Extractor name for the plan, the report and the failure log.
+        input_folder (str): Folder with the PDFs.
+        output_folder (str): Folder for the results; created if missing.
+        output_extension (str): Extension of each result file ('.txt', or '.pdf' for OCRed copies).
+        ocr (bool): Passed to plan_jobs; None detects a missing text layer per document.
+        timeout (float): Seconds allowed per document.
+        max_rss_mb (int): Resident memory limit per worker in MiB.
+        workers (int): Number of documents processed in parallel.
+
+    Returns:
+        list: (pdf_path, output_path, ok, result) per document, in completion order.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    pdf_paths = [os.path.join(input_folder, filename) for filename in valid_pdfs(input_folder)]
+    if not pdf_paths:
+        print(f"No PDF files found in the {input_folder} directory.")
+        return []
+
+    jobs = {}
+    for planned in plan_jobs(pdf_paths, engine, ocr=ocr, workers=workers):
+        filename = os.path.splitext(os.path.basename(planned["pdf_path"]))[0] + output_extension
+        jobs[(planned["pdf_path"], os.path.join(output_folder, filename))] = planned
+
+    elapsed = {}
+    report = ScheduleReport(engine)
+    outcomes = []
+    results = run_isolated(func, list(jobs), timeout=timeout, max_rss_mb=max_rss_mb,
+                           workers=workers, label=engine, elapsed=elapsed)
+    for job, ok, result in results:
+        pdf_path, output_path = job
+        report.record(jobs[job], ok, elapsed.get(job))
+        if ok:
+            print(f"Extracted {os.path.basename(pdf_path)} to {output_path}")
+        else:
+            print(f"Error processing {os.path.basename(pdf_path)}: {result}")
+        outcomes.append((pdf_path, output_path, ok, result))
+    report.finish()
+    return outcomes
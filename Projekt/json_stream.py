@@ -0,0 +1,145 @@
+import codecs
+import json
+import re
+
+try:
+    import ijson
+    HAVE_IJSON = True
+    # ijson's parse errors do not derive from ValueError
+    JSON_ERRORS = (ValueError, ijson.JSONError)
+except ImportError:
+    HAVE_IJSON = False
+    JSON_ERRORS = (ValueError,)
+
+# Bytes read per chunk when parsing a JSON document incrementally
+JSON_READ_SIZE = 64 * 1024
+JSON_WHITESPACE = " \t\r\n"
+# Characters that can follow a complete value
+JSON_DELIMITERS = JSON_WHITESPACE + ",:]}"
+# Body of a JSON string up to its closing quote (or the end of the buffer)
+STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+
+class _JsonChunks:
+    """Chunked UTF-8 JSON text with a read position; consumed text is dropped on refill."""
+
+    def __init__(self, binary_file, read_size=JSON_READ_SIZE):
+        self.file = binary_file
+        self.read_size = read_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        if self.eof:
+            return False
+        data = self.file.read(self.read_size)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(data, final=self.eof)
+        self.pos = 0
+        return True
+
+    def next_char(self, skip=JSON_WHITESPACE):
+        """Skip the given characters and return the next one without consuming it ('' at the end)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in skip:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                return ""
+
+    def expect(self, char):
+        if self.next_char() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the value at the read position, reading more until it is complete."""
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if not self._read():
+                    raise
+                continue
+            # A number split across two reads decodes as its prefix ("12" of
+            # "1234", "3" of "3.14"), so a value counts only once a delimiter
+            # follows it or the file has ended
+            if (end < len(self.buffer) and self.buffer[end] in JSON_DELIMITERS) or not self._read():
+                self.pos = end
+                return value
+
+    def skip_value(self):
+        """Skip the value at the read position; strings are skipped without being decoded."""
+        if self.next_char() != '"':
+            self.decode()
+            return
+        self.pos += 1
+        while True:
+            self.pos = STRING_BODY_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) and self.buffer[self.pos] == '"':
+                self.pos += 1
+                return
+            if not self._read():
+                raise ValueError("unterminated string")
+
+
+def iter_json_field(binary_file, field, read_size=JSON_READ_SIZE):
+    """
+    Yield the elements of the array under a top-level key of a JSON object, one at a time.
+
+    Uses ijson when it is installed. The fallback reads the file in chunks,
+    skips the other top-level values (large strings such as "content"
+    without decoding them) and decodes each array element on its own, so
+    memory holds one element and one chunk rather than the document.
+
+    Parameters:
+        binary_file: A UTF-8 encoded binary file object.
+        field (str): The top-level key, e.g. 'paragraphs'.
+        read_size (int): Bytes read per chunk.
+    """
+    if HAVE_IJSON:
+        yield from ijson.items(binary_file, f"{field}.item")
+        return
+
+    chunks = _JsonChunks(binary_file, read_size)
+    chunks.expect("{")
+    while chunks.next_char(JSON_WHITESPACE + ",") not in ("}", ""):
+        key = chunks.decode()
+        chunks.expect(":")
+        if key != field or chunks.next_char() != "[":
+            chunks.skip_value()
+            continue
+        chunks.pos += 1
+        while chunks.next_char(JSON_WHITESPACE + ",") != "]":
+            if chunks.eof and chunks.pos >= len(chunks.buffer):
+                raise ValueError(f"unterminated array {field!r}")
+            yield chunks.decode()
+        return
+
+
+def iter_json_array(binary_file, read_size=JSON_READ_SIZE):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Uses ijson when it is installed; otherwise the file is read in chunks
+    and each element is decoded on its own. Works on non-seekable files
+    such as tar members.
+
+    Parameters:
+        binary_file: A UTF-8 encoded binary file object positioned at the start of the array.
+        read_size (int): Bytes read per chunk.
+    """
+    if HAVE_IJSON:
+        yield from ijson.items(binary_file, "item")
+        return
+
+    chunks = _JsonChunks(binary_file, read_size)
+    chunks.expect("[")
+    while chunks.next_char(JSON_WHITESPACE + ",") != "]":
+        if chunks.eof and chunks.pos >= len(chunks.buffer):
+            raise ValueError("unterminated array")
+        yield chunks.decode()
@@ -1,42 +1,87 @@
+import argparse
 import os
 import arxiv
 import doaj
 import hrcak
 import json_convert
+from pdf_handoff import PdfHandoff
 import pdf_tessar
+import pipeline_profile
+from pipeline_profile import profile
 import pypaper
 import scholar
 import unstructured_process
 
+# Source names passed to the extractors for each menu entry
+SOURCES = {1: "arxiv", 2: "hrcak", 3: "doaj", 4: "scholar"}
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scrape papers, extract their text and convert it to JSON.")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="profile each stage and each document and write the reports to DIR (default: profiles)")
+    parser.add_argument("--profile-top", type=int, default=pipeline_profile.TOP_N, metavar="N",
+                        help="number of functions listed in each profile report")
+    args = parser.parse_args()
+    if args.profile:
+        pipeline_profile.enable(args.profile, args.profile_top)
+
     i = 0
+    run = 0
     while i == 0:
+        run += 1
         print("Which site do you want to scrape?: 1.Arxiv 2.Hrcak 3.Directory_of_open_access_journals 4.Google Scholar")
         site = int(input("Input number: "))
 
-        if site == 1:
-            arxiv.main()
-        elif site == 2:
-            hrcak.main()
-        elif site == 3:
-            doaj.main()
-        elif site == 4:
-            print("Do you want to use 1.pypaper or the 2.scholarly package?")
-            choice = int(input("Input number: "))
-            if choice == 1:
-                pypaper.main()
-            elif choice == 2:
-                scholar.main()
-
-        proces = input("Would you like to use the unstructured library to process the papers y/n? ")
-        if proces == "y":
-            unstructured_process.main()
-        elif proces == "n":
-            pdf_tessar.main()
+        # Optionally extract the text straight from the downloaded bytes instead of
+        # saving every PDF and reading it back in the extraction step
+        handoff = None
+        if site in (1, 2, 3, 4) and input("Extract text in memory while downloading y/n? ") == "y":
+            keep_pdfs = input("Also keep the PDF files y/n? ") == "y"
+            handoff = PdfHandoff(text_folder="txts", keep_pdfs=keep_pdfs)
+
+        with profile(f"run{run}-scrape-{SOURCES.get(site, site)}"):
+            if site == 1:
+                arxiv.main(handoff)
+            elif site == 2:
+                hrcak.main(handoff)
+            elif site == 3:
+                doaj.main(handoff)
+            elif site == 4:
+                print("Do you want to use 1.pypaper or the 2.scholarly package?")
+                choice = int(input("Input number: "))
+                if choice == 1:
+                    pypaper.main()
+                    if handoff is not None:
+                        # PyPaperBot saves the PDFs itself, so they are extracted from disk below
+                        handoff.close()
+                        handoff = None
+                elif choice == 2:
+                    scholar.main(handoff)
+
+        if handoff is not None:
+            # The text is already in txts/; wait for any PDFs still being saved
+            handoff.close()
+            stats = handoff.stats()
+            print(f"Extracted {stats['pages']} pages from {stats['documents']} PDFs in memory, "
+                  f"saved {stats['pdfs_saved']} PDFs ({stats['write_errors']} save errors)")
+            if handoff.extract_failures:
+                # These PDFs were saved instead; extract them from disk with one of the extractors
+                print(f"Text extraction failed for {stats['extract_errors']} PDFs, saved for a later pass:")
+                for save_path, error in handoff.extract_failures:
+                    print(f"  {save_path}: {error}")
+        else:
+            proces = input("Would you like to use the unstructured library to process the papers y/n? ")
+            if proces == "y":
+                with profile(f"run{run}-extract-unstructured"):
+                    unstructured_process.main()
+            elif proces == "n":
+                with profile(f"run{run}-extract-tesseract"):
+                    pdf_tessar.main(SOURCES.get(site))
 
         transforms = input("Would you like to transform the papers into json y/n? ")
         if transforms == "y":
-            json_convert.main()
+            with profile(f"run{run}-json"):
+                json_convert.main()
 
         exit_prog = input("Would you like to exit the program y/n? ")
         if exit_prog == "y":
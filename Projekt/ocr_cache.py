@@ -0,0 +1,237 @@
+import hashlib
+import os
+import sqlite3
+import time
+from PIL import Image
+
+# Default location and size of the page-level OCR cache
+DEFAULT_CACHE_PATH = os.path.join("cache", "ocr_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 50000
+
+# Several OCR workers share the cache file: wait this long for another
+# worker's write lock, and write new pages in batches of this many
+BUSY_TIMEOUT = 60
+COMMIT_EVERY = 20
+
+# Side length of the difference hash used in perceptual mode (256-bit hash)
+PHASH_SIZE = 16
+
+
+def exact_hash(image):
+    """
+    Hash the raw pixels of a page image.
+
+    Parameters:
+        image (PIL.Image.Image): The rasterized page.
+
+    Returns:
+        str: A SHA-256 hex digest of the mode, size and pixel data.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def perceptual_hash(image, hash_size=PHASH_SIZE):
+    """
+    Compute a difference hash of a page image.
+
+    The page is reduced to a small grayscale thumbnail and each bit records
+    whether a pixel is brighter than its right neighbour, so re-rendered or
+    slightly recompressed copies of the same page hash identically.
+
+    Parameters:
+        image (PIL.Image.Image): The rasterized page.
+        hash_size (int): Side length of the hash grid.
+
+    Returns:
+        str: The hash as a hex string.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"p{bits:0{hash_size * hash_size // 4}x}"
+
+
+class OcrCache:
+    """
+    Size-bounded, persistent cache of Tesseract output keyed by page-image hash.
+
+    Entries live in a SQLite file so identical pages (cover pages, licence
+    pages, boilerplate headers) are recognized once and reused across
+    documents and across runs. When the cache grows past max_entries the
+    least recently used pages are evicted.
+
+    New pages and hit counts are buffered and written every commit_every
+    pages in one short transaction, so parallel workers sharing the file
+    rarely wait for each other's write lock. Call flush() at the end of a
+    job; close() flushes too.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, perceptual=False,
+                 commit_every=COMMIT_EVERY, timeout=BUSY_TIMEOUT):
+        """
+        Parameters:
+            path (str): Path of the SQLite cache file.
+            max_entries (int): Maximum number of cached pages.
+            perceptual (bool): Key pages by perceptual hash instead of exact pixels.
+            commit_every (int): Number of new pages buffered before they are written.
+            timeout (float): Seconds to wait for another process's write lock.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.perceptual = perceptual
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.commit_every = commit_every
+        self._pending = {}
+        self._pending_hits = {}
+
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+        self._conn.commit()
+
+    def key_for(self, image, config=""):
+        """
+        Build the cache key for a page image and OCR configuration.
+
+        Parameters:
+            image (PIL.Image.Image): The rasterized page.
+            config (str): Anything that changes the OCR output (language, options).
+        """
+        image_hash = perceptual_hash(image) if self.perceptual else exact_hash(image)
+        return f"{image_hash}|{config}"
+
+    def get(self, key):
+        """
+        Look up the cached text for a key.
+
+        Returns:
+            str: The cached text, or None on a miss.
+        """
+        if key in self._pending:
+            self.hits += 1
+            return self._pending[key]
+
+        row = self._conn.execute("SELECT text FROM pages WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        # The hit count and last use are written with the next batch
+        self.hits += 1
+        self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+        return row[0]
+
+    def put(self, key, text):
+        """
+        Store the OCR text for a key; it is written to the file with the next batch.
+        """
+        self._pending[key] = text
+        if len(self._pending) >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered pages and hit counts and evict old entries if the cache is full.
+
+        A write that still finds the file locked after the busy timeout is
+        reported and kept in the buffer for the next flush.
+        """
+        if not self._pending and not self._pending_hits:
+            return
+
+        now = time.time()
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (key, text, hits, last_used) VALUES (?, ?, 0, ?)",
+                [(key, text, now) for key, text in self._pending.items()],
+            )
+            self._conn.executemany(
+                "UPDATE pages SET hits = hits + ?, last_used = ? WHERE key = ?",
+                [(count, now, key) for key, count in self._pending_hits.items()],
+            )
+            # Count in the database, not per process: several workers may share the file
+            entries = self._count()
+            if entries > self.max_entries:
+                self._evict(entries - self.max_entries)
+            self._conn.commit()
+        except sqlite3.OperationalError as e:
+            self._conn.rollback()
+            print(f"Could not write {len(self._pending)} pages to the OCR cache, will retry: {e}")
+            return
+        self._pending.clear()
+        self._pending_hits.clear()
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def _evict(self, count):
+        # Drop the least recently used pages
+        self._conn.execute(
+            "DELETE FROM pages WHERE key IN"
+            " (SELECT key FROM pages ORDER BY last_used ASC LIMIT ?)",
+            (count,),
+        )
+        self.evictions += count
+
+    def ocr(self, image, ocr_func, config=""):
+        """
+        Return the text of a page image, running ocr_func only on a cache miss.
+
+        Parameters:
+            image (PIL.Image.Image): The rasterized page.
+            ocr_func (callable): Function taking the image and returning its text.
+            config (str): OCR configuration that is part of the cache key.
+        """
+        key = self.key_for(image, config)
+        text = self.get(key)
+        if text is None:
+            text = ocr_func(image)
+            self.put(key, text)
+        return text
+
+    def stats(self):
+        """
+        Return hit-rate statistics for this session.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions and the current number of entries.
+        """
+        self.flush()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": self._count(),
+        }
+
+    def close(self):
+        """Write any buffered pages and close the underlying SQLite connection."""
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
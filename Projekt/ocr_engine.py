@@ -0,0 +1,156 @@
+import os
+from collections import OrderedDict
+import pytesseract
+
+try:
+    import tesserocr
+    HAVE_TESSEROCR = True
+except ImportError:
+    HAVE_TESSEROCR = False
+
+# Language used when none is given, as in the tesseract command line
+DEFAULT_LANG = "eng"
+
+# Engines kept loaded per process: the language-detection sample model and
+# the two most recent document languages. Each holds its model in memory,
+# which counts against the worker's memory limit
+MAX_ENGINES = 3
+
+# Engines of this process by language, least recently used first; each loads its model once
+_engines = OrderedDict()
+
+# Languages whose engine could not be created; pytesseract is used for them
+_unavailable = set()
+
+
+def default_tessdata_path():
+    """
+    Return the traineddata folder to use, or None for the library default.
+
+    TESSDATA_PREFIX wins; otherwise the tessdata folder next to the binary
+    configured for pytesseract (e.g. TESSERACT_CMD on Windows) is used, so
+    both backends read the same models.
+    """
+    if os.environ.get("TESSDATA_PREFIX"):
+        return os.environ["TESSDATA_PREFIX"]
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+    if os.path.isabs(tesseract_cmd):
+        tessdata_path = os.path.join(os.path.dirname(tesseract_cmd), "tessdata")
+        if os.path.isdir(tessdata_path):
+            return tessdata_path
+    return None
+
+
+class TesseractEngine:
+    """
+    A long-lived in-process Tesseract engine for one language.
+
+    The model is loaded once through the Tesseract C API (tesserocr) and
+    each page is passed as an in-memory image, instead of starting a
+    tesseract process and writing a temporary file per page as pytesseract does.
+    The engine is not thread-safe; use one per worker process or thread.
+    """
+
+    def __init__(self, lang=DEFAULT_LANG, tessdata_path=None):
+        """
+        Parameters:
+            lang (str): Tesseract language model(s), e.g. 'hrv' or 'hrv+eng'.
+            tessdata_path (str): Folder with the traineddata files; see default_tessdata_path.
+        """
+        self.lang = lang
+        tessdata_path = tessdata_path or default_tessdata_path()
+        if tessdata_path:
+            self._api = tesserocr.PyTessBaseAPI(path=tessdata_path, lang=lang)
+        else:
+            self._api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def image_to_string(self, image):
+        """Return the text of a PIL image."""
+        self._api.SetImage(image)
+        return self._api.GetUTF8Text()
+
+    def close(self):
+        """Free the engine and its model."""
+        if self._api is not None:
+            self._api.End()
+            self._api = None
+
+
+def get_engine(lang=None):
+    """
+    Return this process's engine for a language, creating it on first use.
+
+    When more than MAX_ENGINES languages are in use, the least recently
+    used engine is closed to free its model.
+
+    Returns:
+        TesseractEngine: The engine, or None if tesserocr is not installed or
+            cannot load the model (pytesseract is used instead).
+    """
+    if not HAVE_TESSEROCR:
+        return None
+    lang = lang or DEFAULT_LANG
+    if lang in _unavailable:
+        return None
+    if lang in _engines:
+        _engines.move_to_end(lang)
+        return _engines[lang]
+
+    try:
+        engine = TesseractEngine(lang)
+    except RuntimeError as e:
+        # Remember the failure so every page does not retry the initialization
+        print(f"In-process Tesseract unavailable for {lang} ({e}); using pytesseract")
+        _unavailable.add(lang)
+        return None
+    while len(_engines) >= MAX_ENGINES:
+        _engines.popitem(last=False)[1].close()
+    _engines[lang] = engine
+    return engine
+
+
+def backend(lang=None):
+    """
+    Return the name of the backend that OCRs a language in this process.
+
+    The backends can recognize the same page slightly differently, so the
+    name belongs in anything that caches OCR output.
+
+    Returns:
+        str: 'tesserocr' or 'pytesseract'.
+    """
+    return "pytesseract" if get_engine(lang) is None else "tesserocr"
+
+
+def image_to_string(image, lang=None):
+    """
+    OCR a page with the in-process engine, falling back to pytesseract.
+
+    Parameters:
+        image (PIL.Image.Image): The page.
+        lang (str): Tesseract language model(s); None uses English.
+
+    Returns:
+        str: The recognized text.
+    """
+    engine = get_engine(lang)
+    if engine is None:
+        return pytesseract.image_to_string(image, lang=lang)
+    return engine.image_to_string(image)
+
+
+def close_engines():
+    """Free all engines of this process."""
+    for engine in _engines.values():
+        engine.close()
+    _engines.clear()
+
+
+def _reset_after_fork():
+    # A forked worker must not share the parent's engines; it creates its own on first use
+    _engines.clear()
+    _unavailable.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
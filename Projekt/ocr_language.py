@@ -0,0 +1,195 @@
+import re
+import fitz  # PyMuPDF
+import ocr_engine
+import pytesseract
+from pdf2image import convert_from_path
+
+# Tesseract language used for each source when nothing better is known
+SOURCE_DEFAULT_LANGUAGES = {
+    "arxiv": "eng",
+    "doaj": "eng",
+    "scholar": "eng",
+    "pypaper": "eng",
+    "hrcak": "hrv",
+}
+DEFAULT_LANGUAGE = "eng"
+
+# ISO 639-1 codes (as found in the PDF /Lang entry) mapped to Tesseract traineddata names
+ISO_TO_TESSERACT = {
+    "en": "eng",
+    "hr": "hrv",
+    "bs": "bos",
+    "sr": "srp",
+    "sl": "slv",
+    "de": "deu",
+    "it": "ita",
+    "fr": "fra",
+    "es": "spa",
+}
+
+# Frequent function words used to tell the supported languages apart
+LANGUAGE_STOPWORDS = {
+    "eng": {
+        "the", "of", "and", "to", "in", "is", "that", "for", "with", "as", "on",
+        "are", "this", "by", "be", "an", "from", "which", "we", "it", "or", "at",
+        "was", "were", "these", "have", "has", "not",
+    },
+    # "i" (and) is left out: it also matches the English "I"
+    "hrv": {
+        "u", "je", "se", "na", "da", "za", "od", "su", "koji", "koja", "koje",
+        "kao", "ili", "te", "što", "iz", "po", "ne", "biti", "bio", "bila", "ova",
+        "ovaj", "ove", "sve", "nije", "prema", "kod", "pri", "kroz", "također",
+        "može", "njihov", "gdje",
+    },
+}
+CROATIAN_LETTERS = set("čćžšđ")
+
+# Number of pages sampled from the text layer
+SAMPLE_PAGES = 3
+# Resolution of the OCR sample used for scanned documents
+SAMPLE_DPI = 100
+# Minimum number of stopword hits needed to trust a text sample
+MIN_EVIDENCE = 5
+
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+# Installed traineddata names, read once per process
+_installed = None
+
+
+def installed_languages():
+    """
+    Return the Tesseract languages installed on this machine.
+
+    Returns:
+        set: Traineddata names, or None if they cannot be listed (every language is then tried).
+    """
+    global _installed
+    if _installed is None:
+        try:
+            _installed = set(pytesseract.get_languages(config=""))
+        except Exception as e:
+            print(f"Could not list the installed Tesseract languages: {e}")
+            _installed = set()
+    return _installed or None
+
+
+def usable_language(language, default=DEFAULT_LANGUAGE):
+    """
+    Return language if its traineddata is installed, otherwise the default.
+
+    A missing model makes Tesseract fail on every page, so a language that
+    was detected but not installed is never used.
+    """
+    installed = installed_languages()
+    if installed is None or language in installed:
+        return language
+    if default in installed:
+        print(f"Tesseract language {language} is not installed; using {default}")
+        return default
+    print(f"Tesseract languages {language} and {default} are not installed; using {DEFAULT_LANGUAGE}")
+    return DEFAULT_LANGUAGE
+
+
+def classify_text(text):
+    """
+    Guess the language of a text sample from stopword frequencies.
+
+    Parameters:
+        text (str): A sample of the document text.
+
+    Returns:
+        str: A Tesseract language code, or None if the sample is inconclusive.
+    """
+    scores = dict.fromkeys(LANGUAGE_STOPWORDS, 0)
+    for word in WORD_RE.findall(text.lower()):
+        for language, stopwords in LANGUAGE_STOPWORDS.items():
+            if word in stopwords:
+                scores[language] += 1
+        # Croatian diacritics are strong evidence on their own
+        if "hrv" in scores and CROATIAN_LETTERS.intersection(word):
+            scores["hrv"] += 1
+
+    language, score = max(scores.items(), key=lambda item: item[1])
+    return language if score >= MIN_EVIDENCE else None
+
+
+def language_from_metadata(doc):
+    """
+    Read the document language from the /Lang entry of the PDF catalog.
+
+    Returns:
+        str: A Tesseract language code, or None if missing or unknown.
+    """
+    try:
+        kind, value = doc.xref_get_key(doc.pdf_catalog(), "Lang")
+    except Exception:
+        return None
+    if kind != "string" or not value:
+        return None
+    return ISO_TO_TESSERACT.get(value.split("-")[0].strip().lower())
+
+
+def language_from_text_layer(doc, sample_pages=SAMPLE_PAGES):
+    """
+    Classify the text layer of the first few pages.
+
+    Returns:
+        str: A Tesseract language code, or None if there is no usable text layer.
+    """
+    sample = []
+    for page_num in range(min(sample_pages, len(doc))):
+        sample.append(doc.load_page(page_num).get_text())
+    return classify_text("\n".join(sample))
+
+
+def language_from_ocr_sample(pdf_path, poppler_path=None, sample_lang=DEFAULT_LANGUAGE):
+    """
+    OCR the first page at low resolution and classify the result.
+
+    Most of the function words in LANGUAGE_STOPWORDS are plain ASCII, so
+    the source's default model recognizes enough of them whatever the
+    language of the document.
+
+    Returns:
+        str: A Tesseract language code, or None if the sample is inconclusive.
+    """
+    images = convert_from_path(pdf_path, dpi=SAMPLE_DPI, first_page=1, last_page=1,
+                               grayscale=True, poppler_path=poppler_path)
+    if not images:
+        return None
+    return classify_text(ocr_engine.image_to_string(images[0], lang=sample_lang))
+
+
+def detect_document_language(pdf_path, source=None, poppler_path=None):
+    """
+    Pick the single Tesseract language model to use for a document.
+
+    The text layer is tried first, then the /Lang metadata entry, then a
+    low-resolution OCR sample; the per-source default is used when none of
+    them is conclusive. Only installed languages are returned.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        source (str): Name of the source the PDF was harvested from (e.g. 'hrcak').
+        poppler_path (str): Optional path to the Poppler binaries.
+
+    Returns:
+        str: A Tesseract language code such as 'eng' or 'hrv'.
+    """
+    default = usable_language(SOURCE_DEFAULT_LANGUAGES.get(source, DEFAULT_LANGUAGE))
+
+    try:
+        with fitz.open(pdf_path) as doc:
+            language = language_from_text_layer(doc) or language_from_metadata(doc)
+    except Exception as e:
+        print(f"Could not read {pdf_path} for language detection: {e}")
+        language = None
+
+    if language is None:
+        try:
+            language = language_from_ocr_sample(pdf_path, poppler_path, sample_lang=default)
+        except Exception as e:
+            print(f"Language sample OCR failed for {pdf_path}: {e}")
+
+    return usable_language(language, default) if language else default
@@ -0,0 +1,261 @@
+import numpy as np
+from PIL import Image
+
+# Tesseract is tuned for text at about 300 DPI; larger pages only cost time
+TARGET_DPI = 300
+
+# Sauvola binarization: window of about 1/10 inch and the usual k and R constants
+WINDOW_INCHES = 0.1
+SAUVOLA_K = 0.2
+SAUVOLA_R = 128.0
+
+# Rows or columns at the edge darker than this fraction are scanner borders
+BORDER_DARK_FRACTION = 0.5
+# Pixels skipped past the inner edge of a border
+BORDER_INSET = 10
+# Rows or columns with fewer dark pixels than this fraction are noise, not text
+SPECK_FRACTION = 0.002
+# White margin kept around the text after cropping (inches)
+CROP_PADDING_INCHES = 0.1
+
+# Skew angles searched (degrees): a coarse pass, then a fine pass around the best
+MAX_SKEW = 5.0
+COARSE_STEP = 0.5
+FINE_STEP = 0.1
+# Dark pixels used for skew estimation; a random subset keeps it fast on large pages
+SKEW_SAMPLE_SIZE = 50000
+
+
+def to_grayscale(image):
+    """
+    Convert a page image to an 8-bit grayscale array.
+
+    Parameters:
+        image (PIL.Image.Image or numpy.ndarray): The rasterized page.
+
+    Returns:
+        numpy.ndarray: 2-D uint8 array.
+    """
+    pixels = np.asarray(image)
+    if pixels.ndim == 2:
+        return pixels.astype(np.uint8, copy=False)
+    # ITU-R 601 luma in 16-bit integer arithmetic (weights sum to 256, so no overflow).
+    # Widen first: NumPy 1.x keeps uint8 * scalar in uint8 and would wrap around
+    pixels = pixels.astype(np.uint16)
+    gray = pixels[..., 0] * 77
+    gray += pixels[..., 1] * 150
+    gray += pixels[..., 2] * 29
+    return (gray >> 8).astype(np.uint8)
+
+
+def downscale(gray, source_dpi, target_dpi=TARGET_DPI):
+    """
+    Reduce a grayscale page to target_dpi by averaging pixel blocks; never upscales.
+
+    An integer factor is reduced with a block mean over a reshaped view; any
+    remaining fractional factor is resampled bilinearly, one axis at a time.
+
+    Returns:
+        numpy.ndarray: The downscaled uint8 array.
+    """
+    if not source_dpi or source_dpi <= target_dpi:
+        return gray
+
+    factor = source_dpi / target_dpi
+    block = int(factor)
+    if block > 1:
+        height, width = gray.shape[0] // block * block, gray.shape[1] // block * block
+        gray = gray[:height, :width].reshape(height // block, block, width // block, block).mean(axis=(1, 3))
+        factor /= block
+
+    if factor > 1.001:
+        # Separable bilinear resampling: blend pairs of rows, then pairs of columns
+        gray = gray.astype(np.float32, copy=False)
+        for axis in (0, 1):
+            size = gray.shape[axis]
+            positions = np.minimum(np.arange(int(size / factor)) * factor, size - 1)
+            lower = positions.astype(np.intp)
+            upper = np.minimum(lower + 1, size - 1)
+            weight = (positions - lower).astype(np.float32)
+            if axis == 0:
+                weight = weight[:, None]
+            gray = np.take(gray, lower, axis=axis) * (1 - weight) + np.take(gray, upper, axis=axis) * weight
+
+    return np.clip(gray + 0.5, 0, 255).astype(np.uint8)
+
+
+def _window_means(values, half):
+    # Mean of every (2*half+1)^2 window from an integral image of the edge-padded page
+    size = 2 * half + 1
+    padded = np.pad(values, half + 1, mode="edge")
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    height, width = values.shape
+    sums = (integral[size:size + height, size:size + width] - integral[:height, size:size + width]
+            - integral[size:size + height, :width] + integral[:height, :width])
+    return sums / (size * size)
+
+
+def binarize(gray, dpi=TARGET_DPI, k=SAUVOLA_K, r=SAUVOLA_R):
+    """
+    Sauvola adaptive binarization with integral images.
+
+    Each pixel is compared with a threshold from the mean and standard
+    deviation of its neighbourhood, so uneven lighting, stains and coloured
+    backgrounds drop out while faint text is kept.
+
+    Parameters:
+        gray (numpy.ndarray): 2-D uint8 page.
+        dpi (int): Resolution of the page; sets the window size.
+        k (float): Sauvola sensitivity.
+        r (float): Dynamic range of the standard deviation.
+
+    Returns:
+        numpy.ndarray: uint8 array with text 0 and background 255.
+    """
+    half = max(7, int(dpi * WINDOW_INCHES) // 2)
+    values = gray.astype(np.float64)
+    mean = _window_means(values, half)
+    variance = _window_means(values * values, half) - mean * mean
+    threshold = mean * (1.0 + k * (np.sqrt(np.maximum(variance, 0.0)) / r - 1.0))
+    return np.where(values > threshold, 255, 0).astype(np.uint8)
+
+
+def border_bounds(gray):
+    """
+    Find the page area inside dark scanner borders.
+
+    Borders are found on the grayscale page, because adaptive binarization
+    turns large uniform dark areas white. Run this before deskewing, while
+    the borders are still aligned with the image edges.
+
+    Parameters:
+        gray (numpy.ndarray): 2-D uint8 page.
+
+    Returns:
+        tuple: (top, bottom, left, right) slice bounds of the page area.
+    """
+    dark = gray < 128
+    height, width = dark.shape
+
+    # Walk in from each edge past rows/columns that are mostly black
+    def inner_edge(fractions):
+        border = fractions > BORDER_DARK_FRACTION
+        return 0 if border.all() else int(np.argmin(border))
+
+    row_dark = dark.mean(axis=1)
+    col_dark = dark.mean(axis=0)
+    top = inner_edge(row_dark)
+    bottom = height - inner_edge(row_dark[::-1])
+    left = inner_edge(col_dark)
+    right = width - inner_edge(col_dark[::-1])
+    if top >= bottom or left >= right:
+        return 0, height, 0, width
+
+    # Step a little further in where a border was found; its inner edge is rarely straight
+    inset = min(BORDER_INSET, (bottom - top) // 4, (right - left) // 4)
+    return (top + inset if top else top, bottom - inset if bottom < height else bottom,
+            left + inset if left else left, right - inset if right < width else right)
+
+
+def content_bounds(binary, dpi=TARGET_DPI):
+    """
+    Find the text area of a binarized page, keeping a small margin.
+
+    Rows and columns with only a few dark pixels (specks left by noise) do
+    not count as text.
+
+    Returns:
+        tuple: (top, bottom, left, right) slice bounds of the text area.
+    """
+    dark = binary == 0
+    height, width = dark.shape
+    rows = np.flatnonzero(dark.sum(axis=1) >= max(2, width * SPECK_FRACTION))
+    cols = np.flatnonzero(dark.sum(axis=0) >= max(2, height * SPECK_FRACTION))
+    if rows.size == 0 or cols.size == 0:
+        return 0, height, 0, width
+    pad = int(dpi * CROP_PADDING_INCHES)
+    return (max(0, rows[0] - pad), min(height, rows[-1] + 1 + pad),
+            max(0, cols[0] - pad), min(width, cols[-1] + 1 + pad))
+
+
+def estimate_skew(binary, max_angle=MAX_SKEW, sample_size=SKEW_SAMPLE_SIZE, seed=0):
+    """
+    Estimate the skew of a page with the projection-profile method.
+
+    The dark pixels are projected onto the vertical axis for every candidate
+    angle at once; the angle whose row histogram is sharpest (text lines
+    fall into few rows) is the skew.
+
+    Parameters:
+        binary (numpy.ndarray): Binarized page (text 0).
+        max_angle (float): Largest skew searched, in degrees.
+        sample_size (int): Maximum number of dark pixels used.
+        seed (int): Seed for the pixel sample, so results are repeatable.
+
+    Returns:
+        float: The skew in degrees, counter-clockwise positive; rotating the page
+            by the negative angle (PIL's rotate(-angle)) straightens it.
+    """
+    ys, xs = np.nonzero(binary == 0)
+    if ys.size < 100:
+        return 0.0
+    if ys.size > sample_size:
+        chosen = np.random.default_rng(seed).choice(ys.size, sample_size, replace=False)
+        ys, xs = ys[chosen], xs[chosen]
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+
+    def best_angle(angles):
+        radians = np.deg2rad(angles)[:, None]
+        # Row of every pixel after rotating by each angle: one row of the array per angle
+        projected = ys[None, :] * np.cos(radians) + xs[None, :] * np.sin(radians)
+        projected = np.rint(projected - projected.min(axis=1, keepdims=True)).astype(np.intp)
+        bins = int(projected.max()) + 1
+        # Offset each angle into its own block of bins so one bincount covers all angles
+        offsets = (np.arange(len(angles)) * bins)[:, None]
+        histograms = np.bincount((projected + offsets).ravel(), minlength=len(angles) * bins)
+        histograms = histograms.reshape(len(angles), bins).astype(np.float64)
+        scores = (np.diff(histograms, axis=1) ** 2).sum(axis=1)
+        return float(angles[int(np.argmax(scores))])
+
+    coarse = best_angle(np.arange(-max_angle, max_angle + COARSE_STEP / 2, COARSE_STEP))
+    fine = best_angle(np.arange(coarse - COARSE_STEP, coarse + COARSE_STEP + FINE_STEP / 2, FINE_STEP))
+    return round(fine, 2)
+
+
+def preprocess_page(image, dpi, target_dpi=TARGET_DPI, deskew=True, crop=True):
+    """
+    Prepare a rasterized page for Tesseract.
+
+    Grayscale, downscale to target_dpi, Sauvola binarization, deskew and
+    border cropping, all as array operations on the whole page.
+
+    Parameters:
+        image (PIL.Image.Image): The rasterized page.
+        dpi (int): Resolution the page was rasterized at.
+        target_dpi (int): Resolution handed to Tesseract.
+        deskew (bool): Estimate and correct the skew.
+        crop (bool): Crop scanner borders and empty margins.
+
+    Returns:
+        PIL.Image.Image: A binarized ('L' mode) page.
+    """
+    gray = downscale(to_grayscale(image), dpi, target_dpi)
+    dpi = min(dpi, target_dpi) if dpi else target_dpi
+    if crop:
+        top, bottom, left, right = border_bounds(gray)
+        gray = gray[top:bottom, left:right]
+    binary = binarize(gray, dpi)
+
+    if deskew:
+        angle = estimate_skew(binary)
+        if abs(angle) >= FINE_STEP:
+            # Rotate the grayscale page and binarize again, so interpolation does not leave jagged edges
+            rotated = Image.fromarray(gray).rotate(-angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+            binary = binarize(np.asarray(rotated), dpi)
+
+    if crop:
+        top, bottom, left, right = content_bounds(binary, dpi)
+        binary = binary[top:bottom, left:right]
+
+    return Image.fromarray(binary)
@@ -0,0 +1,490 @@
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import pdf_tessar
+from ocr_cache import OcrCache
+from ocr_language import detect_document_language
+from pdf_stream import merge_range_parts, range_part_path
+from pdf_validate import check_pdf_structure, quarantine_pdf
+
+# Shared queue database; put it on the filesystem all workers can reach
+DEFAULT_QUEUE_PATH = os.path.join("cache", "ocr_queue.sqlite")
+
+# WAL needs shared memory between the processes and does not work on network
+# filesystems, so it is only used when every worker runs on the same host
+SHARED_JOURNAL_MODE = "DELETE"
+SINGLE_HOST_JOURNAL_MODE = "WAL"
+
+# A job whose lease is not renewed within this many seconds is handed to another worker
+LEASE_SECONDS = 300
+HEARTBEAT_SECONDS = 60
+# The heartbeat stops renewing a lease after this many seconds, so a job whose
+# OCR call hangs is handed to another worker (same limit as pdf_tessar.OCR_TIMEOUT)
+MAX_JOB_SECONDS = 3600
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 5
+
+# Default number of pages per Tesseract job; large scans are split into ranges
+PAGES_PER_JOB = 25
+
+ENGINES = ("tesseract", "ocrmypdf")
+
+
+def connect(queue_path, single_host=False):
+    """
+    Open the queue database with settings that are safe for many concurrent workers.
+
+    Parameters:
+        queue_path (str): Path of the queue database.
+        single_host (bool): All workers run on this host; use the faster WAL journal.
+            Workers on other hosts sharing the file over a network filesystem need
+            the rollback journal, so every worker of a queue must use the same setting.
+    """
+    directory = os.path.dirname(queue_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(queue_path, timeout=60, isolation_level=None)
+    journal_mode = SINGLE_HOST_JOURNAL_MODE if single_host else SHARED_JOURNAL_MODE
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.execute("PRAGMA busy_timeout=60000")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " id INTEGER PRIMARY KEY,"
+        " engine TEXT NOT NULL,"
+        " pdf_path TEXT NOT NULL,"
+        " output_path TEXT NOT NULL,"
+        " source TEXT,"
+        " first_page INTEGER NOT NULL,"
+        " last_page INTEGER,"
+        " status TEXT NOT NULL DEFAULT 'pending',"
+        " worker TEXT,"
+        " lease_expires REAL,"
+        " attempts INTEGER NOT NULL DEFAULT 0,"
+        " error TEXT,"
+        " created REAL,"
+        " finished REAL,"
+        " UNIQUE (engine, pdf_path, first_page))"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires)")
+    return conn
+
+
+def enqueue_folder(conn, input_folder="pdfs", output_folder=None, engine="tesseract",
+                   pages_per_job=PAGES_PER_JOB, source=None):
+    """
+    Add a job for every PDF in a folder that is not queued yet.
+
+    Tesseract jobs are split into page ranges so several workers can OCR
+    one large scan; ocrmypdf jobs always cover a whole file.
+
+    Parameters:
+        conn (sqlite3.Connection): Queue connection from connect().
+        input_folder (str): Folder with the PDFs.
+        output_folder (str): Folder for the results ('txts' or 'ocr_text' by default).
+        engine (str): 'tesseract' or 'ocrmypdf'.
+        pages_per_job (int): Pages per Tesseract job.
+        source (str): Source of the PDFs, used for language detection.
+
+    Returns:
+        int: The number of jobs added.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+    if output_folder is None:
+        output_folder = "txts" if engine == "tesseract" else "ocr_text"
+
+    added = 0
+    for filename in sorted(os.listdir(input_folder)):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        pdf_path = os.path.abspath(os.path.join(input_folder, filename))
+
+        ok, detail = check_pdf_structure(pdf_path)
+        if not ok:
+            quarantine_pdf(pdf_path, detail)
+            continue
+
+        if engine == "tesseract":
+            output_path = os.path.join(output_folder, f"{os.path.splitext(filename)[0]}.txt")
+            ranges = [(first, min(first + pages_per_job - 1, detail))
+                      for first in range(1, detail + 1, pages_per_job)]
+        else:
+            output_path = os.path.join(output_folder, filename)
+            ranges = [(1, None)]
+
+        for first_page, last_page in ranges:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (engine, pdf_path, output_path, source, first_page, last_page, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (engine, pdf_path, os.path.abspath(output_path), source, first_page, last_page, time.time()),
+            )
+            added += cursor.rowcount
+    return added
+
+
+def claim(conn, worker_id, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """
+    Atomically lease the next pending job, or a job whose lease has expired.
+
+    Returns:
+        dict: The claimed job, or None if nothing is available.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Jobs whose last allowed attempt crashed are given up on
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), finished = ?"
+            " WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, max_attempts),
+        )
+        row = conn.execute(
+            "SELECT id, engine, pdf_path, output_path, source, first_page, last_page, attempts FROM jobs"
+            " WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+            " AND attempts < ?"
+            " ORDER BY id LIMIT 1",
+            (now, max_attempts),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1"
+            " WHERE id = ?",
+            (worker_id, now + lease_seconds, row[0]),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    keys = ("id", "engine", "pdf_path", "output_path", "source", "first_page", "last_page", "attempts")
+    job = dict(zip(keys, row))
+    job["attempts"] += 1
+    return job
+
+
+def heartbeat(conn, job_id, worker_id, lease_seconds=LEASE_SECONDS):
+    """
+    Extend the lease of a job this worker still owns.
+
+    Returns:
+        bool: False if the lease was lost (expired and claimed by another worker).
+    """
+    cursor = conn.execute(
+        "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+        (time.time() + lease_seconds, job_id, worker_id),
+    )
+    return cursor.rowcount == 1
+
+
+def complete(conn, job, worker_id, tmp_path, final_path):
+    """
+    Move a job's result into place and mark the job done, only while this worker holds the lease.
+
+    The lease is checked and the file replaced inside one write transaction,
+    so no other worker can claim the job in between. The last range of a
+    Tesseract PDF stays leased until its merge is done (see finish_merge);
+    if the worker dies while merging, the lease expires and the job, merge
+    included, is redone by another worker.
+
+    Parameters:
+        conn (sqlite3.Connection): Queue connection.
+        job (dict): The claimed job.
+        worker_id (str): ID of this worker.
+        tmp_path (str): The worker-specific result file.
+        final_path (str): Where the result belongs.
+
+    Returns:
+        tuple: (owned, merge) - owned is False if the lease was lost and the
+            result discarded; merge is True if the caller must now merge the PDF.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        owned = conn.execute(
+            "SELECT 1 FROM jobs WHERE id = ? AND worker = ? AND status = 'leased'",
+            (job["id"], worker_id),
+        ).fetchone() is not None
+        if not owned:
+            conn.execute("COMMIT")
+            os.remove(tmp_path)
+            return False, False
+
+        os.replace(tmp_path, final_path)
+        others = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE engine = ? AND pdf_path = ? AND status != 'done' AND id != ?",
+            (job["engine"], job["pdf_path"], job["id"]),
+        ).fetchone()[0]
+        merge = job["engine"] == "tesseract" and others == 0
+        if not merge:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', finished = ?, error = NULL WHERE id = ?",
+                (time.time(), job["id"]),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return True, merge
+
+
+def finish_merge(conn, job, worker_id):
+    """Mark the last range of a PDF done once its merge has finished."""
+    cursor = conn.execute(
+        "UPDATE jobs SET status = 'done', finished = ?, error = NULL"
+        " WHERE id = ? AND worker = ? AND status = 'leased'",
+        (time.time(), job["id"], worker_id),
+    )
+    return cursor.rowcount == 1
+
+
+def fail(conn, job, worker_id, error, max_attempts=MAX_ATTEMPTS):
+    """
+    Record a failed attempt; the job is retried until it reaches max_attempts.
+    """
+    failed = job["attempts"] >= max_attempts
+    conn.execute(
+        "UPDATE jobs SET status = ?, error = ?, lease_expires = NULL, finished = ? WHERE id = ? AND worker = ?",
+        ("failed" if failed else "pending", str(error)[:2000], time.time() if failed else None,
+         job["id"], worker_id),
+    )
+
+
+def part_path(job):
+    """Return the partial output file of a Tesseract page-range job."""
+    return range_part_path(job["output_path"], job["first_page"])
+
+
+def result_paths(job, worker_id):
+    """
+    Return (tmp_path, final_path) of a job's result.
+
+    Results are written under a worker-specific name first, so a worker that
+    lost its lease cannot clobber the result of the worker that took over.
+    """
+    if job["engine"] == "ocrmypdf":
+        return f"{job['output_path']}.{worker_id}.pdf", job["output_path"]
+    return f"{part_path(job)}.{worker_id}", part_path(job)
+
+
+def merge_parts(conn, job):
+    """
+    Concatenate the page-range outputs of a finished PDF into its final text file.
+
+    A merge redone after a crash finds the final file already written and
+    some parts removed; only the leftover parts are removed then.
+    """
+    first_pages = [first_page for (first_page,) in conn.execute(
+        "SELECT first_page FROM jobs WHERE engine = ? AND pdf_path = ? ORDER BY first_page",
+        (job["engine"], job["pdf_path"]),
+    )]
+    part_paths = [range_part_path(job["output_path"], first_page) for first_page in first_pages]
+    if all(os.path.exists(path) for path in part_paths):
+        merge_range_parts(job["output_path"], first_pages)
+    elif os.path.exists(job["output_path"]):
+        for path in part_paths:
+            if os.path.exists(path):
+                os.remove(path)
+    else:
+        missing = [path for path in part_paths if not os.path.exists(path)]
+        raise FileNotFoundError(f"Missing page-range outputs for {job['pdf_path']}: {missing}")
+
+
+class Heartbeat(threading.Thread):
+    """
+    Background thread that keeps renewing the lease of the job being processed.
+
+    Renewal stops after max_seconds: a worker stuck in a hung Tesseract,
+    pdftoppm or ocrmypdf call then loses the lease, and the job is reclaimed
+    by another worker instead of staying leased forever.
+    """
+
+    def __init__(self, queue_path, job_id, worker_id, lease_seconds=LEASE_SECONDS,
+                 interval=HEARTBEAT_SECONDS, single_host=False, max_seconds=MAX_JOB_SECONDS):
+        super().__init__(daemon=True)
+        self.queue_path = queue_path
+        self.single_host = single_host
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stopped = threading.Event()
+        self.lost = False
+        self.expired = False
+
+    def run(self):
+        deadline = time.time() + self.max_seconds
+        # SQLite connections cannot be shared between threads
+        conn = connect(self.queue_path, self.single_host)
+        try:
+            while not self.stopped.wait(self.interval):
+                if time.time() >= deadline:
+                    print(f"[{self.worker_id}] Job {self.job_id} ran over {self.max_seconds} s;"
+                          f" no longer renewing its lease")
+                    self.expired = True
+                    return
+                if not heartbeat(conn, self.job_id, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def process_job(job, worker_id, poppler_path, cache, languages):
+    """
+    Run OCR for one job into a worker-specific file.
+
+    Parameters:
+        job (dict): The claimed job.
+        worker_id (str): ID of this worker.
+        poppler_path (str): Optional path to the Poppler binaries.
+        cache (OcrCache): Page cache shared by this worker's jobs.
+        languages (dict): Per-worker memo of detected languages by PDF path.
+
+    Returns:
+        tuple: (tmp_path, final_path); complete() moves the result into place
+            only if this worker still holds the lease.
+    """
+    os.makedirs(os.path.dirname(job["output_path"]), exist_ok=True)
+
+    if job["engine"] == "ocrmypdf":
+        # Imported here so Tesseract-only workers do not need ocrmypdf installed
+        import ocrmypdf_extr
+        tmp_path, final_path = result_paths(job, worker_id)
+        ocrmypdf_extr.ocr_file(job["pdf_path"], tmp_path)
+        return tmp_path, final_path
+
+    lang = languages.get(job["pdf_path"])
+    if lang is None:
+        lang = languages[job["pdf_path"]] = detect_document_language(job["pdf_path"], job["source"], poppler_path)
+    tmp_path, final_path = result_paths(job, worker_id)
+    pdf_tessar.ocr_pdf_to_file(job["pdf_path"], tmp_path, poppler_path, cache, lang,
+                               first_page=job["first_page"], last_page=job["last_page"])
+    return tmp_path, final_path
+
+
+def run_worker(queue_path=DEFAULT_QUEUE_PATH, worker_id=None, lease_seconds=LEASE_SECONDS,
+               wait=False, poll_seconds=POLL_SECONDS, single_host=False, max_job_seconds=MAX_JOB_SECONDS):
+    """
+    Claim and process jobs until the queue is empty (or forever with wait=True).
+
+    Any number of workers, on this host or on other hosts sharing the
+    filesystem, can run against the same queue. Each job's lease is renewed
+    by a heartbeat thread; if a worker dies its job's lease expires and the
+    job is picked up by another worker, as is a job still running after
+    max_job_seconds. Pass single_host=True only when every worker runs on
+    this host (see connect).
+
+    Returns:
+        int: The number of jobs completed by this worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    poppler_path = pdf_tessar.configure_tesseract()
+    conn = connect(queue_path, single_host)
+    languages = {}
+    completed = 0
+
+    with OcrCache() as cache:
+        while True:
+            job = claim(conn, worker_id, lease_seconds)
+            if job is None:
+                if not wait:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            pages = f"pages {job['first_page']}-{job['last_page'] or 'end'}"
+            print(f"[{worker_id}] OCR {os.path.basename(job['pdf_path'])} {pages} (attempt {job['attempts']})")
+
+            # The lease is renewed until the job, and the merge of its PDF if it
+            # was the last range, is done
+            beat = Heartbeat(queue_path, job["id"], worker_id, lease_seconds,
+                             min(HEARTBEAT_SECONDS, lease_seconds / 3), single_host, max_job_seconds)
+            beat.start()
+            try:
+                tmp_path, final_path = process_job(job, worker_id, poppler_path, cache, languages)
+                cache.flush()
+                owned, merge = complete(conn, job, worker_id, tmp_path, final_path)
+                if merge:
+                    merge_parts(conn, job)
+                    owned = finish_merge(conn, job, worker_id)
+                    print(f"[{worker_id}] Finished {job['output_path']}")
+            except Exception as e:
+                print(f"[{worker_id}] Job {job['id']} failed: {e}")
+                tmp_path = result_paths(job, worker_id)[0]
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                fail(conn, job, worker_id, e)
+                continue
+            finally:
+                beat.stop()
+
+            if not owned:
+                print(f"[{worker_id}] Lost the lease on job {job['id']}; discarding the result")
+                continue
+            completed += 1
+
+    conn.close()
+    return completed
+
+
+def print_status(conn):
+    """Print the number of jobs in each state and the most recent failures."""
+    for status, count in conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status ORDER BY status"):
+        print(f"{status:<8} {count}")
+    for pdf_path, first_page, error in conn.execute(
+            "SELECT pdf_path, first_page, error FROM jobs WHERE status = 'failed' ORDER BY finished DESC LIMIT 10"):
+        print(f"failed: {os.path.basename(pdf_path)} from page {first_page}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared work queue for OCR workers.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="Path of the shared queue database")
+    parser.add_argument("--single-host", action="store_true",
+                        help="All workers run on this host: use WAL instead of the network-safe rollback journal")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = commands.add_parser("enqueue", help="Queue every PDF of a folder")
+    enqueue_parser.add_argument("--input", default="pdfs")
+    enqueue_parser.add_argument("--output", default=None)
+    enqueue_parser.add_argument("--engine", choices=ENGINES, default="tesseract")
+    enqueue_parser.add_argument("--pages-per-job", type=int, default=PAGES_PER_JOB)
+    enqueue_parser.add_argument("--source", default=None)
+
+    work_parser = commands.add_parser("work", help="Run a worker")
+    work_parser.add_argument("--worker-id", default=None)
+    work_parser.add_argument("--lease", type=int, default=LEASE_SECONDS)
+    work_parser.add_argument("--wait", action="store_true", help="Keep polling when the queue is empty")
+    work_parser.add_argument("--max-job-seconds", type=int, default=MAX_JOB_SECONDS,
+                             help="Stop renewing the lease of a job running longer than this")
+
+    commands.add_parser("status", help="Show queue statistics")
+
+    args = parser.parse_args()
+    if args.command == "enqueue":
+        conn = connect(args.queue, args.single_host)
+        added = enqueue_folder(conn, args.input, args.output, args.engine, args.pages_per_job, args.source)
+        print(f"Queued {added} jobs")
+        conn.close()
+    elif args.command == "work":
+        completed = run_worker(args.queue, args.worker_id, args.lease, args.wait,
+                               single_host=args.single_host, max_job_seconds=args.max_job_seconds)
+        print(f"Worker finished {completed} jobs")
+    else:
+        conn = connect(args.queue, args.single_host)
+        print_status(conn)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
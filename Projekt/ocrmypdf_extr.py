@@ -1,25 +1,35 @@
-import os
 import ocrmypdf
+from job_scheduler import run_extractor
 
 # Define the input and output directories
 input_folder = 'pdfs'
 output_folder = 'ocr_text'
 
-# Create the output directory if it doesn't exist
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
+# Per-document limits for the supervised OCR process (as in pdf_tessar)
+OCR_TIMEOUT = 3600
+MAX_RSS_MB = 2048
 
-# Iterate over all PDF files in the input folder
-for pdf_file in os.listdir(input_folder):
-    if pdf_file.endswith('.pdf'):
-        input_pdf_path = os.path.join(input_folder, pdf_file)
-        output_pdf_path = os.path.join(output_folder, pdf_file)
 
-        try:
-            # Apply OCR to the PDF file
-            ocrmypdf.ocr(input_pdf_path, output_pdf_path, deskew=True)
-            print(f"Successfully processed: {pdf_file}")
-        except Exception as e:
-            print(f"Error processing {pdf_file}: {e}")
+def ocr_file(input_pdf_path, output_pdf_path):
+    """
+    Apply OCR to a single PDF file, writing a searchable copy.
 
-print("OCR processing completed.")
+    Parameters:
+        input_pdf_path (str): Path to the scanned PDF.
+        output_pdf_path (str): Path of the OCRed PDF to create.
+    """
+    ocrmypdf.ocr(input_pdf_path, output_pdf_path, deskew=True)
+
+
+def main():
+    # Each PDF that passes the integrity check is OCRed in a supervised
+    # subprocess, so a scan that hangs ocrmypdf or its Tesseract children is
+    # killed and logged instead of stopping the batch
+    run_extractor(ocr_file, "ocrmypdf", input_folder, output_folder, output_extension=".pdf", ocr=True,
+                  timeout=OCR_TIMEOUT, max_rss_mb=MAX_RSS_MB)
+
+    print("OCR processing completed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pdf_to_text_pymupdf import extract_bytes_to_file
+from pdf_validate import MAX_PDF_SIZE, InvalidPdfError, check_pdf_bytes, fetch_pdf_bytes
+
+# Downloads waiting to be written to disk; the downloader blocks when this many are queued
+MAX_PENDING_WRITES = 4
+
+
+class PdfHandoff:
+    """
+    Hand downloaded PDFs straight to the text extractor without a disk round-trip.
+
+    fetch() takes the same arguments as pdf_validate.stream_pdf_download, so a
+    scraper can use either one. The PDF is downloaded into memory, checked,
+    and MuPDF extracts the text from a memoryview over the downloaded bytes.
+    Keeping the PDF is optional; when enabled, the same buffer is written to
+    save_path by a background thread while the scraper moves on.
+
+    Extraction runs in the scraper's process. Handing the bytes to a
+    supervised worker (extract_supervisor) would copy them through a pipe,
+    so documents that need a time or memory limit should be downloaded to
+    disk and extracted in a separate pass instead.
+
+    Saving and extraction are tracked separately. A PDF whose text cannot
+    be extracted is still saved (even without keep_pdfs) and listed in
+    extract_failures, so it counts as downloaded and a later extraction
+    pass can pick it up from disk.
+
+    Example:
+        with PdfHandoff(text_folder="txts", keep_pdfs=False) as handoff:
+            arxiv.main(handoff)
+    """
+
+    def __init__(self, text_folder="txts", keep_pdfs=False, max_pending_writes=MAX_PENDING_WRITES):
+        """
+        Parameters:
+            text_folder (str): Folder the extracted .txt files are written to.
+            keep_pdfs (bool): Also save each PDF to the path the scraper asked for.
+            max_pending_writes (int): PDFs held in memory waiting to be saved.
+        """
+        self.text_folder = text_folder
+        self.keep_pdfs = keep_pdfs
+        os.makedirs(text_folder, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=1) if keep_pdfs else None
+        self._pending = threading.BoundedSemaphore(max_pending_writes)
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.pages = 0
+        self.bytes_downloaded = 0
+        self.pdfs_saved = 0
+        self.write_errors = 0
+        # (save_path, error) of every PDF whose text could not be extracted
+        self.extract_failures = []
+
+    def text_path_for(self, save_path):
+        """Return the .txt path for the PDF a scraper would have saved to save_path."""
+        stem = os.path.splitext(os.path.basename(save_path))[0]
+        return os.path.join(self.text_folder, f"{stem}.txt")
+
+    def fetch(self, url, save_path, headers=None, timeout=30, max_size=MAX_PDF_SIZE, wrap_chunks=None):
+        """
+        Download a PDF into memory, extract its text and optionally save it in the background.
+
+        Parameters:
+            url (str): URL of the PDF.
+            save_path (str): Where the PDF is saved when keep_pdfs is set; also names the .txt file.
+            headers (dict): Optional HTTP headers.
+            timeout (int): Connect/read timeout in seconds.
+            max_size (int): Maximum accepted size in bytes.
+            wrap_chunks (callable): Optional wrapper for the chunk iterator (e.g. a progress bar).
+
+        Returns:
+            int: The number of pages extracted, or None if extraction failed
+                (the PDF is then saved to save_path).
+
+        Raises:
+            InvalidPdfError: If the download is not a usable PDF.
+            requests.exceptions.RequestException: On HTTP or network errors.
+            OSError: If extraction failed and the PDF could not be saved either.
+        """
+        data = fetch_pdf_bytes(url, headers, timeout, max_size, wrap_chunks)
+        view = memoryview(data)
+
+        ok, detail = check_pdf_bytes(view)
+        if not ok:
+            raise InvalidPdfError(f"{url}: {detail}")
+
+        # Start saving the PDF before extracting, so the write overlaps with MuPDF
+        if self._executor is not None:
+            self._pending.acquire()
+            self._executor.submit(self._persist, view, save_path)
+
+        with self._lock:
+            self.bytes_downloaded += len(view)
+
+        text_path = self.text_path_for(save_path)
+        try:
+            pages = extract_bytes_to_file(view, text_path)
+        except Exception as e:
+            print(f"Text extraction failed for {save_path}: {e}")
+            if os.path.exists(text_path):
+                os.remove(text_path)
+            with self._lock:
+                self.extract_failures.append((save_path, str(e)))
+            # Keep the PDF for a later extraction pass; with keep_pdfs it is already being saved
+            if self._executor is None and not self._save(view, save_path):
+                raise OSError(f"Could not save {save_path} after failed extraction")
+            return None
+
+        with self._lock:
+            self.documents += 1
+            self.pages += pages
+        return pages
+
+    def _save(self, view, save_path):
+        # Same .part + rename scheme as stream_pdf_download, so no partial PDF is left behind
+        part_path = save_path + ".part"
+        try:
+            with open(part_path, 'wb') as f:
+                f.write(view)
+            os.replace(part_path, save_path)
+        except OSError as e:
+            print(f"Failed to save {save_path}: {e}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            with self._lock:
+                self.write_errors += 1
+            return False
+        with self._lock:
+            self.pdfs_saved += 1
+        return True
+
+    def _persist(self, view, save_path):
+        try:
+            self._save(view, save_path)
+        finally:
+            self._pending.release()
+
+    def stats(self):
+        """
+        Return counters for this session.
+
+        Returns:
+            dict: documents (extracted), pages, bytes_downloaded, pdfs_saved,
+                write_errors and extract_errors.
+        """
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "pages": self.pages,
+                "bytes_downloaded": self.bytes_downloaded,
+                "pdfs_saved": self.pdfs_saved,
+                "write_errors": self.write_errors,
+                "extract_errors": len(self.extract_failures),
+            }
+
+    def close(self):
+        """Wait for the background writes to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
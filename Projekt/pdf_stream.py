@@ -0,0 +1,115 @@
+import mmap
+import os
+from contextlib import contextmanager
+
+# Size of the write buffer used for extracted text (1 MiB)
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def open_text_writer(output_path, buffer_size=WRITE_BUFFER_SIZE):
+    """
+    Open a buffered UTF-8 text writer for extracted text.
+
+    Extractors write each page as soon as it is produced, so the buffer keeps
+    the number of write system calls low without holding the whole document.
+
+    Parameters:
+        output_path (str): Path of the .txt file to create.
+        buffer_size (int): Size of the write buffer in bytes.
+
+    Returns:
+        file: A text file object opened for writing.
+    """
+    return open(output_path, 'w', encoding='utf-8', buffering=buffer_size)
+
+
+@contextmanager
+def open_pdf_mmap(pdf_path):
+    """
+    Memory-map a PDF file read-only.
+
+    The operating system pages the file in on demand, so parsers that seek
+    around the file (xref tables, object streams) never copy it into memory.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+
+    Yields:
+        mmap.mmap: A read-only, file-like view of the PDF.
+    """
+    with open(pdf_path, 'rb') as pdf_file:
+        mapped = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def write_pages(pages, output_path, separator=""):
+    """
+    Write an iterable of page texts to a file one page at a time.
+
+    Parameters:
+        pages (iterable): Iterable yielding the text of each page.
+        output_path (str): Path of the .txt file to create.
+        separator (str): Text written between consecutive pages.
+
+    Returns:
+        int: The number of pages written.
+    """
+    page_count = 0
+    with open_text_writer(output_path) as text_file:
+        for page_text in pages:
+            if page_count and separator:
+                text_file.write(separator)
+            text_file.write(page_text)
+            page_count += 1
+    return page_count
+
+
+def range_part_path(output_path, first_page):
+    """Return the partial output file for the page range of a document starting at first_page."""
+    return f"{output_path}.p{first_page:05d}.part"
+
+
+def merge_range_parts(output_path, first_pages):
+    """
+    Concatenate the page-range outputs of a document into its final text file and remove them.
+
+    Parameters:
+        output_path (str): Path of the final .txt file.
+        first_pages (iterable): First page of every range, in page order.
+    """
+    part_paths = [range_part_path(output_path, first_page) for first_page in first_pages]
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as output_file:
+        for path in part_paths:
+            with open(path, "rb") as part_file:
+                while True:
+                    chunk = part_file.read(WRITE_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    output_file.write(chunk)
+    os.replace(tmp_path, output_path)
+    for path in part_paths:
+        os.remove(path)
+
+
+def remove_range_parts(output_path, first_pages):
+    """
+    Remove the page-range outputs of a document that could not be completed.
+
+    Parameters:
+        output_path (str): Path of the final .txt file.
+        first_pages (iterable): First page of every range.
+
+    Returns:
+        int: The number of partial files removed.
+    """
+    removed = 0
+    for first_page in first_pages:
+        path = range_part_path(output_path, first_page)
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+    return removed
@@ -1,8 +1,42 @@
 import os
-from pdf2image import convert_from_path
+from functools import partial
+from pdf2image import convert_from_path, pdfinfo_from_path
 import pytesseract
+import ocr_engine
+from extract_supervisor import run_isolated
+from job_scheduler import ScheduleReport, plan_jobs
+from ocr_cache import OcrCache
+from ocr_language import detect_document_language
+from ocr_preprocess import preprocess_page
+from pdf_stream import merge_range_parts, open_text_writer, range_part_path, remove_range_parts
+from pdf_validate import valid_pdfs
 
-def main():
+# Number of pages rasterized per pdftoppm call; bounds memory to a few page images
+PAGE_BATCH_SIZE = 4
+# Rasterization resolution (the pdf2image default); preprocessing never upsamples it
+RASTER_DPI = 200
+# Clean pages with ocr_preprocess before OCR. Off until bench_preprocess shows
+# that the OCR time saved outweighs the cost of preprocessing (about 0.7 s/page)
+PREPROCESS_PAGES = False
+
+# Per-document limits for the supervised OCR process
+OCR_TIMEOUT = 3600
+MAX_RSS_MB = 2048
+# Documents or page ranges OCRed in parallel; Tesseract itself uses more than one core
+OCR_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Page cache and detected languages of the current worker process
+_cache = None
+_languages = {}
+
+
+def configure_tesseract():
+    """
+    Point pytesseract at the Tesseract binary and return the Poppler path.
+
+    Returns:
+        str: The Poppler path from the environment, or None.
+    """
     # Set Tesseract path from environment variable or default to a common path
     tesseract_cmd = os.environ.get('TESSERACT_CMD')
     if tesseract_cmd:
@@ -14,7 +48,124 @@ def main():
             pytesseract.pytesseract.tesseract_cmd = default_tesseract_path
 
     # Set Poppler path from environment variable
-    poppler_path = os.environ.get('POPPLER_PATH')
+    return os.environ.get('POPPLER_PATH')
+
+
+def iter_page_images(pdf_path, poppler_path=None, batch_size=PAGE_BATCH_SIZE, first_page=1, last_page=None,
+                     dpi=RASTER_DPI):
+    """
+    Rasterize a PDF a few pages at a time instead of all pages at once.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        poppler_path (str): Optional path to the Poppler binaries.
+        batch_size (int): Number of pages converted per call.
+        first_page (int): First page to rasterize (1-based).
+        last_page (int): Last page to rasterize; None means the end of the document.
+        dpi (int): Rasterization resolution.
+
+    Yields:
+        PIL.Image.Image: One image per page, in page order.
+    """
+    page_count = pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+    if last_page is None or last_page > page_count:
+        last_page = page_count
+    for batch_first in range(first_page, last_page + 1, batch_size):
+        batch_last = min(batch_first + batch_size - 1, last_page)
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=batch_first, last_page=batch_last,
+                                   poppler_path=poppler_path)
+        for image in images:
+            yield image
+
+
+def ocr_pdf_to_file(pdf_path, text_output_path, poppler_path=None, cache=None, lang=None,
+                    first_page=1, last_page=None, preprocess=PREPROCESS_PAGES):
+    """
+    OCR a PDF and write the text of each page to a file as soon as it is recognized.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        text_output_path (str): Path of the .txt file to create.
+        poppler_path (str): Optional path to the Poppler binaries.
+        cache (OcrCache): Optional page cache; pages seen before skip Tesseract.
+        lang (str): Tesseract language model to use (e.g. 'hrv'); None uses Tesseract's default.
+        first_page (int): First page to OCR (1-based).
+        last_page (int): Last page to OCR; None means the end of the document.
+        preprocess (bool): Binarize, deskew and crop each page before OCR (see ocr_preprocess).
+
+    Returns:
+        int: The number of pages processed.
+    """
+    # In-process Tesseract engines (at most ocr_engine.MAX_ENGINES per worker) when tesserocr is installed, pytesseract otherwise
+    image_to_string = partial(ocr_engine.image_to_string, lang=lang)
+    if preprocess:
+        # Clean pages OCR faster and more accurately than raw colour scans; the
+        # cache is keyed by the raw page, so a hit skips the preprocessing too
+        ocr_page = lambda image: image_to_string(preprocess_page(image, RASTER_DPI))
+    else:
+        ocr_page = image_to_string
+    # tesserocr and pytesseract can read the same page differently; keep their results apart
+    config = f"lang={lang};preprocess={preprocess};backend={ocr_engine.backend(lang)}"
+    page_count = 0
+    with open_text_writer(text_output_path) as text_file:
+        pages = iter_page_images(pdf_path, poppler_path, first_page=first_page, last_page=last_page)
+        for i, image in enumerate(pages, start=first_page - 1):
+            if cache is not None:
+                text = cache.ocr(image, ocr_page, config=config)
+            else:
+                text = ocr_page(image)
+            text_file.write(f"--- Page {i + 1} ---\n{text}\n")
+            page_count += 1
+    return page_count
+
+
+def _worker_cache():
+    # One cache connection per worker process; SQLite connections cannot cross processes
+    global _cache
+    if _cache is None:
+        _cache = OcrCache()
+    return _cache
+
+
+def ocr_document(pdf_path, text_output_path, source=None, poppler_path=None, first_page=1, last_page=None):
+    """
+    Detect the language of a PDF and OCR it or one page range of it; run inside a supervised worker.
+
+    Returns:
+        dict: Detected language, pages processed, and the cache hits and misses for this job.
+    """
+    configure_tesseract()
+    cache = _worker_cache()
+    hits, misses = cache.hits, cache.misses
+
+    # Run full-resolution OCR with only the detected language model; ranges of
+    # the same document handled by this worker reuse the detected language
+    lang = _languages.get(pdf_path)
+    if lang is None:
+        lang = _languages[pdf_path] = detect_document_language(pdf_path, source, poppler_path)
+
+    # Rasterize, OCR and save the text page by page
+    pages = ocr_pdf_to_file(pdf_path, text_output_path, poppler_path, cache, lang, first_page, last_page)
+    cache.flush()
+    return {"lang": lang, "pages": pages,
+            "cache_hits": cache.hits - hits, "cache_misses": cache.misses - misses}
+
+
+def main(source=None, workers=OCR_WORKERS):
+    """
+    OCR every PDF in the input folder.
+
+    Long scans are split into page ranges and the longest jobs start first,
+    so parallel workers finish together. When a range of a document fails,
+    the finished ranges of that document are removed and the document is
+    reported so it can be rerun whole.
+
+    Parameters:
+        source (str): Source the PDFs were harvested from (e.g. 'hrcak', 'arxiv');
+            selects the default language when detection is inconclusive.
+        workers (int): Number of documents or page ranges OCRed in parallel.
+    """
+    poppler_path = configure_tesseract()
 
     # Define the input and output directories
     input_folder = 'pdfs'
@@ -24,29 +175,70 @@ def main():
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
-    # Iterate over all PDF files in the input folder
-    for pdf_file in os.listdir(input_folder):
-        if pdf_file.endswith('.pdf'):
-            pdf_path = os.path.join(input_folder, pdf_file)
-            text_output_path = os.path.join(output_folder, f"{os.path.splitext(pdf_file)[0]}.txt")
+    # Estimate every PDF that passes the integrity check; bad ones are quarantined
+    pdf_paths = [os.path.join(input_folder, pdf_file)
+                 for pdf_file in valid_pdfs(input_folder) if pdf_file.endswith('.pdf')]
+    plan = plan_jobs(pdf_paths, "tesseract", ocr=True, split=True, workers=workers)
 
-            # Convert PDF to a list of images
-            images = convert_from_path(pdf_path, poppler_path=poppler_path)
+    jobs = {}
+    document_ranges = {}
+    for planned in plan:
+        output_path = os.path.join(output_folder, f"{os.path.splitext(os.path.basename(planned['pdf_path']))[0]}.txt")
+        if planned["last_page"] is not None:
+            # Each range writes its own part; the parts are merged when the document is done
+            output_path = range_part_path(output_path, planned["first_page"])
+            document_ranges.setdefault(planned["pdf_path"], []).append(planned["first_page"])
+        job = (planned["pdf_path"], output_path, source, poppler_path, planned["first_page"], planned["last_page"])
+        jobs[job] = planned
 
-            # Extract text from each image using pytesseract
-            extracted_text = ""
-            for i, image in enumerate(images):
-                text = pytesseract.image_to_string(image)
-                extracted_text += f"--- Page {i + 1} ---\n{text}\n"
+    # Each job is OCRed in a supervised subprocess; one that hangs or
+    # exhausts memory is killed and logged instead of stopping the run
+    ranges_left = {pdf_path: set(first_pages) for pdf_path, first_pages in document_ranges.items()}
+    hits = misses = 0
+    failed_documents = set()
+    elapsed = {}
+    report = ScheduleReport("tesseract")
+    results = run_isolated(ocr_document, list(jobs), timeout=OCR_TIMEOUT, max_rss_mb=MAX_RSS_MB,
+                           workers=workers, label="tesseract", elapsed=elapsed)
+    for job, ok, result in results:
+        pdf_path, text_output_path, first_page = job[0], job[1], job[4]
+        pdf_file = os.path.basename(pdf_path)
+        report.record(jobs[job], ok, elapsed.get(job))
+        if not ok:
+            failed_documents.add(pdf_path)
+            print(f"Error processing {pdf_file}: {result}")
+            continue
 
-            # Save the extracted text to a text file
-            with open(text_output_path, 'w', encoding='utf-8') as text_file:
-                text_file.write(extracted_text)
+        hits += result["cache_hits"]
+        misses += result["cache_misses"]
+        if pdf_path not in ranges_left:
+            print(f"Extracted text from {pdf_file} ({result['lang']}) and saved to {text_output_path}")
+            continue
 
-            print(f"Extracted text from {pdf_file} and saved to {text_output_path}")
+        ranges_left[pdf_path].remove(first_page)
+        if not ranges_left[pdf_path] and pdf_path not in failed_documents:
+            final_path = os.path.join(output_folder, f"{os.path.splitext(pdf_file)[0]}.txt")
+            merge_range_parts(final_path, sorted(document_ranges[pdf_path]))
+            print(f"Extracted text from {pdf_file} ({result['lang']}) and saved to {final_path}")
 
-    print("Text extraction completed.")
+    report.finish()
 
+    # A document with a failed range is never merged; drop the ranges that did finish
+    for pdf_path in sorted(failed_documents & set(document_ranges)):
+        pdf_file = os.path.basename(pdf_path)
+        final_path = os.path.join(output_folder, f"{os.path.splitext(pdf_file)[0]}.txt")
+        removed = remove_range_parts(final_path, document_ranges[pdf_path])
+        print(f"Incomplete: {pdf_file}; removed {removed} finished page ranges, rerun it to OCR it again")
+
+    # Hits and misses come from the workers; the entry count from the shared cache file
+    with OcrCache() as cache:
+        entries = cache.stats()['entries']
+    lookups = hits + misses
+    hit_rate = hits / lookups if lookups else 0.0
+    print(f"OCR cache: {hits} hits, {misses} misses "
+          f"({hit_rate:.1%} hit rate), {entries} cached pages")
+
+    print("Text extraction completed.")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,6 @@
-import os
 import fitz  # PyMuPDF
+from job_scheduler import run_extractor
+from pdf_stream import write_pages
 
 # Define the folder containing the PDF files
 pdf_folder_path = 'pdfs'
@@ -7,45 +8,70 @@ pdf_folder_path = 'pdfs'
 # Define the folder to save the extracted text files
 output_folder_path = 'txts'
 
-# Create the output folder if it doesn't exist
-if not os.path.exists(output_folder_path):
-    os.makedirs(output_folder_path)
+
+def iter_pdf_pages(pdf_path):
+    """
+    Yield the text of each page of a PDF, one page at a time.
+
+    MuPDF reads the file on demand, so only the current page is kept in memory.
+    """
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            yield page.get_text()
+
+
+def iter_stream_pages(data):
+    """
+    Yield the text of each page of a PDF held in memory.
+
+    MuPDF reads straight from the buffer, so a downloaded PDF is extracted
+    without being written to disk and read back.
+
+    Parameters:
+        data (bytes-like): The complete PDF, e.g. a memoryview over the downloaded bytes.
+    """
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for page in doc:
+            yield page.get_text()
 
 
 # Function to extract text from a PDF file
 def extract_text_from_pdf(pdf_path):
-    text = ""
+    text = []
     try:
-        # Open the PDF file
-        doc = fitz.open(pdf_path)
-
-        # Iterate through each page
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text += page.get_text()
-
+        text.extend(iter_pdf_pages(pdf_path))
     except Exception as e:
         print(f"Error processing {pdf_path}: {e}")
 
-    return text
+    return "".join(text)
+
+
+def extract_text_to_file(pdf_path, output_path):
+    """
+    Stream the text of a PDF into a .txt file page by page.
+
+    Returns:
+        int: The number of pages written.
+    """
+    return write_pages(iter_pdf_pages(pdf_path), output_path)
 
 
-# Iterate through all PDF files in the folder
-for filename in os.listdir(pdf_folder_path):
-    if filename.endswith('.pdf'):
-        pdf_path = os.path.join(pdf_folder_path, filename)
-        print(f"Extracting text from: {filename}")
+def extract_bytes_to_file(data, output_path):
+    """
+    Stream the text of a PDF held in memory into a .txt file page by page.
 
-        # Extract text from the PDF
-        extracted_text = extract_text_from_pdf(pdf_path)
+    Returns:
+        int: The number of pages written.
+    """
+    return write_pages(iter_stream_pages(data), output_path)
 
-        # Save the extracted text to a .txt file in the new folder
-        output_filename = filename.replace('.pdf', '.txt')
-        output_path = os.path.join(output_folder_path, output_filename)
 
-        with open(output_path, 'w', encoding='utf-8') as output_file:
-            output_file.write(extracted_text)
+def main():
+    # Each document runs in a supervised subprocess, so a PDF that hangs MuPDF
+    # or exhausts memory is killed and logged instead of stopping the batch
+    run_extractor(extract_text_to_file, "pymupdf", pdf_folder_path, output_folder_path)
 
-        print(f"Text saved to: {output_path}\n")
+    print("Text extraction completed.")
 
-print("Text extraction completed.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+import os
+import re
+import shutil
+import requests
+import fitz  # PyMuPDF
+
+# Downloads larger than this are aborted (200 MiB)
+MAX_PDF_SIZE = 200 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# The PDF spec allows the %PDF- header anywhere in the first 1024 bytes
+HEADER_WINDOW = 1024
+# startxref and %%EOF are expected near the end of the file
+TRAILER_WINDOW = 2048
+
+QUARANTINE_FOLDER = "quarantine"
+
+STARTXREF_RE = re.compile(rb"startxref\s+(\d+)\s+%%EOF")
+
+
+class InvalidPdfError(Exception):
+    """Raised when a download or file is not a usable PDF."""
+
+
+def iter_pdf_download(url, headers=None, timeout=30, max_size=MAX_PDF_SIZE, wrap_chunks=None):
+    """
+    Stream the body of a PDF download, checking the header and enforcing a size cap.
+
+    HTML error pages and other non-PDF responses are rejected as soon as the
+    first bytes arrive, and oversized or truncated transfers are aborted.
+
+    Parameters:
+        url (str): URL of the PDF.
+        headers (dict): Optional HTTP headers.
+        timeout (int): Connect/read timeout in seconds.
+        max_size (int): Maximum accepted size in bytes.
+        wrap_chunks (callable): Optional wrapper for the chunk iterator (e.g. a progress bar).
+
+    Yields:
+        bytes: The body in chunks.
+
+    Raises:
+        InvalidPdfError: If the response is not a PDF, too large or truncated.
+        requests.exceptions.RequestException: On HTTP or network errors.
+    """
+    with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+
+        content_length = response.headers.get('Content-Length')
+        expected_size = int(content_length) if content_length and content_length.isdigit() else None
+        if expected_size is not None and expected_size > max_size:
+            raise InvalidPdfError(f"{url} is {expected_size} bytes, over the {max_size} byte limit")
+
+        chunks = response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+        if wrap_chunks is not None:
+            chunks = wrap_chunks(chunks)
+
+        # Buffer just enough of the start of the body to check the header
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= HEADER_WINDOW:
+                break
+        if b"%PDF-" not in head[:HEADER_WINDOW]:
+            content_type = response.headers.get('Content-Type', 'unknown')
+            raise InvalidPdfError(f"{url} is not a PDF (Content-Type: {content_type})")
+
+        received = 0
+        for chunk in _prepend(head, chunks):
+            if not chunk:
+                continue
+            received += len(chunk)
+            if received > max_size:
+                raise InvalidPdfError(f"{url} exceeds the {max_size} byte limit")
+            yield chunk
+
+        if expected_size is not None and received < expected_size:
+            raise InvalidPdfError(f"{url} was truncated ({received} of {expected_size} bytes)")
+
+
+def stream_pdf_download(url, save_path, headers=None, timeout=30, max_size=MAX_PDF_SIZE,
+                        wrap_chunks=None):
+    """
+    Download a PDF, checking the header on the first chunk and enforcing a size cap.
+
+    The file is written to a temporary .part file and only renamed to
+    save_path once it is complete, so no partial file is left behind.
+
+    Parameters:
+        url (str): URL of the PDF.
+        save_path (str): Local path to save the PDF to.
+        headers (dict): Optional HTTP headers.
+        timeout (int): Connect/read timeout in seconds.
+        max_size (int): Maximum accepted size in bytes.
+        wrap_chunks (callable): Optional wrapper for the chunk iterator (e.g. a progress bar).
+
+    Returns:
+        int: The number of bytes written.
+
+    Raises:
+        InvalidPdfError: If the response is not a PDF, too large or truncated.
+        requests.exceptions.RequestException: On HTTP or network errors.
+    """
+    part_path = save_path + ".part"
+    written = 0
+    try:
+        with open(part_path, 'wb') as f:
+            for chunk in iter_pdf_download(url, headers, timeout, max_size, wrap_chunks):
+                written += len(chunk)
+                f.write(chunk)
+        os.replace(part_path, save_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    return written
+
+
+def fetch_pdf_bytes(url, headers=None, timeout=30, max_size=MAX_PDF_SIZE, wrap_chunks=None):
+    """
+    Download a PDF into memory with the same checks as stream_pdf_download.
+
+    Returns:
+        bytearray: The complete PDF.
+
+    Raises:
+        InvalidPdfError: If the response is not a PDF, too large or truncated.
+        requests.exceptions.RequestException: On HTTP or network errors.
+    """
+    data = bytearray()
+    for chunk in iter_pdf_download(url, headers, timeout, max_size, wrap_chunks):
+        data += chunk
+    return data
+
+
+def _prepend(first, chunks):
+    yield first
+    yield from chunks
+
+
+def _check_header_and_trailer(head, tail, size):
+    # Returns the reason the file is bad, or None if header and trailer look sound
+    if b"%PDF-" not in head:
+        return "missing %PDF header"
+
+    matches = list(STARTXREF_RE.finditer(tail))
+    if not matches:
+        return "missing startxref/%%EOF trailer (truncated?)"
+
+    # Slightly wrong offsets are common and repaired by every reader,
+    # but one past the end of the file means data is missing
+    xref_offset = int(matches[-1].group(1))
+    if xref_offset >= size:
+        return f"startxref offset {xref_offset} beyond end of file"
+    return None
+
+
+def _check_document(doc):
+    if doc.needs_pass:
+        return False, "encrypted"
+    if doc.page_count < 1:
+        return False, "no pages"
+    return True, doc.page_count
+
+
+def check_pdf_structure(pdf_path):
+    """
+    Run a fast structural check of a PDF before extraction.
+
+    Checks the header, the trailer (a startxref offset inside the file
+    followed by %%EOF) and that the document opens with at least one page.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+
+    Returns:
+        tuple: (True, page_count) if the file looks sound, otherwise (False, reason).
+    """
+    try:
+        size = os.path.getsize(pdf_path)
+        if size == 0:
+            return False, "empty file"
+
+        with open(pdf_path, 'rb') as f:
+            head = f.read(HEADER_WINDOW)
+            f.seek(max(0, size - TRAILER_WINDOW))
+            tail = f.read()
+        reason = _check_header_and_trailer(head, tail, size)
+        if reason:
+            return False, reason
+
+        with fitz.open(pdf_path) as doc:
+            return _check_document(doc)
+    except Exception as e:
+        return False, f"unreadable: {e}"
+
+
+def check_pdf_bytes(data):
+    """
+    Run the check_pdf_structure checks on a PDF held in memory.
+
+    Parameters:
+        data (bytes-like): The complete PDF.
+
+    Returns:
+        tuple: (True, page_count) if the data looks sound, otherwise (False, reason).
+    """
+    try:
+        view = memoryview(data)
+        size = len(view)
+        if size == 0:
+            return False, "empty file"
+
+        reason = _check_header_and_trailer(bytes(view[:HEADER_WINDOW]),
+                                           bytes(view[max(0, size - TRAILER_WINDOW):]), size)
+        if reason:
+            return False, reason
+
+        with fitz.open(stream=view, filetype="pdf") as doc:
+            return _check_document(doc)
+    except Exception as e:
+        return False, f"unreadable: {e}"
+
+
+def quarantine_pdf(pdf_path, reason, quarantine_folder=QUARANTINE_FOLDER):
+    """
+    Move a bad PDF out of the input folder and record why.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        reason (str): Why the file was rejected.
+        quarantine_folder (str): Folder to move the file to.
+
+    Returns:
+        str: The new path of the file.
+    """
+    os.makedirs(quarantine_folder, exist_ok=True)
+    target = os.path.join(quarantine_folder, os.path.basename(pdf_path))
+    shutil.move(pdf_path, target)
+    with open(target + ".reason.txt", 'w', encoding='utf-8') as reason_file:
+        reason_file.write(f"{reason}\n")
+    print(f"Quarantined {pdf_path}: {reason}")
+    return target
+
+
+def valid_pdfs(input_folder, quarantine_folder=QUARANTINE_FOLDER):
+    """
+    List the PDFs in a folder that pass check_pdf_structure, quarantining the rest.
+
+    Parameters:
+        input_folder (str): Folder containing the PDFs.
+        quarantine_folder (str): Folder that receives rejected files.
+
+    Returns:
+        list: File names (not paths) of the valid PDFs, in os.listdir order.
+    """
+    valid = []
+    for filename in os.listdir(input_folder):
+        if not filename.lower().endswith('.pdf'):
+            continue
+        pdf_path = os.path.join(input_folder, filename)
+        ok, detail = check_pdf_structure(pdf_path)
+        if ok:
+            valid.append(filename)
+        else:
+            quarantine_pdf(pdf_path, detail, quarantine_folder)
+    return valid
@@ -0,0 +1,209 @@
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Set by enable(); inherited by the extractor subprocesses so they profile each document
+PROFILE_DIR_ENV = "PIPELINE_PROFILE_DIR"
+PROFILE_TOP_ENV = "PIPELINE_PROFILE_TOP"
+
+# Number of functions listed in each report
+TOP_N = 30
+# Seconds between stack samples for the flamegraph data
+SAMPLE_INTERVAL = 0.005
+
+# Profilers cannot be nested in one thread; inner profile() calls are no-ops
+_active = threading.local()
+# Numbers the profiles of this process, so repeated names never overwrite each other
+_sequence = itertools.count(1)
+
+
+def enable(output_dir="profiles", top_n=TOP_N):
+    """
+    Turn on profiling for this process and every process it starts.
+
+    Each run writes to its own timestamped subfolder, so earlier profiles are kept.
+
+    Parameters:
+        output_dir (str): Folder the profiles are written to.
+        top_n (int): Number of functions listed in each report.
+
+    Returns:
+        str: The folder of this run.
+    """
+    run_dir = os.path.abspath(os.path.join(output_dir, time.strftime("%Y%m%d-%H%M%S")))
+    os.makedirs(run_dir, exist_ok=True)
+    os.environ[PROFILE_DIR_ENV] = run_dir
+    os.environ[PROFILE_TOP_ENV] = str(top_n)
+    print(f"Profiling enabled, writing to {run_dir}")
+    return run_dir
+
+
+def profile_dir():
+    """Return the profile folder, or None if profiling is off."""
+    return os.environ.get(PROFILE_DIR_ENV)
+
+
+def safe_name(name):
+    """Turn a stage or document name into a file name."""
+    return re.sub(r"[^\w.-]+", "_", name).strip("_")[:120] or "unnamed"
+
+
+def unique_name(name):
+    """
+    Add the time, process ID and a per-process sequence number to a profile name.
+
+    The same document is profiled again in later runs of a session, and a
+    split document once per page range, so the name alone is not unique.
+    """
+    return f"{safe_name(name)}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence)}"
+
+
+class StackSampler:
+    """
+    Sample the call stack of one thread at a fixed interval.
+
+    The samples are aggregated in the collapsed-stack format read by
+    flamegraph.pl, speedscope and inferno: one line per distinct stack,
+    frames joined by ';' from the root, followed by the sample count.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as collapsed_file:
+            for stack, count in self.stacks.most_common():
+                collapsed_file.write(f"{stack} {count}\n")
+
+
+class Profile:
+    """
+    cProfile plus a stack sampler around one stage or document.
+
+    On stop, three files are written to the output folder, <name> being
+    the stage or document name with a unique suffix (see unique_name):
+        <name>.prof       pstats data (snakeviz, pstats.Stats)
+        <name>.collapsed  collapsed stacks for a flamegraph
+        <name>.top.txt    the top-N functions by cumulative and by own time
+    """
+
+    def __init__(self, name, output_dir, top_n=TOP_N, interval=SAMPLE_INTERVAL):
+        """
+        Parameters:
+            name (str): Stage or document name; used for the file names.
+            output_dir (str): Folder the profile files are written to.
+            top_n (int): Number of functions listed in the report.
+            interval (float): Seconds between stack samples.
+        """
+        self.name = name
+        self.base_path = os.path.join(output_dir, unique_name(name))
+        self.top_n = top_n
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.started = None
+        self.elapsed = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.elapsed = time.perf_counter() - self.started
+
+        self.profiler.dump_stats(self.base_path + ".prof")
+        self.sampler.write_collapsed(self.base_path + ".collapsed")
+        with open(self.base_path + ".top.txt", "w", encoding="utf-8") as report_file:
+            report_file.write(self.report())
+
+    def report(self):
+        """Return the top-N report as text."""
+        out = io.StringIO()
+        out.write(f"{self.name}: {self.elapsed:.2f} s wall time, "
+                  f"{sum(self.sampler.stacks.values())} stack samples\n\n")
+        stats = pstats.Stats(self.profiler, stream=out).strip_dirs()
+        out.write(f"Top {self.top_n} by cumulative time\n")
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        out.write(f"Top {self.top_n} by own time\n")
+        stats.sort_stats("tottime").print_stats(self.top_n)
+        return out.getvalue()
+
+
+@contextmanager
+def profile(name):
+    """
+    Profile the enclosed block if profiling is enabled, otherwise do nothing.
+
+    Nested calls in the same thread are not profiled separately; their time
+    shows up in the enclosing profile.
+
+    Example:
+        with pipeline_profile.profile("stage-extract"):
+            pdf_tessar.main()
+    """
+    output_dir = profile_dir()
+    if output_dir is None or getattr(_active, "profile", None) is not None:
+        yield
+        return
+
+    top_n = int(os.environ.get(PROFILE_TOP_ENV, TOP_N))
+    current = Profile(name, output_dir, top_n)
+    _active.profile = current
+    current.start()
+    try:
+        yield
+    finally:
+        current.stop()
+        _active.profile = None
+        print(f"Profile for {name} ({current.elapsed:.2f} s) written to {current.base_path}.*")
+
+
+def _reset_after_fork():
+    # A forked extractor worker inherits the profiler of the thread that started
+    # it; turn that off so the worker can profile its own documents
+    current = getattr(_active, "profile", None)
+    if current is not None:
+        current.profiler.disable()
+        _active.profile = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def document_name(label, job):
+    """Name a per-document profile after the extractor and the file it processes."""
+    document = os.path.splitext(os.path.basename(str(job[0])))[0] if job else "job"
+    return f"doc-{label}-{document}"
@@ -1,33 +1,62 @@
-import os
+import gc
 from PyPDF2 import PdfReader
+from job_scheduler import run_extractor
+from pdf_stream import open_pdf_mmap, write_pages
 
 # Define input and output directories
 input_folder = 'pdfs'
 output_folder = 'pypdf2_text'
 
-# Create the output folder if it doesn't exist
-os.makedirs(output_folder, exist_ok=True)
+# Pages extracted with one PdfReader before it is reopened to release its objects
+PAGES_PER_READER = 50
 
-# Iterate through all PDF files in the input folder
-for filename in os.listdir(input_folder):
-    if filename.lower().endswith('.pdf'):
-        pdf_path = os.path.join(input_folder, filename)
-        output_path = os.path.join(output_folder, f'{os.path.splitext(filename)[0]}.txt')
 
-        try:
-            # Open and read the PDF
-            with open(pdf_path, 'rb') as pdf_file:
-                reader = PdfReader(pdf_file)
-                extracted_text = ''
+def iter_pdf_pages(pdf_file, pages_per_reader=PAGES_PER_READER):
+    """
+    Yield the text of each page of an open PDF, one page at a time.
 
-                # Extract text from each page
-                for page in reader.pages:
-                    extracted_text += page.extract_text() or ''
+    A PdfReader keeps every object it resolves (fonts, resources, content
+    streams) until the reader is dropped, so a new reader is opened for
+    every batch of pages. Memory still grows slowly with the page count:
+    each reader flattens the whole page tree (a few KB per page) when the
+    first page is read.
 
-            # Write the extracted text to a .txt file
-            with open(output_path, 'w', encoding='utf-8') as text_file:
-                text_file.write(extracted_text)
+    Parameters:
+        pdf_file: A seekable binary file object (e.g. a memory-mapped PDF).
+        pages_per_reader (int): Pages extracted before the reader is reopened.
+    """
+    reader = PdfReader(pdf_file)
+    page_count = len(reader.pages)
+    for page_number in range(page_count):
+        if page_number and page_number % pages_per_reader == 0:
+            # Pages and the reader reference each other; collect the cycle
+            # before the next reader is opened instead of whenever gc runs
+            reader = None
+            gc.collect()
+            reader = PdfReader(pdf_file)
+        yield reader.pages[page_number].extract_text() or ''
 
-            print(f'Successfully processed: {filename}')
-        except Exception as e:
-            print(f'Error processing {filename}: {e}')
+
+def extract_text_to_file(pdf_path, output_path):
+    """
+    Stream the text of a PDF into a .txt file page by page.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        output_path (str): Path of the .txt file to create.
+
+    Returns:
+        int: The number of pages written.
+    """
+    # Memory-map the PDF so the reader never loads the whole file
+    with open_pdf_mmap(pdf_path) as pdf_file:
+        return write_pages(iter_pdf_pages(pdf_file), output_path)
+
+
+def main():
+    # Each document runs in a supervised subprocess; one that loops in the
+    # parser or exhausts memory is killed and logged, and the batch continues
+    run_extractor(extract_text_to_file, "pypdf2", input_folder, output_folder)
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,10 @@ import os
 import re
 import requests
 from tqdm import tqdm
-from bs4 import BeautifulSoup
 from scholarly import scholarly
-from urllib.parse import urljoin
+from html_extract import parse_page, response_encoding
+from crawl_frontier import CrawlFrontier
+from pdf_validate import stream_pdf_download
 
 # Define a constant header to mimic a real browser in HTTP requests.
 HEADERS = {
@@ -60,69 +61,48 @@ def find_pdf_links(article_url):
 
     Returns:
         List of PDF URLs found on the page.
+
+    Raises:
+        requests.exceptions.RequestException: If the page cannot be fetched, so a
+            temporary error is not mistaken for a page without PDFs.
     """
-    try:
-        response = requests.get(article_url, headers=HEADERS, timeout=10)
-        response.raise_for_status()  # Raise an error for bad status codes
-        soup = BeautifulSoup(response.text, 'html.parser')
-        pdf_links = []
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.lower().endswith('.pdf'):
-                # Convert relative URL to absolute URL if needed.
-                if not href.startswith('http'):
-                    href = urljoin(article_url, href)
-                pdf_links.append(href)
-        return pdf_links
-    except Exception as e:
-        print(f"Error scanning {article_url}: {e}")
-        return []
+    response = requests.get(article_url, headers=HEADERS, timeout=10)
+    response.raise_for_status()  # Raise an error for bad status codes
+    # Relative URLs are resolved against the article URL by the parser.
+    return parse_page(response.content, base_url=article_url, encoding=response_encoding(response))['pdf_links']
 
 
-def download_pdf(pdf_url, filename):
+def download_pdf(pdf_url, filename, handoff=None):
     """
     Download the PDF from the given URL and save it to the specified filename.
 
-    This function uses a progress bar to show download progress and verifies
-    that the downloaded file is a valid PDF (by checking its header).
+    This function uses a progress bar to show download progress. The PDF
+    header is checked on the first chunk, so HTML pages served in place of
+    the PDF are rejected before anything is written.
 
     Parameters:
         pdf_url (str): The direct URL to the PDF.
         filename (str): The local filename to save the PDF.
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
+
+    Returns:
+        bool: True if a valid PDF was saved.
     """
     try:
-        response = requests.get(pdf_url, headers=HEADERS, stream=True, timeout=10)
-        response.raise_for_status()
-
-        # Verify the response's Content-Type is that of a PDF.
-        content_type = response.headers.get('Content-Type', '').lower()
-        if 'application/pdf' not in content_type:
-            print(f"Invalid content type ({content_type}) for URL: {pdf_url}")
-            return
-
         # Write the content to the file in chunks, with a progress bar.
-        with open(filename, 'wb') as f:
-            for chunk in tqdm(response.iter_content(chunk_size=1024),
-                              desc=f"Downloading {os.path.basename(filename)}"):
-                if chunk:
-                    f.write(chunk)
-
-        # Open the saved file and check if it starts with '%PDF'
-        with open(filename, 'rb') as f:
-            if f.read(4) != b'%PDF':
-                print(f"Downloaded file is not a valid PDF: {filename}")
-                os.remove(filename)
-                return
-
+        progress = lambda chunks: tqdm(chunks, desc=f"Downloading {os.path.basename(filename)}")
+        fetch = handoff.fetch if handoff is not None else stream_pdf_download
+        fetch(pdf_url, filename, headers=HEADERS, timeout=10, wrap_chunks=progress)
         print(f"Successfully saved: {filename}")
+        return True
 
     except Exception as e:
         print(f"Download failed for {pdf_url}: {e}")
-        if os.path.exists(filename):
-            os.remove(filename)
+        return False
 
 
-def main():
+def main(handoff=None):
     """
     Main function to search for PDFs based on user-specified keywords.
 
@@ -130,6 +110,10 @@ def main():
       1. Check if a direct PDF link is available in the metadata.
       2. If not, load the article page and search its <a href> tags for a PDF link.
       3. Download the PDF to a local folder named 'pdfs'.
+
+    Parameters:
+        handoff (PdfHandoff): Optional in-memory handoff; the text is extracted
+            without re-reading the PDF from disk.
     """
     # Create the output directory if it doesn't exist.
     output_dir = 'pdfs'
@@ -152,51 +136,90 @@ def main():
         print("Invalid number of pages. Using default (1).")
         num_pages = 1
 
-    # Process each keyword.
+    # Process each keyword, remembering finished pages and publications so an
+    # interrupted run resumes where it stopped.
     for keyword in keywords:
         print(f"\nSearching for PDF results related to: {keyword}")
-        for page in range(1, num_pages + 1):
-            print(f"\n--- Page {page} ---")
-            results = search_articles(keyword, page)
-            if not results:
-                print("No results found.")
-                break
-
-            for pub in results:
-                bib = pub.get('bib', {})
-                pdf_url = None
-
-                # Attempt to get a direct PDF URL from common metadata fields.
-                for key in ['pub_url', 'url', 'eprint']:
-                    candidate = pub.get(key) or bib.get(key)
-                    if candidate and candidate.lower().endswith('.pdf'):
-                        pdf_url = candidate
-                        break
-
-                # If no direct PDF URL is found, scan the article page for PDF links.
-                if not pdf_url:
-                    article_url = pub.get('pub_url') or bib.get('url')
-                    if article_url:
-                        links = find_pdf_links(article_url)
-                        if links:
-                            pdf_url = links[0]  # Use the first PDF link found.
-                            print(f"Found PDF via scanning: {pdf_url}")
-                        else:
-                            print("No PDF links found on the page.")
-                            continue
-                    else:
-                        print("No valid article URL available; skipping result.")
+        with CrawlFrontier("scholar", keyword) as frontier:
+            for page in range(1, num_pages + 1):
+                if frontier.is_page_done(page):
+                    print(f"\n--- Page {page} already processed, skipping ---")
+                    continue
+
+                print(f"\n--- Page {page} ---")
+                results = search_articles(keyword, page)
+                if not results:
+                    print("No results found.")
+                    break
+
+                page_failed = False
+                for pub in results:
+                    bib = pub.get('bib', {})
+                    pub_key = pub.get('pub_url') or bib.get('url') or bib.get('title', 'untitled')
+                    if not frontier.should_visit(pub_key):
+                        print(f"Skipping already processed result: {pub_key}")
                         continue
 
-                # Prepare a filename using the publication's title.
-                title = sanitize_filename(bib.get('title', 'untitled'))
-                filename = os.path.join(output_dir, f"{title}.pdf")
-                if os.path.exists(filename):
-                    print(f"Skipping existing file: {filename}")
-                    continue
+                    outcome = process_publication(pub, output_dir, handoff)
+                    frontier.record(pub_key, outcome)
+                    page_failed = page_failed or outcome == "failed"
+
+                # Pages with failed downloads are searched again on the next run
+                if not page_failed:
+                    frontier.mark_page_done(page)
+
+
+def process_publication(pub, output_dir, handoff=None):
+    """
+    Find and download the PDF for a single publication record.
+
+    Parameters:
+        pub (dict): A publication record returned by scholarly.
+        output_dir (str): Directory to save the PDF in.
+        handoff (PdfHandoff): Optional in-memory handoff passed to download_pdf.
+
+    Returns:
+        str: The outcome - 'downloaded', 'skipped', 'no_pdf' or 'failed'.
+    """
+    bib = pub.get('bib', {})
+    pdf_url = None
+
+    # Attempt to get a direct PDF URL from common metadata fields.
+    for key in ['pub_url', 'url', 'eprint']:
+        candidate = pub.get(key) or bib.get(key)
+        if candidate and candidate.lower().endswith('.pdf'):
+            pdf_url = candidate
+            break
 
-                print(f"Downloading PDF from: {pdf_url}")
-                download_pdf(pdf_url, filename)
+    # If no direct PDF URL is found, scan the article page for PDF links.
+    if not pdf_url:
+        article_url = pub.get('pub_url') or bib.get('url')
+        if article_url:
+            try:
+                links = find_pdf_links(article_url)
+            except requests.exceptions.RequestException as e:
+                # Not a final outcome: the article is retried on the next run
+                print(f"Error scanning {article_url}: {e}")
+                return "failed"
+            if links:
+                pdf_url = links[0]  # Use the first PDF link found.
+                print(f"Found PDF via scanning: {pdf_url}")
+            else:
+                print("No PDF links found on the page.")
+                return "no_pdf"
+        else:
+            print("No valid article URL available; skipping result.")
+            return "no_pdf"
+
+    # Prepare a filename using the publication's title.
+    title = sanitize_filename(bib.get('title', 'untitled'))
+    filename = os.path.join(output_dir, f"{title}.pdf")
+    if os.path.exists(filename) or (handoff is not None and os.path.exists(handoff.text_path_for(filename))):
+        print(f"Skipping existing file: {filename}")
+        return "skipped"
+
+    print(f"Downloading PDF from: {pdf_url}")
+    return "downloaded" if download_pdf(pdf_url, filename, handoff) else "failed"
 
 
 if __name__ == "__main__":
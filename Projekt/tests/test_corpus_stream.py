@@ -0,0 +1,24 @@
+import json
+
+from corpus_stream import JsonCorpus, preprocess_batch
+
+
+def test_preprocess_batch_filters_per_paragraph():
+    batch = ["Ovo je PRVI odlomak 2024.", "", "a bb " + "x" * 16, "ćevapi"]
+    assert preprocess_batch(batch, min_len=2, max_len=15) == [
+        ["ovo", "je", "prvi", "odlomak"], [], ["bb"], ["ćevapi"]]
+
+
+def test_corpus_cache(tmp_path):
+    folder = tmp_path / "txts"
+    folder.mkdir()
+    (folder / "a.json").write_text(json.dumps({"paragraphs": ["Jedan dva", "", "Tri"]}), encoding="utf-8")
+    (folder / "b.json").write_text('{"paragraphs": ["Četiri", ', encoding="utf-8")
+    cache_path = str(tmp_path / "cache" / "tokens.txt")
+
+    corpus = JsonCorpus(str(folder), cache_path=cache_path, batch_size=2)
+    expected = [["jedan", "dva"], ["tri"], ["četiri"]]
+    assert list(corpus) == expected
+    # The second pass reads the token cache
+    assert list(corpus) == expected
+    assert corpus._cache_is_fresh(corpus.fingerprint())
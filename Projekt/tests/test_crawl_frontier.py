@@ -0,0 +1,92 @@
+import os
+
+import pytest
+import requests
+
+from crawl_frontier import BloomFilter, CrawlFrontier
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    urls = [f"https://example.org/article/{i}" for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+
+    restored = BloomFilter(capacity=1000, bits=bytes(bloom.bits))
+    assert all(url in restored for url in urls)
+
+
+def test_resume_after_checkpoint(tmp_path):
+    path = os.path.join(tmp_path, "frontier.sqlite")
+    with CrawlFrontier("arxiv", "graphs", path=path) as frontier:
+        frontier.record("https://a/1", "downloaded")
+        frontier.record("https://a/2", "failed")
+        frontier.mark_page_done(0)
+
+    with CrawlFrontier("arxiv", "graphs", path=path) as frontier:
+        assert frontier.is_page_done(0)
+        assert not frontier.is_page_done(1)
+        assert not frontier.should_visit("https://a/1")
+        # Failed URLs are retried on the next run
+        assert frontier.should_visit("https://a/2")
+        assert frontier.should_visit("https://a/3")
+        assert frontier.stats() == {"pages": 1, "outcomes": {"downloaded": 1, "failed": 1}}
+
+
+def test_urls_recorded_after_last_checkpoint_survive_a_crash(tmp_path):
+    path = os.path.join(tmp_path, "frontier.sqlite")
+    frontier = CrawlFrontier("hrcak", "fizika", path=path)
+    frontier.mark_page_done(0)
+    frontier.record("https://h/1", "downloaded")
+    # Crash: the connection goes away without close() saving the Bloom filter
+    frontier._conn.close()
+
+    with CrawlFrontier("hrcak", "fizika", path=path) as frontier:
+        assert frontier.outcome("https://h/1") == "downloaded"
+
+
+def test_queries_are_separate(tmp_path):
+    path = os.path.join(tmp_path, "frontier.sqlite")
+    with CrawlFrontier("arxiv", "graphs", path=path) as frontier:
+        frontier.record("https://a/1", "downloaded")
+        frontier.mark_page_done(0)
+
+    with CrawlFrontier("arxiv", "trees", path=path) as frontier:
+        assert frontier.should_visit("https://a/1")
+        assert not frontier.is_page_done(0)
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+        self.encoding = "utf-8"
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Server Error")
+
+
+def test_fetch_errors_are_retried_on_the_next_run(tmp_path, monkeypatch):
+    hrcak = pytest.importorskip("hrcak")
+    search_page = b'<html><body><h5><a href="/clanak/1">Article</a></h5></body></html>'
+
+    def get(url, **kwargs):
+        # The search page loads, the article page is temporarily unavailable
+        return FakeResponse(200, search_page) if "pretraga" in url else FakeResponse(503)
+
+    monkeypatch.setattr(hrcak.requests, "get", get)
+    path = os.path.join(tmp_path, "frontier.sqlite")
+    with CrawlFrontier("hrcak", "fizika", path=path) as frontier:
+        hrcak.scrape_search_pages(frontier, "https://hrcak.srce.hr", "fizika", 1, str(tmp_path))
+        assert frontier.outcome("https://hrcak.srce.hr/clanak/1") == "failed"
+        assert frontier.should_visit("https://hrcak.srce.hr/clanak/1")
+        assert not frontier.is_page_done(0)
+
+    # A failing search page is not marked done either
+    monkeypatch.setattr(hrcak.requests, "get", lambda url, **kwargs: FakeResponse(429))
+    with CrawlFrontier("hrcak", "kemija", path=path) as frontier:
+        hrcak.scrape_search_pages(frontier, "https://hrcak.srce.hr", "kemija", 1, str(tmp_path))
+        assert not frontier.is_page_done(0)
@@ -0,0 +1,45 @@
+import pytest
+
+import html_extract
+
+TITLE = "Čćžšđ naslov"
+PAGE = f"<html><head><title>{TITLE}</title></head><body><h1>{TITLE}</h1></body></html>"
+
+
+@pytest.fixture(params=["lxml", "bs4"])
+def backend(request, monkeypatch):
+    if request.param == "bs4":
+        bs4 = pytest.importorskip("bs4")
+        monkeypatch.setattr(html_extract, "HAVE_LXML", False)
+        monkeypatch.setattr(html_extract, "BeautifulSoup", bs4.BeautifulSoup, raising=False)
+        monkeypatch.setattr(html_extract, "SoupStrainer", bs4.SoupStrainer, raising=False)
+    elif not html_extract.HAVE_LXML:
+        pytest.skip("lxml not installed")
+    return request.param
+
+
+def test_utf8_page_without_meta_charset(backend):
+    page = html_extract.parse_page(PAGE.encode("utf-8"))
+    assert page["title"] == TITLE
+    assert page["heading"] == TITLE
+
+
+def test_meta_charset_is_honoured(backend):
+    html = f'<html><head><meta charset="windows-1250"><title>{TITLE}</title></head></html>'
+    assert html_extract.parse_page(html.encode("cp1250"))["title"] == TITLE
+
+
+def test_declared_encoding_wins(backend):
+    page = html_extract.parse_page(PAGE.encode("cp1250"), encoding="cp1250")
+    assert page["title"] == TITLE
+
+
+class FakeResponse:
+    def __init__(self, content_type, encoding):
+        self.headers = {"Content-Type": content_type}
+        self.encoding = encoding
+
+
+def test_response_encoding_ignores_requests_default():
+    assert html_extract.response_encoding(FakeResponse("text/html", "ISO-8859-1")) is None
+    assert html_extract.response_encoding(FakeResponse("text/html; charset=UTF-8", "UTF-8")) == "UTF-8"
@@ -0,0 +1,75 @@
+import io
+import json
+import os
+
+import pytest
+
+import json_stream
+from json_stream import iter_json_array, iter_json_field
+
+DOCUMENTS = [
+    {"a": 1234567, "paragraphs": ["x", "y"]},
+    {"content": "Dugi tekst s \"navodnicima\" i \\ kosom crtom " * 5,
+     "meta": {"n": [1.5e10, -0.25, True, False, None], "s": "čćžšđ"},
+     "paragraphs": ["Prvi odlomak čćžšđ.", "", "12345678901234567890", "Treći ☃ odlomak."],
+     "after": 98765},
+    {"paragraphs": [], "x": 1},
+    {"paragraphs": [123456789, 3.14159265, "kraj"]},
+    {"content": "bez odlomaka"},
+]
+
+
+def fallback_items(data, read_size, monkeypatch):
+    monkeypatch.setattr(json_stream, "HAVE_IJSON", False)
+    return list(iter_json_field(io.BytesIO(data), "paragraphs", read_size))
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("read_size", [1, 2, 3, 5, 7, 12, 64])
+def test_fallback_matches_json(document, read_size, monkeypatch):
+    data = json.dumps(document, ensure_ascii=False).encode("utf-8")
+    assert fallback_items(data, read_size, monkeypatch) == document.get("paragraphs", [])
+
+
+@pytest.mark.parametrize("read_size", [1, 4, 12])
+def test_fallback_matches_ijson(read_size, monkeypatch):
+    ijson = pytest.importorskip("ijson")
+    for document in DOCUMENTS:
+        data = json.dumps(document, ensure_ascii=False, indent=1).encode("utf-8")
+        # ijson returns Decimal for non-integral numbers; compare through float
+        expected = [float(item) if not isinstance(item, (str, int)) else item
+                    for item in ijson.items(io.BytesIO(data), "paragraphs.item")]
+        assert fallback_items(data, read_size, monkeypatch) == expected
+
+
+def test_fallback_rejects_truncated_array(monkeypatch):
+    with pytest.raises(ValueError):
+        fallback_items(b'{"paragraphs": ["a", "b"', 3, monkeypatch)
+
+
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 12, 64])
+def test_fallback_array_matches_json(read_size, monkeypatch):
+    monkeypatch.setattr(json_stream, "HAVE_IJSON", False)
+    records = [{"id": 1234567, "bibjson": {"title": "Naslov čćž", "year": 2024.5}}, [], 98765, "kraj"]
+    data = json.dumps(records, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(io.BytesIO(data), read_size)) == records
+    assert list(iter_json_array(io.BytesIO(b" [ ] "), read_size)) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.BytesIO(b'[{"a": 1}, {"b"'), read_size))
+
+
+def test_untitled_dump_records_get_distinct_names(tmp_path, monkeypatch):
+    doaj = pytest.importorskip("doaj")
+    monkeypatch.setattr(json_stream, "HAVE_IJSON", False)
+    monkeypatch.chdir(tmp_path)
+    records = [{"bibjson": {"abstract": f"Record {n}"}} for n in range(5)]
+    records[3]["id"] = "abc123"
+    dump = tmp_path / "dump.json"
+    dump.write_text(json.dumps(records), encoding="utf-8")
+
+    # Batches of two: the article numbers must keep counting across batches
+    assert doaj.ingest_dump(str(dump), download=False, batch_size=2) == (5, 5)
+    names = sorted(os.listdir(tmp_path / "metadata"))
+    assert names == ["article_1.txt", "article_2.txt", "article_3.txt", "article_5.txt", "article_abc123.txt"]
@@ -0,0 +1,156 @@
+import os
+import time
+
+import fitz  # PyMuPDF
+import pytest
+
+import ocr_queue
+
+
+def make_pdf(path, pages):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+    doc.save(path)
+    doc.close()
+
+
+@pytest.fixture
+def queue(tmp_path):
+    pdfs = tmp_path / "pdfs"
+    pdfs.mkdir()
+    make_pdf(str(pdfs / "scan.pdf"), 5)
+    conn = ocr_queue.connect(str(tmp_path / "queue.sqlite"))
+    added = ocr_queue.enqueue_folder(conn, str(pdfs), str(tmp_path / "txts"), pages_per_job=2)
+    assert added == 3
+    yield conn
+    conn.close()
+
+
+def write_result(job, worker_id, text):
+    tmp_path, final_path = ocr_queue.result_paths(job, worker_id)
+    os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+    with open(tmp_path, "w", encoding="utf-8") as result_file:
+        result_file.write(text)
+    return tmp_path, final_path
+
+
+def statuses(conn):
+    return [row[0] for row in conn.execute("SELECT status FROM jobs ORDER BY first_page")]
+
+
+def test_rollback_journal_unless_single_host(tmp_path):
+    shared = ocr_queue.connect(str(tmp_path / "shared.sqlite"))
+    local = ocr_queue.connect(str(tmp_path / "local.sqlite"), single_host=True)
+    assert shared.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert local.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    shared.close()
+    local.close()
+
+
+def test_enqueue_is_idempotent(queue, tmp_path):
+    assert ocr_queue.enqueue_folder(queue, str(tmp_path / "pdfs"), str(tmp_path / "txts"), pages_per_job=2) == 0
+    ranges = queue.execute("SELECT first_page, last_page FROM jobs ORDER BY first_page").fetchall()
+    assert ranges == [(1, 2), (3, 4), (5, 5)]
+
+
+def test_workers_claim_different_jobs(queue):
+    first = ocr_queue.claim(queue, "a")
+    second = ocr_queue.claim(queue, "b")
+    third = ocr_queue.claim(queue, "a")
+    assert len({first["id"], second["id"], third["id"]}) == 3
+    assert ocr_queue.claim(queue, "b") is None
+
+
+def test_expired_lease_is_reclaimed_and_stale_result_discarded(queue):
+    stale = ocr_queue.claim(queue, "a", lease_seconds=-1)
+    taken = ocr_queue.claim(queue, "b")
+    assert taken["id"] == stale["id"]
+    assert taken["attempts"] == 2
+    assert not ocr_queue.heartbeat(queue, stale["id"], "a")
+    assert ocr_queue.heartbeat(queue, taken["id"], "b")
+
+    new_tmp, final_path = write_result(taken, "b", "new")
+    assert ocr_queue.complete(queue, taken, "b", new_tmp, final_path) == (True, False)
+
+    # The worker that lost the lease must not overwrite the result
+    old_tmp, _ = write_result(stale, "a", "old")
+    assert ocr_queue.complete(queue, stale, "a", old_tmp, final_path) == (False, False)
+    assert not os.path.exists(old_tmp)
+    with open(final_path, encoding="utf-8") as part_file:
+        assert part_file.read() == "new"
+
+
+def test_job_fails_after_max_attempts(queue):
+    for attempt in range(ocr_queue.MAX_ATTEMPTS):
+        job = ocr_queue.claim(queue, "a")
+        assert job["first_page"] == 1
+        ocr_queue.fail(queue, job, "a", "boom")
+    assert statuses(queue)[0] == "failed"
+
+
+def test_last_range_merges_then_finishes(queue):
+    jobs = [ocr_queue.claim(queue, "a") for _ in range(3)]
+    results = []
+    for job in jobs:
+        tmp_path, final_path = write_result(job, "a", f"pages from {job['first_page']}\n")
+        results.append(ocr_queue.complete(queue, job, "a", tmp_path, final_path))
+    assert results == [(True, False), (True, False), (True, True)]
+    # The last range stays leased until the merge is done
+    assert statuses(queue) == ["done", "done", "leased"]
+
+    ocr_queue.merge_parts(queue, jobs[-1])
+    assert ocr_queue.finish_merge(queue, jobs[-1], "a")
+    assert statuses(queue) == ["done", "done", "done"]
+    with open(jobs[0]["output_path"], encoding="utf-8") as text_file:
+        assert text_file.read() == "pages from 1\npages from 3\npages from 5\n"
+    assert not any(os.path.exists(ocr_queue.part_path(job)) for job in jobs)
+
+
+def test_merge_redone_after_crash(queue):
+    jobs = [ocr_queue.claim(queue, "a") for _ in range(3)]
+    for job in jobs:
+        ocr_queue.complete(queue, job, "a", *write_result(job, "a", "text\n"))
+    ocr_queue.merge_parts(queue, jobs[-1])
+
+    # Crash after the merge: the last range is still leased and its lease expires
+    queue.execute("UPDATE jobs SET lease_expires = 0 WHERE id = ?", (jobs[-1]["id"],))
+    redo = ocr_queue.claim(queue, "b")
+    assert redo["id"] == jobs[-1]["id"]
+    assert ocr_queue.complete(queue, redo, "b", *write_result(redo, "b", "text\n")) == (True, True)
+    ocr_queue.merge_parts(queue, redo)
+    assert ocr_queue.finish_merge(queue, redo, "b")
+    assert not os.path.exists(ocr_queue.part_path(redo))
+    with open(redo["output_path"], encoding="utf-8") as text_file:
+        assert text_file.read() == "text\n" * 3
+
+
+def test_failed_jobs_record_when_they_finished(queue):
+    for attempt in range(ocr_queue.MAX_ATTEMPTS):
+        job = ocr_queue.claim(queue, "a")
+        ocr_queue.fail(queue, job, "a", "boom")
+        finished = queue.execute("SELECT finished FROM jobs WHERE id = ?", (job["id"],)).fetchone()[0]
+        # Only the terminal failure is finished; retried attempts are not
+        assert (finished is not None) == (attempt == ocr_queue.MAX_ATTEMPTS - 1)
+
+    # A job whose last attempt crashed is failed by the next claim
+    for attempt in range(ocr_queue.MAX_ATTEMPTS):
+        job = ocr_queue.claim(queue, "b", lease_seconds=-1)
+    assert job["first_page"] == 3
+    ocr_queue.claim(queue, "c")
+    status, finished = queue.execute("SELECT status, finished FROM jobs WHERE id = ?", (job["id"],)).fetchone()
+    assert status == "failed" and finished is not None
+
+
+def test_heartbeat_stops_renewing_a_hung_job(queue, tmp_path):
+    job = ocr_queue.claim(queue, "a", lease_seconds=1)
+    beat = ocr_queue.Heartbeat(str(tmp_path / "queue.sqlite"), job["id"], "a", lease_seconds=1,
+                               interval=0.05, max_seconds=0.3)
+    beat.start()
+    beat.join(timeout=5)
+    assert beat.expired and not beat.is_alive()
+
+    # The lease lapses and another worker takes the job over
+    time.sleep(1.1)
+    taken = ocr_queue.claim(queue, "b")
+    assert taken["id"] == job["id"]
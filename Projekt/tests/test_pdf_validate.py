@@ -0,0 +1,97 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+import pdf_validate
+from pdf_validate import (InvalidPdfError, check_pdf_bytes, check_pdf_structure, stream_pdf_download,
+                          valid_pdfs)
+
+
+def pdf_bytes(pages=2, encrypted=False):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+    if encrypted:
+        data = doc.tobytes(encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner", user_pw="user")
+    else:
+        data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture
+def folders(tmp_path):
+    pdfs = tmp_path / "pdfs"
+    pdfs.mkdir()
+    data = pdf_bytes()
+    (pdfs / "good.pdf").write_bytes(data)
+    # Cut off before the startxref/%%EOF trailer, as an interrupted download would be
+    (pdfs / "truncated.pdf").write_bytes(data[:data.rindex(b"startxref")])
+    (pdfs / "page.pdf").write_bytes(b"<!DOCTYPE html><html><body>Access denied</body></html>")
+    (pdfs / "locked.pdf").write_bytes(pdf_bytes(encrypted=True))
+    (pdfs / "notes.txt").write_text("not a PDF name", encoding="utf-8")
+    return pdfs, tmp_path / "quarantine"
+
+
+def test_checks_on_disk_and_in_memory(folders):
+    pdfs, _ = folders
+    expected = {
+        "good.pdf": (True, 2),
+        "truncated.pdf": (False, "missing startxref/%%EOF trailer (truncated?)"),
+        "page.pdf": (False, "missing %PDF header"),
+        "locked.pdf": (False, "encrypted"),
+    }
+    for name, result in expected.items():
+        assert check_pdf_structure(str(pdfs / name)) == result
+        assert check_pdf_bytes((pdfs / name).read_bytes()) == result
+    assert check_pdf_bytes(b"") == (False, "empty file")
+
+
+def test_bad_files_are_quarantined_and_good_ones_stay(folders):
+    pdfs, quarantine = folders
+    assert valid_pdfs(str(pdfs), str(quarantine)) == ["good.pdf"]
+    assert sorted(os.listdir(pdfs)) == ["good.pdf", "notes.txt"]
+    assert sorted(os.listdir(quarantine)) == [
+        "locked.pdf", "locked.pdf.reason.txt", "page.pdf", "page.pdf.reason.txt",
+        "truncated.pdf", "truncated.pdf.reason.txt"]
+    assert (quarantine / "locked.pdf.reason.txt").read_text(encoding="utf-8") == "encrypted\n"
+
+    # A second pass finds nothing more to move
+    assert valid_pdfs(str(pdfs), str(quarantine)) == ["good.pdf"]
+
+
+class FakeResponse:
+    def __init__(self, body, content_length=True):
+        self.body = body
+        self.headers = {"Content-Type": "application/pdf"}
+        if content_length:
+            self.headers["Content-Length"] = str(len(body))
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.mark.parametrize("content_length", [True, False])
+def test_oversized_download_is_rejected(tmp_path, monkeypatch, content_length):
+    body = pdf_bytes(pages=20)
+    monkeypatch.setattr(pdf_validate.requests, "get",
+                        lambda url, **kwargs: FakeResponse(body, content_length))
+    save_path = str(tmp_path / "big.pdf")
+    with pytest.raises(InvalidPdfError):
+        stream_pdf_download("https://example.org/big.pdf", save_path, max_size=len(body) - 1)
+    # Neither the PDF nor its partial download is left behind
+    assert os.listdir(tmp_path) == []
+
+    assert stream_pdf_download("https://example.org/big.pdf", save_path, max_size=len(body)) == len(body)
+    assert check_pdf_structure(save_path) == (True, 20)
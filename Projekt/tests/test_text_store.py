@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+
+import text_store
+from text_store import TextStore, import_json_folder, import_text_folder
+
+PARAGRAPHS = ["Prvi odlomak o čćžšđ.", "Second paragraph\nwith two lines.", "Treći odlomak."]
+CONTENT = "\n\n".join(PARAGRAPHS)
+
+
+def test_round_trip(tmp_path):
+    with TextStore(str(tmp_path)) as store:
+        store.add_document("a.txt", CONTENT, metadata={"abstract": "Sažetak"})
+        store.commit()
+        assert store.get_document("a.txt") == CONTENT
+        assert [store.get_paragraph("a.txt", n) for n in range(3)] == PARAGRAPHS
+        assert store.get_paragraph("a.txt", 3) is None
+        assert store.get_document("missing.txt") is None
+
+    # Everything is read back from disk after reopening
+    with TextStore(str(tmp_path)) as store:
+        assert store.names() == ["a.txt"]
+        assert store.get_document("a.txt") == CONTENT
+        assert store.get_paragraph("a.txt", 1) == PARAGRAPHS[1]
+        assert store.get_metadata("a.txt") == {"abstract": "Sažetak"}
+
+
+def test_paragraphs_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_store, "BLOCK_SIZE", 64)
+    paragraphs = [f"Paragraph {n} " + "č" * (n * 7 + 1) for n in range(40)]
+    with TextStore(str(tmp_path)) as store:
+        store.add_document("long.txt", "\n\n".join(paragraphs))
+        store.add_document("short.txt", "Kratko.")
+        assert [store.get_paragraph("long.txt", n) for n in range(40)] == paragraphs
+        assert store.get_document("short.txt") == "Kratko."
+
+
+def test_late_document_in_a_large_shard(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_store, "BLOCK_SIZE", 64)
+    with TextStore(str(tmp_path)) as store:
+        for n in range(2000):
+            store.add_document(f"filler{n:04d}.txt", f"Filler document {n} " + "x" * 40)
+        # 100 bytes cannot fit in one 64-byte block
+        last = "Zadnji dokument " + "ž" * 42
+        store.add_document("last.txt", last)
+
+    def index_steps(store, name):
+        # SQLite virtual machine steps spent on the lookup, in units of 10
+        steps = []
+        store._conn.set_progress_handler(lambda: steps.append(1) and 0, 10)
+        content = store.get_document(name)
+        store._conn.set_progress_handler(None, 10)
+        return content, len(steps)
+
+    with TextStore(str(tmp_path)) as store:
+        content, late_steps = index_steps(store, "last.txt")
+        assert content == last
+        content, early_steps = index_steps(store, "filler0000.txt")
+        assert content.startswith("Filler document 0 ")
+        # The block lookup must not scan the shard from its start
+        assert late_steps <= early_steps + 5
+
+
+def test_replacing_a_document(tmp_path):
+    with TextStore(str(tmp_path)) as store:
+        store.add_document("a.txt", CONTENT)
+        store.add_document("a.txt", "Nova verzija.")
+        assert store.get_document("a.txt") == "Nova verzija."
+        assert store.get_paragraph("a.txt", 1) is None
+        assert store.stats()["documents"] == 1
+
+
+def test_shard_rotation(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_store, "BLOCK_SIZE", 256)
+    monkeypatch.setattr(text_store, "MAX_SHARD_SIZE", 1024)
+    documents = {f"doc{n}.txt": f"Document {n}\n\n" + os.urandom(600).hex() for n in range(10)}
+    with TextStore(str(tmp_path)) as store:
+        for name, content in documents.items():
+            store.add_document(name, content)
+    shards = [name for name in os.listdir(tmp_path) if name.startswith("shard-")]
+    assert len(shards) > 1
+
+    with TextStore(str(tmp_path)) as store:
+        store.add_document("late.txt", "Added after reopening.")
+        for name, content in documents.items():
+            assert store.get_document(name) == content
+        assert store.get_paragraph("doc3.txt", 0) == "Document 3"
+        assert store.get_document("late.txt") == "Added after reopening."
+
+
+def test_dictionary_only_before_first_document(tmp_path):
+    with TextStore(str(tmp_path)) as store:
+        store.add_document("a.txt", CONTENT)
+        with pytest.raises(ValueError):
+            store.train_dictionary(PARAGRAPHS)
+
+
+def test_converted_documents_imported_once(tmp_path):
+    folder = tmp_path / "txts"
+    folder.mkdir()
+    (folder / "a.txt").write_text(CONTENT, encoding="utf-8")
+    (folder / "a.json").write_text(json.dumps({"content": CONTENT, "paragraphs": PARAGRAPHS,
+                                               "metadata": {"keywords": ["x"]}}), encoding="utf-8")
+    (folder / "b.txt").write_text("Not converted yet.", encoding="utf-8")
+
+    with TextStore(str(tmp_path / "store")) as store:
+        assert import_json_folder(store, str(folder)) == 1
+        assert import_text_folder(store, str(folder), skip_converted=True) == 1
+        assert store.names() == ["txts/a.json", "txts/b.txt"]
+        rebuilt = store.get_json("txts/a.json")
+        assert rebuilt["paragraphs"] == PARAGRAPHS
+        assert rebuilt["metadata"] == {"keywords": ["x"]}
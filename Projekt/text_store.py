@@ -0,0 +1,447 @@
+import json
+import os
+import re
+import sqlite3
+import zstandard
+
+# Uncompressed size of one independently compressed block (32 KiB)
+BLOCK_SIZE = 32 * 1024
+# Start a new shard file once the current one reaches this size (1 GiB)
+MAX_SHARD_SIZE = 1024 * 1024 * 1024
+# Size of the trained zstd dictionary and how much sample text to train it on
+DICT_SIZE = 112 * 1024
+SAMPLE_BYTES = 10 * 1024 * 1024
+COMPRESSION_LEVEL = 9
+
+# Same paragraph split as json_convert
+PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n')
+
+
+def paragraph_spans(content):
+    """
+    Return (start, end) character spans of the paragraphs in a text.
+
+    Paragraphs are separated by blank lines and stripped, exactly as in
+    json_convert.txt_to_json.
+    """
+    spans = []
+    start = 0
+    for match in list(PARAGRAPH_SPLIT_RE.finditer(content)) + [None]:
+        end = match.start() if match else len(content)
+        segment = content[start:end]
+        stripped = segment.strip()
+        if stripped:
+            offset = start + segment.index(stripped)
+            spans.append((offset, offset + len(stripped)))
+        if match:
+            start = match.end()
+    return spans
+
+
+def find_paragraph_spans(content, paragraphs):
+    """
+    Locate a list of paragraphs in the text they were split from.
+
+    Returns:
+        list: (start, end) character spans, or None if a paragraph is not found in order.
+    """
+    spans = []
+    position = 0
+    for paragraph in paragraphs:
+        start = content.find(paragraph, position)
+        if start < 0:
+            return None
+        spans.append((start, start + len(paragraph)))
+        position = start + len(paragraph)
+    return spans
+
+
+class TextStore:
+    """
+    Compressed, append-only store for extracted text and json_convert output.
+
+    Documents are concatenated into shard files and cut into fixed-size
+    blocks that are compressed independently with a zstd dictionary trained
+    on the corpus. A SQLite index maps every document and paragraph to a
+    byte range of the uncompressed stream, so reading one paragraph only
+    decompresses the one or two blocks it falls in.
+    """
+
+    def __init__(self, path="text_store"):
+        """
+        Parameters:
+            path (str): Directory holding the index and shard files.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite"))
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);"
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            " shard INTEGER, offset INTEGER, length INTEGER, raw_start INTEGER, raw_length INTEGER,"
+            " PRIMARY KEY (shard, raw_start));"
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " name TEXT PRIMARY KEY, shard INTEGER, raw_start INTEGER, raw_length INTEGER,"
+            " paragraph_count INTEGER, metadata TEXT);"
+            "CREATE TABLE IF NOT EXISTS paragraphs ("
+            " name TEXT, number INTEGER, raw_start INTEGER, raw_length INTEGER,"
+            " PRIMARY KEY (name, number));"
+        )
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dictionary'").fetchone()
+        self._dictionary = zstandard.ZstdCompressionDict(row[0]) if row else None
+        self._make_codecs()
+
+        # Continue appending to the last shard
+        row = self._conn.execute(
+            "SELECT shard, MAX(raw_start + raw_length) FROM blocks"
+            " WHERE shard = (SELECT MAX(shard) FROM blocks)"
+        ).fetchone()
+        self._shard = row[0] if row and row[0] is not None else 0
+        self._raw_end = row[1] if row and row[1] is not None else 0
+        self._pending = bytearray()
+        self._pending_start = self._raw_end
+        self._writer = None
+        self._readers = {}
+
+    def _make_codecs(self):
+        if self._dictionary is not None:
+            self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=self._dictionary)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionary)
+        else:
+            self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    def train_dictionary(self, samples, dict_size=DICT_SIZE):
+        """
+        Train the zstd dictionary on sample texts before the first document is added.
+
+        Parameters:
+            samples (list): Sample strings, e.g. paragraphs from the corpus.
+            dict_size (int): Size of the dictionary in bytes.
+
+        Returns:
+            bool: True if a dictionary was trained, False if there was too little data.
+        """
+        if self._dictionary is not None or self._raw_end or self._pending:
+            raise ValueError("The dictionary must be trained before documents are added")
+
+        encoded = [sample.encode("utf-8") for sample in samples if sample]
+        try:
+            dictionary = zstandard.train_dictionary(dict_size, encoded)
+        except zstandard.ZstdError as e:
+            print(f"Not enough sample data to train a dictionary ({e}); compressing without one")
+            return False
+
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dictionary', ?)",
+                           (dictionary.as_bytes(),))
+        self._conn.commit()
+        self._dictionary = dictionary
+        self._make_codecs()
+        return True
+
+    def _shard_path(self, shard):
+        return os.path.join(self.path, f"shard-{shard:05d}.zst")
+
+    def _flush_block(self):
+        if not self._pending:
+            return
+        if self._writer is None:
+            self._writer = open(self._shard_path(self._shard), "ab")
+
+        compressed = self._compressor.compress(bytes(self._pending))
+        offset = self._writer.tell()
+        self._writer.write(compressed)
+        self._writer.flush()
+        self._conn.execute(
+            "INSERT INTO blocks (shard, offset, length, raw_start, raw_length) VALUES (?, ?, ?, ?, ?)",
+            (self._shard, offset, len(compressed), self._pending_start, len(self._pending)),
+        )
+        self._pending_start += len(self._pending)
+        self._pending = bytearray()
+
+    def _append(self, data):
+        """Append bytes to the current shard's stream, cutting full blocks as they fill."""
+        start = self._raw_end
+        view = memoryview(data)
+        while view:
+            room = BLOCK_SIZE - len(self._pending)
+            self._pending += view[:room]
+            view = view[room:]
+            if len(self._pending) >= BLOCK_SIZE:
+                self._flush_block()
+        self._raw_end += len(data)
+        return start
+
+    def _rotate_shard_if_full(self):
+        if self._writer is not None and self._writer.tell() >= MAX_SHARD_SIZE:
+            self._flush_block()
+            self._writer.close()
+            self._writer = None
+            self._shard += 1
+            self._raw_end = 0
+            self._pending_start = 0
+
+    def add_document(self, name, content, paragraphs=None, metadata=None):
+        """
+        Add (or replace) a document.
+
+        Parameters:
+            name (str): Unique document name, e.g. the source file name.
+            content (str): The full text.
+            paragraphs (list): Optional paragraphs as produced by json_convert;
+                split from content when omitted.
+            metadata (dict): Optional JSON-serializable metadata.
+        """
+        self._rotate_shard_if_full()
+
+        spans = find_paragraph_spans(content, paragraphs) if paragraphs is not None else None
+        if spans is None:
+            spans = paragraph_spans(content)
+
+        # Convert character spans to byte offsets within the encoded document
+        encoded = content.encode("utf-8")
+        byte_spans = []
+        byte_pos, char_pos = 0, 0
+        for start, end in spans:
+            byte_pos += len(content[char_pos:start].encode("utf-8"))
+            length = len(content[start:end].encode("utf-8"))
+            byte_spans.append((byte_pos, length))
+            byte_pos += length
+            char_pos = end
+
+        doc_start = self._append(encoded)
+        self._conn.execute("DELETE FROM paragraphs WHERE name = ?", (name,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (name, shard, raw_start, raw_length, paragraph_count, metadata)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (name, self._shard, doc_start, len(encoded), len(byte_spans),
+             json.dumps(metadata, ensure_ascii=False) if metadata is not None else None),
+        )
+        self._conn.executemany(
+            "INSERT INTO paragraphs (name, number, raw_start, raw_length) VALUES (?, ?, ?, ?)",
+            [(name, number, doc_start + start, length) for number, (start, length) in enumerate(byte_spans)],
+        )
+
+    def commit(self):
+        """Flush the current block and commit the index."""
+        self._flush_block()
+        self._conn.commit()
+
+    def _read_range(self, shard, start, length):
+        if shard == self._shard and start + length > self._pending_start:
+            self.commit()
+
+        # Seek to the block holding the first byte, then read forward; both
+        # lookups are bounded ranges of the (shard, raw_start) primary key
+        first = self._conn.execute(
+            "SELECT raw_start FROM blocks WHERE shard = ? AND raw_start <= ?"
+            " ORDER BY raw_start DESC LIMIT 1",
+            (shard, start),
+        ).fetchone()
+        if first is None:
+            return b""
+        blocks = self._conn.execute(
+            "SELECT offset, length, raw_start FROM blocks"
+            " WHERE shard = ? AND raw_start >= ? AND raw_start < ?"
+            " ORDER BY raw_start",
+            (shard, first[0], start + length),
+        ).fetchall()
+
+        reader = self._readers.get(shard)
+        if reader is None:
+            reader = self._readers[shard] = open(self._shard_path(shard), "rb")
+
+        data = bytearray()
+        for offset, compressed_length, _ in blocks:
+            reader.seek(offset)
+            data += self._decompressor.decompress(reader.read(compressed_length))
+        first_block_start = blocks[0][2]
+        return bytes(data[start - first_block_start:start - first_block_start + length])
+
+    def names(self):
+        """Return the names of all stored documents."""
+        return [row[0] for row in self._conn.execute("SELECT name FROM documents ORDER BY name")]
+
+    def get_document(self, name):
+        """
+        Read the full text of a document.
+
+        Returns:
+            str: The text, or None if the document does not exist.
+        """
+        row = self._conn.execute(
+            "SELECT shard, raw_start, raw_length FROM documents WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._read_range(*row).decode("utf-8")
+
+    def get_paragraph(self, name, number):
+        """
+        Read a single paragraph without decompressing the rest of the document.
+
+        Returns:
+            str: The paragraph, or None if it does not exist.
+        """
+        row = self._conn.execute(
+            "SELECT d.shard, p.raw_start, p.raw_length FROM paragraphs p"
+            " JOIN documents d ON d.name = p.name WHERE p.name = ? AND p.number = ?",
+            (name, number),
+        ).fetchone()
+        if row is None:
+            return None
+        return self._read_range(*row).decode("utf-8")
+
+    def get_metadata(self, name):
+        """Return the metadata stored with a document, or None."""
+        row = self._conn.execute("SELECT metadata FROM documents WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def get_json(self, name):
+        """
+        Rebuild the json_convert structure of a document imported with import_json_folder.
+
+        Returns:
+            dict: The document dictionary, or None if it does not exist.
+        """
+        content = self.get_document(name)
+        if content is None:
+            return None
+        data = self.get_metadata(name) or {}
+        count = self._conn.execute(
+            "SELECT paragraph_count FROM documents WHERE name = ?", (name,)
+        ).fetchone()[0]
+        data["content"] = content
+        data["paragraphs"] = [self.get_paragraph(name, number) for number in range(count)]
+        return data
+
+    def stats(self):
+        """
+        Return stored sizes.
+
+        Returns:
+            dict: documents, raw_bytes, compressed_bytes and ratio.
+        """
+        documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        raw, compressed = self._conn.execute(
+            "SELECT COALESCE(SUM(raw_length), 0), COALESCE(SUM(length), 0) FROM blocks"
+        ).fetchone()
+        return {
+            "documents": documents,
+            "raw_bytes": raw,
+            "compressed_bytes": compressed,
+            "ratio": raw / compressed if compressed else 0.0,
+        }
+
+    def close(self):
+        """Flush pending data and close all files."""
+        self.commit()
+        if self._writer is not None:
+            self._writer.close()
+        for reader in self._readers.values():
+            reader.close()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_text_file(path):
+    """Read a text file as UTF-8, falling back to latin-1 like json_convert."""
+    try:
+        with open(path, 'r', encoding='utf-8') as text_file:
+            return text_file.read()
+    except UnicodeDecodeError:
+        with open(path, 'r', encoding='latin-1') as text_file:
+            return text_file.read()
+
+
+def sample_paragraphs(paths, limit=SAMPLE_BYTES):
+    """Collect paragraphs from the given files until about limit bytes are gathered."""
+    samples = []
+    total = 0
+    for path in paths:
+        content = read_text_file(path)
+        if path.endswith(".json"):
+            content = json.loads(content).get("content", "")
+        for start, end in paragraph_spans(content):
+            samples.append(content[start:end])
+            total += end - start
+        if total >= limit:
+            break
+    return samples
+
+
+def import_text_folder(store, folder, skip_converted=False):
+    """
+    Import every .txt file of an extractor output folder (txts/, unstruc_txt/, pypdf2_text/).
+
+    Documents are named "<folder>/<file name>" so outputs of different extractors do not collide.
+
+    Parameters:
+        store (TextStore): The store to import into.
+        folder (str): The folder to import.
+        skip_converted (bool): Skip files that json_convert already turned into a .json
+            next to them; import those with import_json_folder.
+
+    Returns:
+        int: The number of documents imported.
+    """
+    names = sorted(os.listdir(folder))
+    converted = {name[:-len(".json")] for name in names if name.endswith(".json")} if skip_converted else set()
+    paths = [os.path.join(folder, name) for name in names
+             if name.endswith(".txt") and name[:-len(".txt")] not in converted]
+    if store.stats()["documents"] == 0 and store._dictionary is None:
+        store.train_dictionary(sample_paragraphs(paths))
+
+    prefix = os.path.basename(os.path.normpath(folder))
+    for path in paths:
+        store.add_document(f"{prefix}/{os.path.basename(path)}", read_text_file(path))
+    store.commit()
+    return len(paths)
+
+
+def import_json_folder(store, folder):
+    """
+    Import every json_convert .json file of a folder, keeping its metadata.
+
+    Returns:
+        int: The number of documents imported.
+    """
+    paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.endswith(".json")]
+    if store.stats()["documents"] == 0 and store._dictionary is None:
+        store.train_dictionary(sample_paragraphs(paths))
+
+    prefix = os.path.basename(os.path.normpath(folder))
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as json_file:
+            data = json.load(json_file)
+        content = data.pop("content", "")
+        paragraphs = data.pop("paragraphs", None)
+        store.add_document(f"{prefix}/{os.path.basename(path)}", content, paragraphs, metadata=data)
+    store.commit()
+    return len(paths)
+
+
+def main():
+    with TextStore("text_store") as store:
+        # json_convert output holds the same text as its .txt plus metadata, so
+        # converted documents are imported once, from the JSON
+        if os.path.isdir("txts"):
+            print(f"Imported {import_json_folder(store, 'txts')} JSON files from txts")
+        for folder in ("txts", "unstruc_txt", "pypdf2_text"):
+            if os.path.isdir(folder):
+                imported = import_text_folder(store, folder, skip_converted=(folder == "txts"))
+                print(f"Imported {imported} text files from {folder}")
+
+        stats = store.stats()
+        print(f"{stats['documents']} documents, {stats['raw_bytes']} bytes stored in "
+              f"{stats['compressed_bytes']} bytes ({stats['ratio']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,41 @@
 import os
 from unstructured.partition.pdf import partition_pdf
+from job_scheduler import run_extractor
+from pdf_stream import write_pages
 
 
 # Create directories if they don't exist
 input_folder = "pdfs"
 output_folder = "unstruc_txt"
 
+# Per-document limits for the supervised extractor process
+EXTRACT_TIMEOUT = 900
+MAX_RSS_MB = 4096
+
 os.makedirs(input_folder, exist_ok=True)
 os.makedirs(output_folder, exist_ok=True)
 
 
-def process_pdfs():
-    # Get all PDF files in the input folder
-    pdf_files = [f for f in os.listdir(input_folder) if f.lower().endswith('.pdf')]
-
-    if not pdf_files:
-        print(f"No PDF files found in the {input_folder} directory.")
-        return
-
-    print(f"Found {len(pdf_files)} PDF files to process...")
+def extract_elements_to_file(input_path, output_path):
+    """
+    Partition a PDF with unstructured and write its elements to a .txt file.
 
-    for pdf_file in pdf_files:
-        try:
-            print(f"Processing {pdf_file}...")
+    Returns:
+        int: The number of elements written.
+    """
+    # Extract elements from PDF
+    elements = partition_pdf(filename=input_path)
 
-            # Construct full file paths
-            input_path = os.path.join(input_folder, pdf_file)
-            output_path = os.path.join(output_folder, f"{os.path.splitext(pdf_file)[0]}.txt")
+    # Write each element to the output file instead of joining them in memory
+    return write_pages((str(el) for el in elements), output_path, separator="\n\n")
 
-            # Extract elements from PDF
-            elements = partition_pdf(filename=input_path)
 
-            # Combine all text from elements
-            full_text = "\n\n".join([str(el) for el in elements])
-
-            # Write to output file
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(full_text)
-
-            print(f"Successfully processed {pdf_file}")
-
-        except Exception as e:
-            print(f"Error processing {pdf_file}: {str(e)}")
+def process_pdfs():
+    # Layout models can run for a long time or blow up on a single document, so
+    # each PDF runs in a supervised subprocess with a time and memory limit.
+    # partition_pdf falls back to OCR for scans, so the cost depends on the text layer
+    run_extractor(extract_elements_to_file, "unstructured", input_folder, output_folder, ocr=None,
+                  timeout=EXTRACT_TIMEOUT, max_rss_mb=MAX_RSS_MB)
 
 def main():
     process_pdfs()